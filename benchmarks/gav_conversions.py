@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for GAV conversions: string GAV parsed on each call versus cached Gav forms.
+Usage: python benchmarks/gav_conversions.py [--count 1000000] [--distinct 1000]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from oc_cdtapi.NexusAPI import Gav, gav_to_filename, gav_to_path, gav_to_str, parse_gav
+
+
+def _gavs(distinct):
+    return ['org.example.group%d:artifact%d:%d.%d.%d:zip:classifier' % (_i % 10, _i, _i, _i % 7, _i % 3)
+            for _i in range(distinct)]
+
+
+def _run(name, func, gavs, count):
+    _repeat = max(1, count // len(gavs))
+    _seconds = timeit.timeit(lambda: [func(_gav) for _gav in gavs], number=_repeat)
+    _total = _repeat * len(gavs)
+    print("%-32s %10d conversions %8.3f s %12.0f per second" % (name, _total, _seconds, _total / _seconds))
+    return _seconds
+
+
+def main():
+    _parser = argparse.ArgumentParser(description="GAV conversions microbenchmark")
+    _parser.add_argument("--count", type=int, default=1000000, help="number of conversions of each kind")
+    _parser.add_argument("--distinct", type=int, default=1000, help="number of distinct GAVs")
+    _args = _parser.parse_args()
+
+    _strings = _gavs(_args.distinct)
+    _objects = list(map(Gav.parse, _strings))
+
+    for _name, _baseline, _string, _object in [
+            ("path", lambda x: gav_to_path(parse_gav(x)), gav_to_path, lambda x: x.path),
+            ("filename", lambda x: gav_to_filename(parse_gav(x)), gav_to_filename, lambda x: x.filename),
+            ("str", lambda x: gav_to_str(parse_gav(x)), lambda x: str(Gav.parse(x)), str)]:
+        _base_s = _run("%s: parse on each call" % _name, _baseline, _strings, _args.count)
+        _string_s = _run("%s: string, cached" % _name, _string, _strings, _args.count)
+        _object_s = _run("%s: Gav" % _name, _object, _objects, _args.count)
+        print("%-32s string x%.1f, Gav x%.1f\n" % (
+            "%s: speedup" % _name, _base_s / _string_s, _base_s / _object_s))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for JSON response decoding: 'requests' Response.json versus HttpAPI.decode_json.
+Usage: python benchmarks/json_decoding.py [--hosts 100000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from oc_cdtapi.API import HttpAPI, orjson
+
+
+def _response(hosts):
+    # Foreman-like host list
+    _resp = requests.Response()
+    _resp.status_code = 200
+    _resp.encoding = 'utf-8'
+    _resp._content = json.dumps({"total": hosts, "results": [
+        {"id": _i, "name": "host%d.example.com" % _i, "uuid": "%032x" % _i,
+         "ip": "10.0.%d.%d" % (_i // 256 % 256, _i % 256),
+         "operatingsystem_name": "Linux 8", "environment_name": "production", "enabled": True}
+        for _i in range(hosts)]}).encode('utf-8')
+    return _resp
+
+
+def _run(name, func, repeat):
+    _seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+    print("%-32s %8.3f s" % (name, _seconds))
+    return _seconds
+
+
+def main():
+    _parser = argparse.ArgumentParser(description="JSON decoding microbenchmark")
+    _parser.add_argument("--hosts", type=int, default=100000, help="number of hosts in response")
+    _parser.add_argument("--repeat", type=int, default=5, help="number of runs, the best one is reported")
+    _args = _parser.parse_args()
+
+    _resp = _response(_args.hosts)
+    print("%d bytes, orjson %s" % (len(_resp.content), "installed" if orjson is not None else "not installed"))
+    _stdlib = HttpAPI('http://127.0.0.1', json_decoder=json.loads)
+    _default = HttpAPI('http://127.0.0.1')
+
+    _base_s = _run("Response.json", _resp.json, _args.repeat)
+    _stdlib_s = _run("decode_json, json.loads", lambda: _stdlib.decode_json(_resp), _args.repeat)
+    _default_s = _run("decode_json, default", lambda: _default.decode_json(_resp), _args.repeat)
+    print("%-32s json.loads x%.1f, default x%.1f" % ("speedup", _base_s / _stdlib_s, _base_s / _default_s))
+
+
+if __name__ == '__main__':
+    main()
@@ -26,6 +26,8 @@ def get_args():
     parser.add_argument("-u", "--upload", action = "store_true", help="Set the flag if you want to instantly upload given artifact")
     parser.add_argument("-del", "--delete",action = "store_true", help="Set the flag if you want to delete given artifacts")
     parser.add_argument("--fail-on-artifact-exists", dest = 'no_check_exist', default = False, action = 'store_true', help = "Fail if artifact allready exists (otherwise - silently ignore it)")
+    parser.add_argument("--parallel", type=int, default=None, help="Specify the number of artifacts to download or upload at once")
+    parser.add_argument("--manifest", type=str, help="Specify the tab-separated file with GAV and file path on each line for bulk upload")
     args = parser.parse_args()
     
     return parser,args
@@ -77,9 +79,10 @@ class ArtifactTool():
         # exception will be raised on caller methods (or here if GAV format is incorrect)
         return self.API.exists(gav, repo)
 
-    def download_artifact(self, gavs, path=None, download_repo=None, result_filenames=None):
+    def download_artifact(self, gavs, path=None, download_repo=None, result_filenames=None, parallel=None):
         """
         Downloads all given artifacts to the specified path
+        If 'parallel' is set - downloads that many artifacts at once
         """
         if not path:
             path = os.path.realpath(".")
@@ -93,20 +96,40 @@ class ArtifactTool():
         if result_filenames and len(gavs) != len(result_filenames):
             raise ValueError("GAVs and filenames quantity does not match")
 
-        for i in gavs:
+        if not result_filenames:
+            result_filenames = list(map(gav_to_filename, gavs))
+
+        if parallel:
+            return self.__download_parallel(gavs, path, download_repo, result_filenames, parallel)
+
+        for i, filename in zip(gavs, result_filenames):
             if not self.check_existence(i, download_repo):
                 raise FileNotFoundError(i)
 
-            if not result_filenames:
-                filename = gav_to_filename(i)
-            else:
-                filename = result_filenames[gavs.index(i)]
-
             with open(os.path.realpath(os.path.expanduser(path) + os.path.sep + filename), "wb") as output_file:
                 self.API.cat(i, binary=True, stream=True, repo=download_repo, write_to=output_file)
                 
             print(u"Downloaded: '{}' ==> '{}'".format(os.path.basename(i), filename))
 
+    def __download_parallel(self, gavs, path, download_repo, result_filenames, parallel):
+        """
+        Downloads artifacts concurrently, missing artifact is detected by download response itself
+        """
+        stats = self.API.download_many(gavs, os.path.realpath(os.path.expanduser(path)), workers=parallel,
+                repo=download_repo, filenames=result_filenames)
+
+        missing = [i for i in gavs if stats.get(i) is None]
+
+        for i, filename in zip(gavs, result_filenames):
+            if stats.get(i) is None:
+                continue
+
+            print(u"Downloaded: '{}' ==> '{}' ({} bytes, {:.1f} KiB/s)".format(
+                os.path.basename(i), filename, stats[i]["size"], stats[i]["rate"] / 1024))
+
+        if missing:
+            raise FileNotFoundError(", ".join(missing))
+
     def delete_artifact(self, gavs=None, upload_repo=None):
         """
         Deletes one or multiple artifacts using their GAVs
@@ -144,6 +167,55 @@ class ArtifactTool():
         else:
             print(u"Couldn't upload the file.")
 
+    def upload_manifest(self, manifest, upload_repo=None, no_check=True, parallel=None):
+        """
+        Uploads artifacts listed in tab-separated manifest: GAV and file path on each line
+        """
+        artifacts = list()
+
+        with open(os.path.expanduser(manifest), "r") as manifest_file:
+            for number, line in enumerate(manifest_file, 1):
+                line = line.strip()
+
+                if not line or line.startswith("#"):
+                    continue
+
+                fields = list(map(lambda x: x.strip(), line.split("\t")))
+
+                if len(fields) < 2 or not fields[0] or not fields[1]:
+                    raise ValueError("Manifest '%s' line %d: GAV and file path separated by tab expected, got '%s'" % (
+                        manifest, number, line))
+
+                gav, path = fields[:2]
+                path = os.path.realpath(os.path.expanduser(path))
+
+                if not os.path.isfile(path):
+                    raise ValueError("Manifest '%s' line %d: incorrect file was specified for upload: '%s'" % (
+                        manifest, number, path))
+
+                artifacts.append((gav.strip(), path))
+
+        if not artifacts:
+            raise ValueError("No GAV was specified")
+
+        if not no_check:
+            gavs = list(map(lambda x: x[0], artifacts))
+            existing = self.API.exists_many(gavs, concurrency=parallel)
+            existing.update(dict((k, v) for k, v in self.API.exists_many(
+                gavs, repo=upload_repo, concurrency=parallel).items() if v))
+
+            for gav in filter(lambda x: existing.get(x), gavs):
+                print(u"'%s' already exists, skipping upload" % gav)
+
+            artifacts = list(filter(lambda x: not existing.get(x[0]), artifacts))
+
+        responses = self.API.upload_many(artifacts, repo=upload_repo, metadata=True, workers=parallel)
+
+        for gav, path in artifacts:
+            print(u"Uploaded: '{}' ==> '{}'".format(os.path.basename(path), gav))
+
+        return responses
+
 def main():
     """
     Main function of the CLI
@@ -160,7 +232,9 @@ def main():
         raise ValueError(u"It's impossible to delete and download/upload artifacts simultaneously.")
 
     if args.download:
-        conn.download_artifact(args.gav, args.path, args.download_repo, args.filename)
+        conn.download_artifact(args.gav, args.path, args.download_repo, args.filename, args.parallel)
+    elif args.upload and args.manifest:
+        conn.upload_manifest(args.manifest, args.upload_repo, args.no_check_exist, args.parallel)
     elif args.upload:
         conn.upload_artifact(args.gav, args.path, args.upload_repo, args.no_check_exist)
     elif args.delete:
@@ -1,12 +1,35 @@
 # requires python-requests rpm package
 import doctest
+import hashlib
+import io
+import json
+import logging
 import os
 import shutil  # this required to copy data between file objects
 import posixpath
+import random
+import re
+import threading
+import time
 import urllib3
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
 
 import requests
 
+from .HttpCache import MemoryCache, entry_from_response, make_cache, response_from_entry
+from .JsonStream import iter_items
+from .Transport import Http2Adapter
+from . import Metrics
+
+# orjson is optional: without it JSON is decoded with standard library
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 import sys
 
 if sys.version_info.major == 2:
@@ -16,6 +39,300 @@ elif sys.version_info.major == 3:
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+
+def _str_to_bool(value):
+    """
+    Converts environment-like string value to boolean
+    :param str value: value to convert
+    :return bool: conversion result
+    """
+    if isinstance(value, bool):
+        return value
+
+    return str(value).strip().lower() in ['1', 'true', 'yes', 'on', 'y']
+
+
+# marks argument not given when None is a valid value
+_required = object()
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """
+    Streamed transfer was not completed within its total deadline
+    """
+    pass
+
+
+class PoolAdapter(requests.adapters.HTTPAdapter):
+    """
+    HTTP adapter with idle-connection reaping and default timeouts.
+    urllib3 keeps pooled connections open forever, so after a long pause the first requests
+    usually fail on connections already closed by the server or a balancer.
+    If 'idle_timeout' is set then all pooled connections are dropped
+    when the adapter was not used longer than this number of seconds.
+    'timeout' is used for requests sent without their own one, so direct session calls are covered as well.
+    """
+
+    def __init__(self, idle_timeout=None, timeout=None, **kvarg):
+        """
+        :param float idle_timeout: seconds of inactivity after which pooled connections are dropped
+        :param timeout: default (connect, read) timeouts, seconds, None to wait forever
+        :param kvarg: keyword arguments for requests.adapters.HTTPAdapter
+        """
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._last_used = time.monotonic()
+        self._reap_lock = threading.Lock()
+        super(PoolAdapter, self).__init__(**kvarg)
+
+    def reap_idle_connections(self, force=False):
+        """
+        Close pooled connections if adapter was idle too long
+        :param bool force: close connections regardless of idle time
+        :return bool: True if connections were closed
+        """
+        with self._reap_lock:
+            _now = time.monotonic()
+            _idle = _now - self._last_used
+            self._last_used = _now
+
+            if not force and (not self.idle_timeout or _idle < self.idle_timeout):
+                return False
+
+            self.poolmanager.clear()
+            return True
+
+    def send(self, request, **kvarg):
+        self.reap_idle_connections()
+
+        if kvarg.get('timeout') is None:
+            kvarg['timeout'] = self.timeout
+
+        _budget = getattr(self.max_retries, 'budget', None)
+
+        if _budget is not None:
+            _budget.request()
+
+        return super(PoolAdapter, self).send(request, **kvarg)
+
+
+class RetryBudget(object):
+    """
+    Limits retries to a share of requests sent within sliding time window,
+    so retries of all threads together can not multiply load on a server which is overloaded already.
+    Thread-safe, shared by all requests of a client.
+    """
+
+    def __init__(self, ratio=0.2, min_retries=10, window=10.0):
+        """
+        :param float ratio: retries allowed per request sent
+        :param int min_retries: retries allowed within window regardless of requests number
+        :param float window: window length, seconds
+        """
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests = deque()
+        self._retries = deque()
+        self._lock = threading.Lock()
+
+    def __trim(self, now):
+        for _queue in [self._requests, self._retries]:
+            while _queue and _queue[0] < now - self.window:
+                _queue.popleft()
+
+    def request(self):
+        """
+        Count request sent
+        """
+        with self._lock:
+            _now = time.monotonic()
+            self.__trim(_now)
+            self._requests.append(_now)
+
+    def withdraw(self):
+        """
+        Take one retry from budget
+        :return bool: True if retry is allowed
+        """
+        with self._lock:
+            _now = time.monotonic()
+            self.__trim(_now)
+
+            if len(self._retries) >= self.min_retries + self.ratio * len(self._requests):
+                return False
+
+            self._retries.append(_now)
+            return True
+
+
+class RetryPolicy(urllib3.Retry):
+    """
+    urllib3 retry configuration extended with:
+        - 'full jitter' exponential backoff: random delay up to the exponential one,
+          so clients failed at once do not retry at once
+        - limit for delay requested by server with 'Retry-After' header
+        - retry budget shared by all requests of a client
+    Connection errors are retried for any method, error responses - for idempotent methods only
+    (urllib3 'allowed_methods'), 'POST' is not retried on error response by default.
+    """
+
+    def __init__(self, jitter=True, retry_after_limit=None, budget=None, **kvarg):
+        """
+        :param bool jitter: randomize backoff delays
+        :param float retry_after_limit: maximum delay requested by 'Retry-After' to honor, seconds
+        :param RetryBudget budget: retry budget, unlimited if not set
+        :param kvarg: keyword arguments for urllib3.Retry
+        """
+        self.jitter = jitter
+        self.retry_after_limit = retry_after_limit
+        self.budget = budget
+        super(RetryPolicy, self).__init__(**kvarg)
+
+    def new(self, **kvarg):
+        kvarg.setdefault('jitter', self.jitter)
+        kvarg.setdefault('retry_after_limit', self.retry_after_limit)
+        kvarg.setdefault('budget', self.budget)
+        return super(RetryPolicy, self).new(**kvarg)
+
+    def get_backoff_time(self):
+        _backoff = super(RetryPolicy, self).get_backoff_time()
+        return random.uniform(0, _backoff) if self.jitter else _backoff
+
+    def get_retry_after(self, response):
+        _retry_after = super(RetryPolicy, self).get_retry_after(response)
+
+        if _retry_after is not None and self.retry_after_limit is not None:
+            return min(_retry_after, self.retry_after_limit)
+
+        return _retry_after
+
+    def increment(self, *args, **kvarg):
+        if self.budget is not None and not self.budget.withdraw():
+            raise urllib3.exceptions.MaxRetryError(
+                kvarg.get('_pool'), kvarg.get('url'),
+                kvarg.get('error') or urllib3.exceptions.ResponseError('retry budget exhausted'))
+
+        return super(RetryPolicy, self).increment(*args, **kvarg)
+
+
+class UploadStream(object):
+    """
+    Request body streamed from file path, file object, bytes or iterator of bytes chunk-by-chunk,
+    so memory used does not depend on payload size.
+    Length is reported to 'requests' if known, thus 'Content-Length' header is sent instead of chunked encoding.
+    'read' returns next chunk of 'chunk_size' bytes regardless of size requested by transport.
+    """
+
+    def __init__(self, data=None, path=None, length=None, chunk_size=None, progress=None):
+        """
+        :param data: bytes, str (encoded to UTF-8), file-like object or iterator of bytes chunks
+        :param str path: file path to read data from, if 'data' is not given
+        :param int length: payload length, detected for bytes, files and paths if not given
+        :param int chunk_size: bytes to read at once (HttpAPI.chunk_size by default)
+        :param callable progress: called as progress(sent, length) after each chunk, 'length' may be None
+        """
+        if data is None and path is None:
+            raise ValueError("Either data or path is required")
+
+        self.chunk_size = chunk_size or HttpAPI.chunk_size
+        self.progress = progress
+        self.sent = 0
+        self._fd = None
+        self._view = None
+        self._chunks = None
+
+        if isinstance(data, strtype):
+            data = data.encode('utf-8')
+
+        if path is not None:
+            self._fd = open(path, 'rb')
+            self._close = True
+        elif hasattr(data, 'read'):
+            self._fd = data
+            self._close = False
+        elif isinstance(data, (bytes, bytearray)):
+            self._view = memoryview(data)
+            length = len(data) if length is None else length
+        else:
+            self._chunks = iter(data)
+
+        if length is None and self._fd is not None:
+            try:
+                length = os.fstat(self._fd.fileno()).st_size - self._fd.tell()
+            except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+                length = None
+
+        self.length = length
+        self._start = self._fd.tell() if self._fd is not None and self.seekable() else 0
+
+    def __len__(self):
+        # zero makes 'requests' use chunked transfer encoding for unknown length
+        return self.length or 0
+
+    def __bool__(self):
+        # stream is never empty for 'requests', which replaces false data with empty dictionary
+        return True
+
+    def __iter__(self):
+        return iter(self.read, b'')
+
+    def seekable(self):
+        if self._view is not None:
+            return True
+
+        return self._fd is not None and hasattr(self._fd, 'seekable') and self._fd.seekable()
+
+    def tell(self):
+        return self.sent
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        """
+        Rewind stream, used by transport to re-send request body on retry
+        """
+        if not self.seekable() or whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("Stream can be rewound to absolute position only for bytes and seekable files")
+
+        if self._fd is not None:
+            self._fd.seek(self._start + offset)
+
+        self.sent = offset
+        return offset
+
+    def read(self, size=-1):
+        """
+        Read next chunk
+        :param int size: ignored, 'chunk_size' is used
+        :return bytes: next chunk, empty at the end of stream
+        """
+        if self._fd is not None:
+            chunk = self._fd.read(self.chunk_size)
+        elif self._view is not None:
+            chunk = self._view[self.sent:self.sent + self.chunk_size].tobytes()
+        else:
+            chunk = next(self._chunks, b'')
+
+        if isinstance(chunk, strtype):
+            chunk = chunk.encode('utf-8')
+
+        if not chunk:
+            return b''
+
+        self.sent += len(chunk)
+
+        if self.progress:
+            self.progress(self.sent, self.length)
+
+        return chunk
+
+    def close(self):
+        """
+        Close file opened by path
+        """
+        if self._fd is not None and self._close and not self._fd.closed:
+            self._fd.close()
+
+
 class HttpAPIError(Exception):
 
     def __init__(self, code=0, url='', resp=None, text=''):
@@ -28,6 +345,153 @@ class HttpAPIError(Exception):
         return self.text + ': Code ' + str(self.code) + ' ' + self.url
 
 
+class CircuitOpenError(HttpAPIError):
+    """
+    Request was not sent since circuit breaker for the server is open
+    """
+
+    def __init__(self, url='', breaker=None):
+        self.breaker = breaker
+        super(CircuitOpenError, self).__init__(0, url, None, 'Circuit breaker [%s] is open' % (
+            breaker.name if breaker is not None else ''))
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker for a server: after 'failure_threshold' consecutive failures the circuit opens
+    and requests fail fast with CircuitOpenError instead of waiting for timeouts.
+    After 'cooldown' seconds the circuit is half-open: a single probe request is let through,
+    success closes the circuit, failure opens it again for another cooldown.
+    Failures are connection errors, timeouts, 5xx responses and, if 'slow_threshold' is set,
+    responses which took longer than that.
+    Thread-safe, may be shared by any number of HttpAPI instances.
+    """
+    closed = 'closed'
+    open = 'open'
+    half_open = 'half-open'
+
+    def __init__(self, name='', failure_threshold=5, cooldown=30.0, slow_threshold=None):
+        """
+        :param str name: breaker name for errors and metrics, usually server host
+        :param int failure_threshold: consecutive failures to open the circuit
+        :param float cooldown: seconds to keep the circuit open before probing
+        :param float slow_threshold: seconds after which response is considered failure, never if not set
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.slow_threshold = slow_threshold
+        self.failures = 0
+        self.opened = 0
+        self._state = self.closed
+        self._opened_at = None
+        self._probing = False
+        self._listeners = list()
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """
+        :return str: 'closed', 'open' or 'half-open'
+        """
+        with self._lock:
+            if self._state == self.open and time.monotonic() - self._opened_at >= self.cooldown:
+                return self.half_open
+
+            return self._state
+
+    def add_listener(self, listener):
+        """
+        :param listener: object with 'circuit(breaker, state)' method called on state change, Metrics.Instrument
+        """
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def before(self, url=''):
+        """
+        Check the request may be sent
+        :param str url: request URL, for the error
+        :raises CircuitOpenError: if the circuit is open or probe is in progress already
+        """
+        with self._lock:
+            if self._state == self.closed:
+                return
+
+            if self._state == self.open and time.monotonic() - self._opened_at >= self.cooldown:
+                self.__set_state(self.half_open)
+
+            if self._state == self.half_open and not self._probing:
+                self._probing = True
+                return
+
+        raise CircuitOpenError(url, self)
+
+    def record(self, failed):
+        """
+        Record result of the request let through by 'before'
+        :param bool failed: request failed
+        """
+        with self._lock:
+            self._probing = False
+
+            if not failed:
+                self.failures = 0
+
+                if self._state != self.closed:
+                    self.__set_state(self.closed)
+
+                return
+
+            self.failures += 1
+
+            if self._state == self.half_open or (self._state == self.closed and
+                                                  self.failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self.opened += 1
+                self.__set_state(self.open)
+
+    def is_failure(self, error=None, status_code=None, seconds=None):
+        """
+        :param Exception error: exception raised by the request
+        :param int status_code: response status code
+        :param float seconds: request duration
+        :return bool: the request is a failure of the server
+        """
+        if isinstance(error, (requests.exceptions.RequestException, urllib3.exceptions.HTTPError)):
+            return True
+
+        if status_code is not None and status_code >= 500:
+            return True
+
+        return self.slow_threshold is not None and seconds is not None and seconds > self.slow_threshold
+
+    def __set_state(self, state):
+        """
+        Change state and notify listeners, lock is to be held by caller
+        """
+        if state == self.half_open:
+            logging.info("Circuit breaker [%s] is half-open, probing", self.name)
+        elif state == self.open:
+            logging.warning("Circuit breaker [%s] opened after %d failures", self.name, self.failures)
+        else:
+            logging.info("Circuit breaker [%s] closed", self.name)
+
+        self._state = state
+
+        for _listener in self._listeners:
+            try:
+                _listener.circuit(self, state)
+            except Exception as e:
+                logging.exception("Circuit breaker listener [%s] failed: %s", _listener, e)
+
+    def stats(self):
+        """
+        :return dict: 'state', consecutive 'failures' and number of times the circuit 'opened'
+        """
+        return {'state': self.state, 'failures': self.failures, 'opened': self.opened}
+
+
 class HttpAPI(object):
     """ Base class for implementing HTTP API """
     # This attributes may be re-defined in your child classes
@@ -39,14 +503,110 @@ class HttpAPI(object):
     _env_url = '_URL'
     _env_user = '_USER'
     _env_auth = '_PASSWORD'
+    _env_pool_connections = '_POOL_CONNECTIONS'
+    _env_pool_maxsize = '_POOL_MAXSIZE'
+    _env_pool_block = '_POOL_BLOCK'
+    _env_pool_idle_timeout = '_POOL_IDLE_TIMEOUT'
+    _env_cache = '_CACHE'
+    _env_cache_ttl = '_CACHE_TTL'
+    _env_conditional = '_CONDITIONAL'
+    _env_metrics = '_METRICS'
+    _env_retry_total = '_RETRY_TOTAL'
+    _env_retry_backoff_factor = '_RETRY_BACKOFF_FACTOR'
+    _env_circuit_breaker = '_CIRCUIT_BREAKER'
+    _env_connect_timeout = '_CONNECT_TIMEOUT'
+    _env_read_timeout = '_READ_TIMEOUT'
+    _env_stream_deadline = '_STREAM_DEADLINE'
+    _env_transport = '_TRANSPORT'
+    # Connection pool defaults, may be re-defined in child classes as well
+    pool_connections = requests.adapters.DEFAULT_POOLSIZE  # number of per-host pools to keep
+    pool_maxsize = requests.adapters.DEFAULT_POOLSIZE  # number of connections to keep in each pool
+    pool_block = requests.adapters.DEFAULT_POOLBLOCK  # wait for a free connection instead of opening extra one
+    pool_idle_timeout = None  # drop pooled connections if not used for this number of seconds
+    chunk_size = 1024 * 1024  # chunk size for writing streamed responses
+    # transport: 'requests' for urllib3 connection pool, 'http2' for multiplexed HTTP/2 connections, see Transport
+    transport = 'requests'
+    transports = ('requests', 'http2')
+    # function decoding JSON from bytes, see 'decode_json'
+    json_decoder = staticmethod(orjson.loads if orjson is not None else json.loads)
+    # Timeout defaults, seconds, 0 means wait forever. Per-call 'timeout' argument overrides both
+    # as it does for 'requests', 'deadline' one overrides 'stream_deadline'
+    connect_timeout = 10  # to establish connection
+    read_timeout = 120  # to wait for the next bytes from server, not the whole response, re-defined for slow servers
+    stream_deadline = 0  # to write the whole streamed response body, see 'pp' and 'download_file'
+    # Retry policy defaults, see RetryPolicy and urllib3.Retry for settings, 'budget_*' ones are for RetryBudget.
+    # May be re-defined in child classes, better as 'dict(HttpAPI.retry_policy, setting=value)'
+    retry_policy = dict(
+        total=3,  # attempts after the first one
+        backoff_factor=0.5,  # exponential backoff: factor * 2 ** (retry number - 1) seconds at most
+        backoff_max=30,  # backoff limit, seconds
+        retry_after_limit=120,  # 'Retry-After' limit, seconds
+        status_forcelist=(429, 502, 503, 504),  # transient error responses to retry
+        allowed_methods=('HEAD', 'GET', 'PUT', 'DELETE', 'OPTIONS', 'TRACE'),  # idempotent methods
+        budget_ratio=0.2,  # retries allowed per request sent, None for unlimited
+        budget_min_retries=10,  # retries allowed regardless of requests number
+        budget_window=10.0)  # retry budget window, seconds
+    # GET response cache settings, caching is off unless cache backend is given
+    cache = None  # cache backend, True for in-memory one or sqlite file path, see HttpCache
+    cache_ttl = 0  # seconds to cache responses for requests not listed in 'cache_ttls', 0 means do not cache
+    cache_ttls = dict()  # per-endpoint TTLs: regular expression searched in request sub-URL => seconds
+    conditional = False  # revalidate GET responses with ETag/Last-Modified instead of downloading them again
+    conditional_maxsize = 256  # number of responses to keep for revalidation
+    _conditional_cache = None  # responses kept for revalidation, see 'conditional'
+    # request instrumentation, see Metrics
+    instruments = tuple()  # Metrics.Instrument objects called before and after each request
+    endpoint_templates = dict()  # regular expression searched in request sub-URL => endpoint name for metrics
+    # circuit breaker, off unless requested, see CircuitBreaker
+    circuit_breaker = None
+    circuit_breaker_settings = dict(failure_threshold=5, cooldown=30.0, slow_threshold=None)
+
+    # transport adapters (connection pools) shared between instances, see 'shared_session' constructor argument
+    _shared_adapters = dict()
+    _shared_adapters_lock = threading.Lock()
+    # circuit breakers shared by instances working with the same server, see 'circuit_breaker' constructor argument
+    _circuit_breakers = dict()
 
-    def __init__(self, root=None, user=None, auth=None, readonly=False, anonymous=False):
+    def __init__(self, root=None, user=None, auth=None, readonly=False, anonymous=False,
+                 pool_connections=None, pool_maxsize=None, pool_block=None, pool_idle_timeout=None,
+                 shared_session=False, cache=None, cache_ttl=None, conditional=None, instruments=None,
+                 retry_policy=None, circuit_breaker=None, connect_timeout=None, read_timeout=None,
+                 stream_deadline=None, transport=None, json_decoder=None):
         """
         :param str root: Root URL (uses *_URL by default)
         :param str user: Username (uses *_USER by default)
         :param str auth: Password (uses *_PASSWORD by default)
         :param bool readonly: sets readonly property, should be explictly supported by child 
         :param bool anonymous: ignore username/password provided and use anonymous requests
+        :param int pool_connections: number of per-host connection pools (uses *_POOL_CONNECTIONS by default)
+        :param int pool_maxsize: maximum connections kept per host (uses *_POOL_MAXSIZE by default)
+        :param bool pool_block: block when pool is exhausted instead of opening throw-away connection
+            (uses *_POOL_BLOCK by default)
+        :param float pool_idle_timeout: drop pooled connections after this number of idle seconds
+            (uses *_POOL_IDLE_TIMEOUT by default)
+        :param bool shared_session: re-use one connection pool for all instances with the same server
+            and pool settings, each instance still has its own session
+        :param cache: GET response cache: HttpCache backend object, True for in-memory one
+            or sqlite database file path (uses *_CACHE by default)
+        :param float cache_ttl: seconds to cache responses for requests not listed in 'cache_ttls'
+            (uses *_CACHE_TTL by default)
+        :param bool conditional: remember 'ETag' and 'Last-Modified' of GET responses and send conditional
+            requests next time, '304 Not Modified' is answered with the response remembered
+            (uses *_CONDITIONAL by default)
+        :param list instruments: Metrics.Instrument objects to call before and after each request,
+            if *_METRICS is true then default Metrics.registry is used
+        :param retry_policy: RetryPolicy (or urllib3.Retry) object, or dict of settings to override
+            'retry_policy' class defaults, 'total' and 'backoff_factor' are read from
+            *_RETRY_TOTAL and *_RETRY_BACKOFF_FACTOR by default
+        :param circuit_breaker: CircuitBreaker object, or True for the one shared by all instances
+            working with the same server, configured with 'circuit_breaker_settings' (uses *_CIRCUIT_BREAKER by default)
+        :param float connect_timeout: seconds to wait for connection, 0 for no limit (uses *_CONNECT_TIMEOUT by default)
+        :param float read_timeout: seconds to wait for data from server, 0 for no limit
+            (uses *_READ_TIMEOUT by default)
+        :param float stream_deadline: seconds to complete streamed transfer written with 'write_to'
+            or 'download_file', 0 for no limit (uses *_STREAM_DEADLINE by default)
+        :param str transport: 'requests' or 'http2', the latter requires 'httpx[http2]' installed
+            (uses *_TRANSPORT by default)
+        :param callable json_decoder: function decoding JSON from bytes, orjson one is used if installed
 
         >>> import os
         >>> from oc_cdtapi.API import HttpAPI
@@ -84,22 +644,217 @@ class HttpAPI(object):
             raise ValueError('Server URL for service [%s] not set' % self._env_prefix)
 
         self.root = root
-        self.web = requests.Session()
-        adapter = requests.adapters.HTTPAdapter(max_retries=urllib3.Retry(
-            raise_on_status=False,
-            total=2,
-            status_forcelist=[401],
-            allowed_methods=["HEAD", "GET", "PUT", "DELETE", "OPTIONS", "POST"]
-        ))
-        self.web.mount("https://", adapter)
-        self.web.mount("http://", adapter)
+        self.pool_connections = self.__env_setting(
+            pool_connections, self._env_pool_connections, self.pool_connections, int)
+        self.pool_maxsize = self.__env_setting(pool_maxsize, self._env_pool_maxsize, self.pool_maxsize, int)
+        self.pool_block = self.__env_setting(pool_block, self._env_pool_block, self.pool_block, _str_to_bool)
+        self.pool_idle_timeout = self.__env_setting(
+            pool_idle_timeout, self._env_pool_idle_timeout, self.pool_idle_timeout, float)
+        self.connect_timeout = self.__env_setting(
+            connect_timeout, self._env_connect_timeout, self.connect_timeout, float)
+        self.read_timeout = self.__env_setting(read_timeout, self._env_read_timeout, self.read_timeout, float)
+        self.stream_deadline = self.__env_setting(
+            stream_deadline, self._env_stream_deadline, self.stream_deadline, float)
+        self.transport = self.__env_setting(transport, self._env_transport, self.transport, self.__transport)
+
+        if json_decoder is not None:
+            self.json_decoder = json_decoder
+
+        self.retry_policy = self.__retry_policy(retry_policy)
+        self.cache = self.__env_setting(cache, self._env_cache, make_cache(self.cache), make_cache)
+        self.cache_ttl = self.__env_setting(cache_ttl, self._env_cache_ttl, self.cache_ttl, float)
+        self.conditional = self.__env_setting(conditional, self._env_conditional, self.conditional, _str_to_bool)
+        self._conditional_cache = MemoryCache(maxsize=self.conditional_maxsize) if self.conditional else None
+
+        if instruments is not None:
+            self.instruments = tuple(instruments)
+        elif self.__env_setting(None, self._env_metrics, False, _str_to_bool):
+            self.instruments = (Metrics.registry,)
+
+        circuit_breaker = self.__env_setting(
+            circuit_breaker, self._env_circuit_breaker, None,
+            lambda x: x if isinstance(x, CircuitBreaker) else _str_to_bool(x))
+
+        if isinstance(circuit_breaker, CircuitBreaker):
+            self.circuit_breaker = circuit_breaker
+        elif circuit_breaker:
+            self.circuit_breaker = self.__shared_circuit_breaker()
+
+        if self.circuit_breaker is not None:
+            for _instrument in self.instruments:
+                self.circuit_breaker.add_listener(_instrument)
 
         if user and not anonymous:
-            self.web.auth = (user, auth)
+            auth = (user, auth)
+        else:
+            auth = None
+
+        self.web = self._make_session(auth, adapter=self.__shared_adapter() if shared_session else None)
+
+    def __shared_adapter(self):
+        """
+        Get transport adapter shared between instances with the same server and pool settings.
+        Sessions are not shared since their cookies, headers and authentication are changed without locking,
+        while connection pool of the adapter is thread-safe
+        :return requests.adapters.BaseAdapter: adapter
+        """
+        _url = urlsplit(self.root)
+        # all parameters affecting adapter state have to be a part of the key
+        _retry_key = repr(sorted(self.retry_policy.items())) if isinstance(self.retry_policy, dict) \
+            else id(self.retry_policy)
+        _key = (type(self)._make_adapter, self.transport, _url.scheme, _url.netloc,
+                self.pool_connections, self.pool_maxsize, self.pool_block, self.pool_idle_timeout, _retry_key,
+                self.timeout)
+
+        with HttpAPI._shared_adapters_lock:
+            if _key not in HttpAPI._shared_adapters:
+                HttpAPI._shared_adapters[_key] = self._make_adapter()
+
+            return HttpAPI._shared_adapters[_key]
+
+    def __shared_circuit_breaker(self):
+        """
+        Get circuit breaker shared between instances working with the same server
+        :return CircuitBreaker: circuit breaker
+        """
+        _url = urlsplit(self.root)
+
+        with HttpAPI._shared_adapters_lock:
+            if (_url.scheme, _url.netloc) not in HttpAPI._circuit_breakers:
+                HttpAPI._circuit_breakers[(_url.scheme, _url.netloc)] = CircuitBreaker(
+                    name=_url.netloc, **self.circuit_breaker_settings)
+
+            return HttpAPI._circuit_breakers[(_url.scheme, _url.netloc)]
+
+    def __retry_policy(self, retry_policy):
+        """
+        Merge retry policy settings: explicit ones first, then environment variables, then class defaults
+        :param retry_policy: RetryPolicy object or dict of settings
+        :return: RetryPolicy object or dict of settings
+        """
+        if isinstance(retry_policy, urllib3.Retry):
+            return retry_policy
+
+        _policy = dict(type(self).retry_policy)
+        _policy.update(retry_policy or {})
+
+        for _setting, _env_suffix, _convert in [('total', self._env_retry_total, int),
+                                                ('backoff_factor', self._env_retry_backoff_factor, float)]:
+            if _setting not in (retry_policy or {}):
+                _policy[_setting] = self.__env_setting(None, _env_suffix, _policy.get(_setting), _convert)
+
+        return _policy
+
+    def __transport(self, value):
+        """
+        Validate transport name
+        :param str value: transport name
+        :return str: normalized transport name
+        """
+        value = value.strip().lower()
+
+        if value not in self.transports:
+            raise ValueError("Unsupported transport: [%s]" % value)
+
+        return value
+
+    def __env_setting(self, value, env_suffix, default, convert):
+        """
+        Get setting value: explicit one first, then environment variable, then default
+        :param value: explicitly given value
+        :param str env_suffix: environment variable suffix to be appended to '_env_prefix'
+        :param default: default value
+        :param callable convert: function to convert the value to desired type
+        """
+        if value is None and self._env_prefix is not None:
+            value = os.getenv(self._env_prefix + env_suffix) or None
+
+            try:
+                value = convert(value) if value is not None else None
+            except ValueError:
+                logging.warning("Ignoring incorrect value [%s] of [%s]", value, self._env_prefix + env_suffix)
+                value = None
+
+        if value is None:
+            return default
+
+        return convert(value)
+
+    def _make_adapter(self):
+        """
+        Create transport adapter to be mounted on the session.
+        May be re-defined in child classes for specific transport settings
+        :return requests.adapters.BaseAdapter: adapter
+        """
+        if self.transport == 'http2':
+            return Http2Adapter(
+                pool_maxsize=self.pool_maxsize,
+                idle_timeout=self.pool_idle_timeout,
+                max_retries=self._make_retry(),
+                timeout=self.timeout)
+
+        return PoolAdapter(
+            idle_timeout=self.pool_idle_timeout,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+            max_retries=self._make_retry(),
+            timeout=self.timeout)
+
+    @property
+    def timeout(self):
+        """
+        :return tuple: default (connect, read) timeouts for 'requests', None instead of 0
+        """
+        return (self.connect_timeout or None, self.read_timeout or None)
+
+    def _make_retry(self):
+        """
+        Create retry policy for transport adapter from 'retry_policy' settings
+        :return urllib3.Retry: retry policy
+        """
+        if isinstance(self.retry_policy, urllib3.Retry):
+            return self.retry_policy
+
+        _policy = dict(self.retry_policy)
+        _budget = RetryBudget(ratio=_policy.pop('budget_ratio', None), min_retries=_policy.pop('budget_min_retries', 0),
+                              window=_policy.pop('budget_window', 10.0))
+
+        # error response is returned as is when retries are exhausted, 'pp' decides what to do with it
+        return RetryPolicy(raise_on_status=False, budget=_budget if _budget.ratio is not None else None, **_policy)
+
+    def _make_session(self, auth=None, adapter=None):
+        """
+        Create HTTP session with transport adapters mounted
+        :param tuple auth: (user, password) pair for basic authentication
+        :param requests.adapters.BaseAdapter adapter: adapter to mount, new one is created if not given
+        :return requests.Session: session
+        """
+        web = requests.Session()
+        adapter = adapter or self._make_adapter()
+        web.mount("https://", adapter)
+        web.mount("http://", adapter)
+
+        if auth:
+            web.auth = auth
 
         if self.root.startswith("https:"):
             # ignore self-signed certificates warning
-            self.web.verify = False
+            web.verify = False
+
+        return web
+
+    def reap_idle_connections(self, force=True):
+        """
+        Close pooled keep-alive connections
+        :param bool force: close all pooled connections, otherwise only if the pool was idle
+            longer than 'pool_idle_timeout'
+        """
+        for adapter in set(self.web.adapters.values()):
+            if isinstance(adapter, (PoolAdapter, Http2Adapter)):
+                adapter.reap_idle_connections(force=force)
+            elif force:
+                adapter.poolmanager.clear()
 
     def set_readonly(self, readonly=True):
         """
@@ -123,11 +878,14 @@ class HttpAPI(object):
 
         return posixpath.join(self.root, req)
 
-    def pp(self, resp, write_to=None, stream=False, **kvarg):
+    def pp(self, resp, write_to=None, stream=False, checksums=None, deadline_at=None, **kvarg):
         """ Post-processes response
         :param requests.Response resp: the response object
         :param fileObj write_to: file object to write result to
         :param bool stream: use stream mode (useful for large objects)
+        :param list checksums: hashlib algorithm names to calculate for response body
+        :param float deadline_at: time.monotonic() value by which streamed body has to be written,
+            DeadlineExceeded is raised otherwise
         :param kvarg: another keyword arguments, not actually used
 
         New feature! If write_to parameter is given to any method, that returns response
@@ -135,6 +893,9 @@ class HttpAPI(object):
 
         If stream == True, file will be written on the fly, without reading all the data
 
+        If checksums are given, hexadecimal digests of response body are calculated while writing it
+        and stored in 'checksums' dictionary attribute of the response.
+
         >>> import sys
         >>> import io
         >>> class FakeResp(object):
@@ -180,6 +941,10 @@ class HttpAPI(object):
         >>> open(tmpfile, 'r').read()
         'Read data!'
         >>> os.unlink(tmpfile)
+        >>> fake_resp.raw = io.BytesIO(b'Read data3')
+        >>> r = api.pp(fake_resp, stream = True, write_to = io.BytesIO(), checksums = ['md5'])
+        >>> r.checksums
+        {'md5': '0191126616dec214ace1653f887fa12f'}
 
         """
 
@@ -193,10 +958,13 @@ class HttpAPI(object):
             else:
                 fd = write_to
 
+            hashes = dict((x, hashlib.new(x)) for x in checksums or [])
+
             if not stream:
                 fd.write(resp.content)
+                self.__update_hashes(hashes, resp.content)
             else:
-                shutil.copyfileobj(resp.raw, fd)
+                self.__copy_raw(resp, fd, hashes, deadline_at)
 
             fd.flush()
 
@@ -205,29 +973,283 @@ class HttpAPI(object):
 
             del fd
 
+        elif checksums:
+            hashes = dict((x, hashlib.new(x)) for x in checksums)
+            self.__update_hashes(hashes, resp.content)
+
+        if checksums:
+            resp.checksums = dict((x, y.hexdigest()) for x, y in hashes.items())
+
         return resp
 
+    def decode_json(self, resp, empty=_required):
+        """
+        Decode JSON response body with 'json_decoder' straight from bytes, without building text first.
+        Bodies the decoder refuses (not UTF-8, 'NaN' etc.) are decoded by 'requests' as before,
+        so are cached responses which keep decoded body already
+        :param requests.Response resp: response
+        :param empty: value to return for empty body, JSONDecodeError is raised if not given
+        :return: decoded JSON
+        """
+        _content = getattr(resp, 'content', None)
+
+        if not isinstance(_content, (bytes, bytearray)):
+            # response objects not made by 'requests' may have no 'json' method, text only
+            if hasattr(resp, 'json'):
+                return resp.json()
+
+            if not resp.text and empty is not _required:
+                return empty
+
+            return json.loads(resp.text)
+
+        if not _content and empty is not _required:
+            return empty
+
+        if _content and not getattr(resp, 'from_cache', False):
+            try:
+                return self.json_decoder(_content)
+            except ValueError:
+                pass
+
+        return resp.json()
+
+    def iter_json(self, req, path='results.item', params=None, headers=None, **kvarg):
+        """
+        Send GET request and decode JSON values found at path one by one while response body is being received,
+        so memory used does not grow with the number of values. Uses ijson if installed, see JsonStream.iter_items
+        :param str req: request sub-URL
+        :param str path: dot-separated object keys leading to the values, 'item' stands for every array element:
+            'results.item' for elements of 'results' array, 'item' for elements of top-level array
+        :param dict params: additional GET parameters
+        :param dict headers: additional headers for the request
+        :param kvarg: additional keyword arguments for 'get'
+        :return: generator of decoded values, the request is sent on the first iteration
+        """
+        resp = self.get(req, params=params, headers=headers, stream=True, **kvarg)
+
+        try:
+            # body may be read already by transport or response hooks
+            if isinstance(getattr(resp, '_content', None), bytes):
+                _fd = io.BytesIO(resp._content)
+            else:
+                resp.raw.decode_content = True
+                _fd = resp.raw
+
+            for _item in iter_items(_fd, path, self.chunk_size, resp.encoding):
+                yield _item
+
+        finally:
+            resp.close()
+
+    def __copy_raw(self, resp, fd, hashes=None, deadline_at=None):
+        """
+        Write streamed response body to file object
+        :param requests.Response resp: streamed response
+        :param fd: file object to write to
+        :param dict hashes: hash objects to feed chunks to
+        :param float deadline_at: time.monotonic() value by which the body has to be written
+        """
+        if not hashes and deadline_at is None:
+            shutil.copyfileobj(resp.raw, fd)
+            return
+
+        for chunk in iter(lambda: resp.raw.read(self.chunk_size), b''):
+            fd.write(chunk)
+            self.__update_hashes(hashes or {}, chunk)
+
+            if deadline_at is not None and time.monotonic() > deadline_at:
+                raise DeadlineExceeded("Streamed transfer deadline exceeded: [%s]" % resp.url)
+
+    def __deadline(self, kvarg):
+        """
+        Replace per-call 'deadline' seconds with 'deadline_at' moment for streamed requests
+        :param dict kvarg: keyword arguments
+        :return dict: keyword arguments for 'pp'
+        """
+        kvarg = kvarg.copy()
+        _deadline = kvarg.pop('deadline', None)
+        _deadline = self.stream_deadline if _deadline is None else _deadline
+
+        if kvarg.get('stream') and _deadline and kvarg.get('deadline_at') is None:
+            kvarg['deadline_at'] = time.monotonic() + _deadline
+
+        return kvarg
+
+    def __update_hashes(self, hashes, data):
+        """
+        Feed data to all hash objects given
+        :param dict hashes: hash objects by algorithm name
+        :param bytes data: data to hash
+        """
+        for _hash in hashes.values():
+            _hash.update(data)
+
     def __kvarg(self, kvarg):
         """
-        Omit 'write_to' argument
+        Omit 'write_to', 'checksums' and deadline arguments
         :param dict kvarg: keyword arguments
-        :return dict: ditionary without 'write_to' key
+        :return dict: ditionary without post-processing keys
         """
 
         kvarg = kvarg.copy()
-        if 'write_to' in kvarg:
-            del kvarg['write_to']
+        for _key in ['write_to', 'checksums', 'deadline', 'deadline_at']:
+            if _key in kvarg:
+                del kvarg[_key]
 
         return kvarg
 
-    def get(self, req, params=None, files=None, data=None, headers=None, **kvarg):
+    def _cache_ttl(self, req):
+        """
+        Seconds to cache response for, the first 'cache_ttls' pattern found in request wins
+        :param str req: request sub-URL
+        :return float: TTL, 0 if response should not be cached
+        """
+        if isinstance(req, list):
+            req = posixpath.sep.join(req)
+
+        for _pattern, _ttl in self.cache_ttls.items():
+            if re.search(_pattern, req):
+                return _ttl
+
+        return self.cache_ttl
+
+    def _cache_key(self, req, params=None, headers=None):
+        """
+        Cache key: full URL with parameters first, so entries may be invalidated by URL prefix,
+        then user and headers, since both may affect response
+        """
+        if isinstance(params, dict):
+            params = sorted(params.items())
+
+        _url = requests.Request('GET', self.re(req), params=params).prepare().url
+        _user = self.web.auth[0] if isinstance(self.web.auth, tuple) else ''
+        return '\n'.join([_url, _user, repr(sorted((headers or {}).items()))])
+
+    def cache_invalidate(self, req=''):
+        """
+        Drop cached GET responses for the request sub-URL given and all ones below it
+        :param str req: request sub-URL, the whole server if not given
+        :return int: number of responses dropped
+        """
+        if self.cache is None and self._conditional_cache is None:
+            return 0
+
+        _url = requests.Request('GET', self.re(req)).prepare().url
+
+        if self._conditional_cache is not None:
+            self._conditional_cache.invalidate(_url)
+
+        if self.cache is None:
+            return 0
+
+        return self.cache.invalidate(_url)
+
+    def cache_stats(self):
+        """
+        :return dict: cache 'hits', 'misses', 'size' and 'maxsize', None if caching is off
+        """
+        return self.cache.stats() if self.cache is not None else None
+
+    @contextmanager
+    def _instrumented(self, method, req, data=None):
+        """
+        Call instruments and circuit breaker before and after request, the request itself is sent inside the context.
+        Yields Metrics.RequestEvent to be filled with response by '_observe',
+        None if there are no instruments and circuit breaker
+        :param str method: HTTP method
+        :param str req: request sub-URL
+        :param data: request body
+        """
+        _breaker = self.circuit_breaker
+
+        if not self.instruments and _breaker is None:
+            yield None
+            return
+
+        _event = Metrics.RequestEvent(type(self).__name__, method.upper(), req,
+                                      Metrics.endpoint_template(req, self.endpoint_templates))
+
+        if isinstance(data, (bytes, bytearray, strtype)):
+            _event.bytes_sent = len(data)
+        elif isinstance(data, UploadStream):
+            _event.bytes_sent = data.length or 0
+
+        self.__call_instruments('before', _event)
+
+        try:
+            if _breaker is not None:
+                _event.circuit = _breaker.state
+                _breaker.before(self.re(req))
+
+            yield _event
+        except Exception as e:
+            _event.error = e
+
+            if isinstance(e, HttpAPIError) and not isinstance(e, CircuitOpenError):
+                _event.status_code = e.code
+
+            raise
+        finally:
+            _event.seconds = time.monotonic() - _event.started
+
+            if _breaker is not None and not isinstance(_event.error, CircuitOpenError):
+                _breaker.record(_breaker.is_failure(_event.error, _event.status_code, _event.seconds))
+
+            self.__call_instruments('after', _event)
+
+    def __call_instruments(self, hook, event):
+        """
+        Call instruments hook, instrument failure should never break the request
+        :param str hook: 'before' or 'after'
+        :param Metrics.RequestEvent event: request
+        """
+        for _instrument in self.instruments:
+            try:
+                getattr(_instrument, hook)(event)
+            except Exception as e:
+                logging.exception("Instrument [%s] failed: %s", _instrument, e)
+
+    def _observe(self, event, resp):
+        """
+        Fill request event with response details
+        :param Metrics.RequestEvent event: request, may be None if there are no instruments
+        :param requests.Response resp: response
+        """
+        if event is None:
+            return
+
+        event.response = resp
+        event.status_code = resp.status_code
+
+        # streamed response body is not read yet, so its length is taken from headers
+        _content = getattr(resp, '_content', None)
+        _length = resp.headers.get('Content-Length') if resp.headers else None
+        _sent = resp.request.headers.get('Content-Length') if getattr(resp, 'request', None) is not None else None
+        _history = getattr(getattr(resp.raw, 'retries', None), 'history', None)
+
+        if isinstance(_content, bytes):
+            event.bytes_received = len(_content)
+        elif isinstance(_length, strtype) and _length.isdigit():
+            event.bytes_received = int(_length)
+
+        if isinstance(_sent, strtype) and _sent.isdigit():
+            event.bytes_sent = int(_sent)
+
+        if isinstance(_history, tuple):
+            event.retries = len(_history)
+
+    def get(self, req, params=None, files=None, data=None, headers=None, cache_ttl=None, **kvarg):
         """Sends GET request
         :param str req: request sub-URL
         :param dict params: additional GET parameters
         :param files: files to append to the request
         :param data: additional data to append to the request
         :param dict headers: additional headers for the request
-        :param kvarg: additional keyword arguments
+        :param float cache_ttl: seconds to cache response for, overrides endpoint setting,
+            0 bypasses cache and conditional request
+        :param kvarg: additional keyword arguments, 'timeout' (seconds or (connect, read) pair)
+            overrides default timeouts, 'deadline' overrides 'stream_deadline' for 'stream' and 'write_to' given
         :return requests.Response: postprocessed the response object
 
         >>> def test(port):
@@ -252,10 +1274,69 @@ class HttpAPI(object):
 
         """
 
-        resp = self.web.get(self.re(req), params=params, data=data,
-                            files=files, headers=headers, **self.__kvarg(kvarg))
+        _key = None
+        _cache_key = None
+        _stored = None
+        kvarg = self.__deadline(kvarg)
 
-        return self.pp(resp, **kvarg)
+        # only whole responses of plain GET requests are cached
+        if (self.cache is not None or self._conditional_cache is not None) and files is None and data is None \
+                and not kvarg.get('stream') and kvarg.get('write_to') is None:
+            _key = self._cache_key(req, params, headers)
+            _bypass = cache_ttl is not None and cache_ttl <= 0
+            cache_ttl = self._cache_ttl(req) if cache_ttl is None else cache_ttl
+
+            if self.cache is not None and cache_ttl and cache_ttl > 0:
+                _cache_key = _key
+                _entry = self.cache.get(_cache_key)
+
+                if _entry is not None:
+                    return self.pp(response_from_entry(_entry), **kvarg)
+
+            if self._conditional_cache is not None and not _bypass:
+                _stored = self._conditional_cache.get(_key)
+                headers = self.__conditional_headers(headers, _stored)
+            else:
+                _key = None
+
+        with self._instrumented('get', req, data) as _event:
+            resp = self.web.get(self.re(req), params=params, data=data,
+                                files=files, headers=headers, **self.__kvarg(kvarg))
+            self._observe(_event, resp)
+
+            if _stored is not None and resp.status_code == 304:
+                resp = response_from_entry(*_stored)
+            elif _key is not None and resp.status_code == 200 and \
+                    ('ETag' in resp.headers or 'Last-Modified' in resp.headers):
+                self._conditional_cache.set(_key, (entry_from_response(resp), dict()), float('inf'))
+
+            resp = self.pp(resp, **kvarg)
+
+        if _cache_key is not None and resp.status_code == 200:
+            self.cache.set(_cache_key, entry_from_response(resp), cache_ttl)
+
+        return resp
+
+    def __conditional_headers(self, headers, stored):
+        """
+        Add validators of response remembered to request headers
+        :param dict headers: request headers
+        :param tuple stored: (CacheEntry, parsed JSON storage) remembered for the request, may be None
+        :return dict: headers to send
+        """
+        if stored is None:
+            return headers
+
+        _validators = requests.structures.CaseInsensitiveDict(stored[0].headers)
+        headers = dict(headers or {})
+
+        if 'ETag' in _validators:
+            headers['If-None-Match'] = _validators['ETag']
+
+        if 'Last-Modified' in _validators:
+            headers['If-Modified-Since'] = _validators['Last-Modified']
+
+        return headers
 
     def post(self, req, params=None, files=None, data=None, headers=None, **kvarg):
         """
@@ -268,9 +1349,16 @@ class HttpAPI(object):
         :param kvarg: additional keyword arguments
         :return requests.Response: postprocessed the response object
         """
-        resp = self.web.post(self.re(req), params=params,
-                             data=data, files=files, headers=headers, **kvarg)
-        return self.pp(resp, **kvarg)
+        if self.cache is not None or self._conditional_cache is not None:
+            self.cache_invalidate(req)
+
+        kvarg = self.__deadline(kvarg)
+
+        with self._instrumented('post', req, data) as _event:
+            resp = self.web.post(self.re(req), params=params,
+                                 data=data, files=files, headers=headers, **self.__kvarg(kvarg))
+            self._observe(_event, resp)
+            return self.pp(resp, **kvarg)
 
     def put(self, req, params=None, files=None, data=None, headers=None, **kvarg):
         """Sends PUT request
@@ -292,9 +1380,16 @@ class HttpAPI(object):
 
         """
 
-        resp = self.web.put(self.re(req), params=params,
-                            data=data, files=files, headers=headers, **kvarg)
-        return self.pp(resp, **kvarg)
+        if self.cache is not None or self._conditional_cache is not None:
+            self.cache_invalidate(req)
+
+        kvarg = self.__deadline(kvarg)
+
+        with self._instrumented('put', req, data) as _event:
+            resp = self.web.put(self.re(req), params=params,
+                                data=data, files=files, headers=headers, **self.__kvarg(kvarg))
+            self._observe(_event, resp)
+            return self.pp(resp, **kvarg)
 
     def delete(self, req, params=None, files=None, data=None, headers=None, **kvarg):
         """
@@ -307,9 +1402,16 @@ class HttpAPI(object):
         :param kvarg: additional keyword arguments
         :return requests.Response: postprocessed the response object
         """
-        resp = self.web.delete(self.re(req), params=params,
-                               data=data, files=files, headers=headers, **kvarg)
-        return self.pp(resp, **kvarg)
+        if self.cache is not None or self._conditional_cache is not None:
+            self.cache_invalidate(req)
+
+        kvarg = self.__deadline(kvarg)
+
+        with self._instrumented('delete', req, data) as _event:
+            resp = self.web.delete(self.re(req), params=params,
+                                   data=data, files=files, headers=headers, **self.__kvarg(kvarg))
+            self._observe(_event, resp)
+            return self.pp(resp, **kvarg)
 
     def head(self, req, params=None, files=None, data=None, headers=None, **kvarg):
         """
@@ -322,9 +1424,151 @@ class HttpAPI(object):
         :param kvarg: additional keyword arguments
         :return requests.Response: postprocessed the response object
         """
-        resp = self.web.head(self.re(req), params=params,
-                             data=data, files=files, headers=headers, **kvarg)
-        return self.pp(resp, **kvarg)
+        kvarg = self.__deadline(kvarg)
+
+        with self._instrumented('head', req, data) as _event:
+            resp = self.web.head(self.re(req), params=params,
+                                 data=data, files=files, headers=headers, **self.__kvarg(kvarg))
+            self._observe(_event, resp)
+            return self.pp(resp, **kvarg)
+
+    def upload_stream(self, req, data=None, path=None, method='put', length=None, chunk_size=None, progress=None,
+                      headers=None, **kvarg):
+        """
+        Sends payload from file path, file object, bytes or iterator chunk-by-chunk, see UploadStream
+        :param str req: request sub-URL
+        :param data: bytes, file-like object or iterator of bytes to send
+        :param str path: file path to send, if 'data' is not given
+        :param str method: HTTP method: 'put' or 'post'
+        :param int length: payload length, sent as 'Content-Length', detected if possible
+        :param int chunk_size: bytes to send at once ('chunk_size' attribute by default)
+        :param callable progress: called as progress(sent, length) after each chunk
+        :param dict headers: additional headers for the request
+        :param kvarg: additional keyword arguments
+        :return requests.Response: postprocessed the response object
+        """
+        stream = UploadStream(data=data, path=path, length=length, chunk_size=chunk_size or self.chunk_size,
+                              progress=progress)
+
+        try:
+            return getattr(self, method)(req, data=stream, headers=headers, **kvarg)
+        finally:
+            stream.close()
+
+    def download_file(self, req, path, resume=True, segments=1, attempts=3, headers=None, **kvarg):
+        """
+        Downloads resource to file using HTTP 'Range' requests to continue partial downloads.
+        Partially written file left by a previous call is continued if 'resume' is set,
+        transfer interrupted by network error is continued from the last byte written up to 'attempts' times.
+        If 'segments' is greater than one and server accepts ranges, resource is downloaded
+        by that number of parallel ranged requests into '<path>.part<N>' files which are joined then.
+        :param str req: request sub-URL
+        :param str path: file path to write to
+        :param bool resume: continue partially downloaded file instead of starting from scratch
+        :param int segments: number of parallel ranged requests
+        :param int attempts: number of attempts for each range
+        :param dict headers: additional headers for the request
+        :param kvarg: additional keyword arguments, 'deadline' overrides 'stream_deadline' for the whole download
+        :return requests.Response: HEAD response for the resource, headers only
+        """
+        kvarg = self.__deadline(dict(kvarg, stream=True))
+        del kvarg['stream']
+        head = self.head(req, headers=headers, **kvarg)
+        length = head.headers.get('Content-Length')
+        length = int(length) if length and length.isdigit() else None
+        ranges = head.headers.get('Accept-Ranges', '').lower() == 'bytes'
+
+        if length is not None and resume and os.path.isfile(path) and os.path.getsize(path) == length:
+            logging.debug("Already downloaded: [%s]", path)
+            return head
+
+        if not ranges or length is None or segments is None or segments < 2 or length < segments:
+            if length is not None and os.path.isfile(path) and os.path.getsize(path) > length:
+                resume = False
+
+            self.__download_range(req, path, 0, None, resume and ranges, attempts, headers, kvarg)
+            return head
+
+        _size = -(-length // segments)
+        _parts = list(map(lambda x: ('%s.part%d' % (path, x), x * _size, min(length, (x + 1) * _size) - 1),
+                          range(segments)))
+
+        with ThreadPoolExecutor(max_workers=segments) as executor:
+            list(executor.map(
+                lambda x: self.__download_range(req, x[0], x[1], x[2], resume, attempts, headers, kvarg), _parts))
+
+        with open(path, 'wb') as fd:
+            for _part in _parts:
+                with open(_part[0], 'rb') as _fd_part:
+                    shutil.copyfileobj(_fd_part, fd)
+
+        for _part in _parts:
+            os.remove(_part[0])
+
+        return head
+
+    def __download_range(self, req, path, first, last, resume, attempts, headers, kvarg):
+        """
+        Download bytes range to file continuing data already written
+        :param str req: request sub-URL
+        :param str path: file path to write to
+        :param int first: first byte position
+        :param int last: last byte position (inclusive), None for the end of resource
+        :param bool resume: continue data already written
+        :param int attempts: number of attempts
+        :param dict headers: additional headers for the request
+        :param dict kvarg: additional keyword arguments
+        """
+        if not resume and os.path.exists(path):
+            os.remove(path)
+
+        for _attempt in range(1, attempts + 1):
+            _done = os.path.getsize(path) if os.path.isfile(path) else 0
+
+            if last is not None and first + _done > last:
+                return
+
+            _headers = dict(headers or {})
+
+            if first + _done > 0 or last is not None:
+                _headers['Range'] = 'bytes=%d-%s' % (first + _done, '' if last is None else last)
+
+            try:
+                resp = self.get(req, headers=_headers, stream=True, **self.__kvarg(kvarg))
+
+                # streamed response keeps pooled connection until closed
+                try:
+                    if 'Range' in _headers and resp.status_code != 206:
+                        # server ignored range and sent the whole resource
+                        if first > 0:
+                            raise self._error(resp.status_code, resp.url, resp, 'Ranged requests are not supported')
+
+                        _done = 0
+
+                    with open(path, 'ab' if _done else 'wb') as fd:
+                        self.__copy_raw(resp, fd, deadline_at=kvarg.get('deadline_at'))
+
+                finally:
+                    resp.close()
+
+                return
+
+            except HttpAPIError as e:
+                # the whole resource has been written already
+                if e.code == 416 and last is None and _done:
+                    return
+
+                raise
+
+            except DeadlineExceeded:
+                raise
+
+            except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError) as e:
+                if _attempt >= attempts:
+                    raise
+
+                logging.warning("Download of [%s] interrupted (attempt %d of %d), resuming: %s", path, _attempt,
+                                attempts, e)
 
 
 # Two shortcuts to deal with XML without having full XML support
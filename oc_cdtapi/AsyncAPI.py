@@ -0,0 +1,422 @@
+# asyncio counterpart of HttpAPI
+import asyncio
+import copy
+import functools
+import hashlib
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import urllib3
+
+from .API import HttpAPI, strtype
+from .HttpCache import entry_from_response, response_from_entry
+
+# aiohttp is optional: without it all requests are offloaded to a thread pool
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class _RetryResponse(object):
+    """
+    Minimal urllib3 response interface used by urllib3.Retry to decide on retry and its delay
+    """
+
+    def __init__(self, aresp):
+        """
+        :param aiohttp.ClientResponse aresp: response
+        """
+        self.status = aresp.status
+        self.headers = aresp.headers
+
+    def get_redirect_location(self):
+        # redirects are followed by aiohttp itself
+        return False
+
+
+class AsyncHttpAPI(HttpAPI):
+    """
+    Base class for implementing asynchronous HTTP API.
+    Follows HttpAPI contract: the same constructor arguments and environment variables,
+    the same 're' and 'pp' methods, the same '_error' raised on wrong return codes.
+    The only difference is that get/post/put/delete/head are coroutines.
+
+    Two backends are supported:
+        - 'aiohttp': native asynchronous requests, used by default if aiohttp is installed
+        - 'thread': synchronous HttpAPI requests offloaded to a thread pool of 'pool_maxsize' workers
+
+    Both backends apply 'retry_policy' and GET response 'cache', only conditional requests
+    ('conditional' setting) are not sent by 'aiohttp' backend.
+    """
+    backend_aiohttp = 'aiohttp'
+    backend_thread = 'thread'
+    # methods of synchronous twin taken from HttpAPI, see '_sync'
+    _sync_methods = ('get', 'post', 'put', 'delete', 'head', 'upload_stream', 'download_file', 'iter_json')
+    _sync_classes = dict()
+
+    def __init__(self, *args, backend=None, **kvarg):
+        """
+        :param str backend: 'aiohttp' or 'thread', autodetected if not set
+        :param args: positional arguments for HttpAPI
+        :param kvarg: keyword arguments for HttpAPI
+        """
+        super(AsyncHttpAPI, self).__init__(*args, **kvarg)
+
+        if not backend:
+            backend = self.backend_aiohttp if aiohttp is not None else self.backend_thread
+
+        if backend not in [self.backend_aiohttp, self.backend_thread]:
+            raise ValueError("Unsupported backend: [%s]" % backend)
+
+        if backend == self.backend_aiohttp and aiohttp is None:
+            raise ValueError("Backend [%s] requested but 'aiohttp' is not installed" % backend)
+
+        self.backend = backend
+        self._executor = None
+        self._session = None
+        self._sync_twin = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        """
+        Release backend resources: aiohttp session and thread pool
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def _offload(self, func, *args, **kvarg):
+        """
+        Run synchronous function in the thread pool
+        :param callable func: function to run
+        :return: function result
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.pool_maxsize)
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, functools.partial(func, *args, **kvarg))
+
+    def _sync(self):
+        """
+        Synchronous twin of the instance: the same settings, session and cache, but blocking HttpAPI methods.
+        Composite operations like 'download_file' call 'get', 'head' etc. and expect responses,
+        so they are run by the twin in the thread pool
+        :return HttpAPI: instance of synchronous subclass of the instance class
+        """
+        if self._sync_twin is None:
+            _class = type(self)
+
+            if _class not in AsyncHttpAPI._sync_classes:
+                AsyncHttpAPI._sync_classes[_class] = type('Sync' + _class.__name__, (_class,), dict(
+                    (x, getattr(HttpAPI, x)) for x in self._sync_methods))
+
+            _twin = copy.copy(self)
+            _twin.__class__ = AsyncHttpAPI._sync_classes[_class]
+            self._sync_twin = _twin
+
+        return self._sync_twin
+
+    async def upload_stream(self, req, data=None, path=None, method='put', length=None, chunk_size=None,
+                            progress=None, headers=None, **kvarg):
+        """
+        Sends payload chunk-by-chunk in the thread pool, see HttpAPI.upload_stream.
+        The stream is closed after the request is completed
+        :return requests.Response: postprocessed the response object
+        """
+        return await self._offload(self._sync().upload_stream, req, data=data, path=path, method=method,
+                                   length=length, chunk_size=chunk_size, progress=progress, headers=headers, **kvarg)
+
+    async def download_file(self, req, path, resume=True, segments=1, attempts=3, headers=None, **kvarg):
+        """
+        Downloads resource to file in the thread pool, see HttpAPI.download_file
+        :return requests.Response: HEAD response for the resource, headers only
+        """
+        return await self._offload(self._sync().download_file, req, path, resume=resume, segments=segments,
+                                   attempts=attempts, headers=headers, **kvarg)
+
+    async def iter_json(self, req, path='results.item', params=None, headers=None, batch_size=100, **kvarg):
+        """
+        Asynchronous iterator version of HttpAPI.iter_json: values are decoded in the thread pool
+        by batches, the response is closed when iteration stops, also if it stops early
+        :param int batch_size: number of values decoded by one thread pool call
+        :return: asynchronous generator of decoded values, the request is sent on the first iteration
+        See HttpAPI.iter_json for other arguments
+        """
+        _items = self._sync().iter_json(req, path=path, params=params, headers=headers, **kvarg)
+
+        try:
+            while True:
+                _batch = await self._offload(lambda: list(itertools.islice(_items, batch_size)))
+
+                for _item in _batch:
+                    yield _item
+
+                if len(_batch) < batch_size:
+                    return
+
+        finally:
+            await self._offload(_items.close)
+
+    def _aiohttp_session(self):
+        """
+        Create aiohttp session lazily since it has to be bound to a running event loop.
+        Authentication, certificate verification and pool size are taken from synchronous session
+        :return aiohttp.ClientSession:
+        """
+        if self._session is not None and not self._session.closed:
+            return self._session
+
+        _auth = None
+
+        if isinstance(self.web.auth, tuple):
+            _auth = aiohttp.BasicAuth(*self.web.auth)
+
+        _connector = aiohttp.TCPConnector(
+            limit=self.pool_maxsize, limit_per_host=self.pool_maxsize, ssl=None if self.web.verify else False)
+
+        self._session = aiohttp.ClientSession(auth=_auth, connector=_connector)
+        return self._session
+
+    async def _request_aiohttp(self, method, req, params=None, data=None, headers=None,
+                               write_to=None, stream=False, checksums=None, deadline=None, **kvarg):
+        """
+        Send request with aiohttp, retrying it according to 'retry_policy',
+        convert result to requests.Response and post-process it.
+        Streamed transfer deadline is aiohttp total timeout
+        """
+        if 'verify' in kvarg:
+            kvarg['ssl'] = None if kvarg.pop('verify') else False
+
+        if deadline is None:
+            deadline = self.stream_deadline
+
+        if not isinstance(kvarg.get('timeout'), aiohttp.ClientTimeout):
+            kvarg['timeout'] = self._aiohttp_timeout(kvarg.get('timeout'), deadline if stream else None)
+
+        retries = self._make_retry()
+        _budget = getattr(retries, 'budget', None)
+
+        if _budget is not None:
+            _budget.request()
+
+        # streamed bodies can not be sent again
+        if data is not None and not isinstance(data, (bytes, str, dict)):
+            retries = retries.new(total=0)
+
+        while True:
+            try:
+                async with self._aiohttp_session().request(
+                        method.upper(), self.re(req), params=params, data=data, headers=headers, **kvarg) as _aresp:
+                    if retries.is_retry(method.upper(), _aresp.status, 'Retry-After' in _aresp.headers):
+                        try:
+                            retries = retries.increment(method=method.upper(), url=self.re(req),
+                                                        response=_RetryResponse(_aresp))
+                        except urllib3.exceptions.MaxRetryError:
+                            # error response is returned as is when retries are exhausted
+                            pass
+                        else:
+                            await asyncio.sleep(self.__retry_delay(retries, _aresp))
+                            continue
+
+                    return await self.__response(_aresp, write_to, stream, checksums)
+
+            except aiohttp.ClientConnectionError as e:
+                retries = self.__increment(retries, method, req, e, requests.exceptions.ConnectionError)
+            except asyncio.TimeoutError as e:
+                retries = self.__increment(retries, method, req, e, requests.exceptions.Timeout)
+
+            await asyncio.sleep(self.__retry_delay(retries))
+
+    async def __response(self, aresp, write_to, stream, checksums):
+        """
+        Convert aiohttp response to requests.Response and post-process it
+        :param aiohttp.ClientResponse aresp: response
+        :return requests.Response:
+        """
+        resp = requests.Response()
+        resp.status_code = aresp.status
+        resp.reason = aresp.reason
+        resp.url = str(aresp.url)
+        resp.headers = requests.structures.CaseInsensitiveDict(aresp.headers)
+        resp.encoding = aresp.charset
+
+        if write_to is None or not stream:
+            resp._content = await aresp.read()
+            return self.pp(resp, write_to=write_to, stream=False, checksums=checksums)
+
+        # check return code before writing anything
+        self.pp(resp)
+        _hashes = dict((x, hashlib.new(x)) for x in checksums or [])
+        await self.__write_stream(aresp, write_to, _hashes)
+        resp._content = b''
+
+        if checksums:
+            resp.checksums = dict((x, y.hexdigest()) for x, y in _hashes.items())
+
+        return resp
+
+    def __increment(self, retries, method, req, error, exception):
+        """
+        Count failed attempt the way urllib3 does for synchronous requests
+        :param urllib3.Retry retries: retry state
+        :param Exception error: aiohttp or timeout error
+        :param type exception: 'requests' exception to raise when retries are exhausted
+        :return urllib3.Retry: new retry state
+        """
+        if isinstance(error, asyncio.TimeoutError):
+            _error = urllib3.exceptions.ReadTimeoutError(None, self.re(req), str(error))
+        elif isinstance(error, aiohttp.ClientConnectorError):
+            # nothing is sent yet, so any request may be retried
+            _error = urllib3.exceptions.NewConnectionError(None, str(error))
+        else:
+            _error = urllib3.exceptions.ProtocolError(str(error), error)
+
+        try:
+            return retries.increment(method=method.upper(), url=self.re(req), error=_error)
+        except urllib3.exceptions.HTTPError:
+            raise exception(error)
+
+    def __retry_delay(self, retries, aresp=None):
+        """
+        :param urllib3.Retry retries: retry state
+        :param aiohttp.ClientResponse aresp: response to be retried, its 'Retry-After' header is respected
+        :return float: seconds to wait before the next attempt
+        """
+        if aresp is not None and retries.respect_retry_after_header:
+            _delay = retries.get_retry_after(_RetryResponse(aresp))
+
+            if _delay is not None:
+                return _delay
+
+        return retries.get_backoff_time()
+
+    def _aiohttp_timeout(self, timeout=None, deadline=None):
+        """
+        Convert 'requests'-style timeout to aiohttp one
+        :param timeout: seconds or (connect, read) pair, default timeouts are used if not given
+        :param float deadline: seconds to complete the whole request, no limit if not given
+        :return aiohttp.ClientTimeout:
+        """
+        if timeout is None:
+            timeout = self.timeout
+        elif not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+
+        return aiohttp.ClientTimeout(total=deadline or None, connect=timeout[0], sock_read=timeout[1])
+
+    async def __write_stream(self, aresp, write_to, hashes):
+        """
+        Write response body to file object or file path chunk-by-chunk
+        :param aiohttp.ClientResponse aresp: response
+        :param write_to: file path or file object
+        :param dict hashes: hash objects to feed chunks to
+        """
+        fd = open(write_to, 'wb') if isinstance(write_to, strtype) else write_to
+
+        try:
+            async for _chunk in aresp.content.iter_chunked(self.chunk_size):
+                fd.write(_chunk)
+
+                for _hash in hashes.values():
+                    _hash.update(_chunk)
+
+            fd.flush()
+        finally:
+            if isinstance(write_to, strtype):
+                fd.close()
+
+    async def _request(self, method, req, params=None, files=None, data=None, headers=None, **kvarg):
+        """
+        Send request with the backend selected
+        :param str method: HTTP method name
+        """
+        # aiohttp has incompatible multipart interface, so requests with files are always offloaded
+        if self.backend == self.backend_thread or files is not None:
+            return await self._offload(getattr(HttpAPI, method), self, req, params=params, files=files,
+                                       data=data, headers=headers, **kvarg)
+
+        # responses cached before are stale after the change, as for HttpAPI
+        if method in ['post', 'put', 'delete']:
+            self.cache_invalidate(req)
+
+        _cache_key, _cache_ttl = self.__cache_key(method, req, params, data, headers, kvarg)
+
+        if _cache_key is not None:
+            _entry = self.cache.get(_cache_key)
+
+            if _entry is not None:
+                return self.pp(response_from_entry(_entry))
+
+        with self._instrumented(method, req, data) as _event:
+            resp = await self._request_aiohttp(method, req, params=params, data=data, headers=headers, **kvarg)
+            self._observe(_event, resp)
+
+        if _cache_key is not None and resp.status_code == 200:
+            self.cache.set(_cache_key, entry_from_response(resp), _cache_ttl)
+
+        return resp
+
+    def __cache_key(self, method, req, params, data, headers, kvarg):
+        """
+        Cache key for plain GET request, the same as synchronous HttpAPI.get uses
+        :return tuple: (key, seconds to cache for), key is None if response is not to be cached
+        """
+        _cache_ttl = kvarg.pop('cache_ttl', None)
+
+        if method != 'get' or self.cache is None or data is not None or kvarg.get('stream') \
+                or kvarg.get('write_to') is not None:
+            return None, None
+
+        _cache_ttl = self._cache_ttl(req) if _cache_ttl is None else _cache_ttl
+
+        if not _cache_ttl or _cache_ttl <= 0:
+            return None, None
+
+        return self._cache_key(req, params, headers), _cache_ttl
+
+    async def get(self, req, params=None, files=None, data=None, headers=None, **kvarg):
+        """
+        Sends GET request, see HttpAPI.get
+        :return requests.Response: postprocessed the response object
+        """
+        return await self._request('get', req, params=params, files=files, data=data, headers=headers, **kvarg)
+
+    async def post(self, req, params=None, files=None, data=None, headers=None, **kvarg):
+        """
+        Sends POST request, see HttpAPI.post
+        :return requests.Response: postprocessed the response object
+        """
+        return await self._request('post', req, params=params, files=files, data=data, headers=headers, **kvarg)
+
+    async def put(self, req, params=None, files=None, data=None, headers=None, **kvarg):
+        """
+        Sends PUT request, see HttpAPI.put
+        :return requests.Response: postprocessed the response object
+        """
+        return await self._request('put', req, params=params, files=files, data=data, headers=headers, **kvarg)
+
+    async def delete(self, req, params=None, files=None, data=None, headers=None, **kvarg):
+        """
+        Sends DELETE request, see HttpAPI.delete
+        :return requests.Response: postprocessed the response object
+        """
+        return await self._request('delete', req, params=params, files=files, data=data, headers=headers, **kvarg)
+
+    async def head(self, req, params=None, files=None, data=None, headers=None, **kvarg):
+        """
+        Sends HEAD request, see HttpAPI.head
+        :return requests.Response: postprocessed the response object
+        """
+        return await self._request('head', req, params=params, files=files, data=data, headers=headers, **kvarg)
@@ -75,7 +75,7 @@ class BitbucketAPI(API.HttpAPI):
         req = ['projects', project, 'repos', repo_slug]
         
         response = self.get(req, headers=self.headers, timeout=self.DEFAULT_TIMEOUT)
-        repo_data = response.json()
+        repo_data = self.decode_json(response)
         
         logging.debug('Retrieved repository: %s', repo_data.get('name', 'unknown'))
         
@@ -107,7 +107,7 @@ class BitbucketAPI(API.HttpAPI):
             data['description'] = description
         
         response = self.post(req, json=data, headers=self.headers, timeout=self.DEFAULT_TIMEOUT)
-        repo_data = response.json()
+        repo_data = self.decode_json(response)
         
         logging.debug('Created repository with slug: %s', repo_data.get('slug', 'unknown'))
         
@@ -130,7 +130,7 @@ class BitbucketAPI(API.HttpAPI):
         data = {'archived': True}
         
         response = self.put(req, json=data, headers=self.headers, timeout=self.DEFAULT_TIMEOUT)
-        repo_data = response.json()
+        repo_data = self.decode_json(response)
         
         logging.debug('Archived repository: %s', repo_data.get('name', 'unknown'))
         
@@ -146,7 +146,7 @@ class BitbucketAPI(API.HttpAPI):
 
         while True:
             response = self.get(req, params={'start': start}, headers=self.headers, timeout=self.DEFAULT_TIMEOUT)
-            page = response.json()
+            page = self.decode_json(response)
             repos.extend(page.get('values', []))
             if page.get('isLastPage', True):
                 break
@@ -189,7 +189,7 @@ class BitbucketAPI(API.HttpAPI):
 
         while True:
             response = self.get(req, params={'start': start}, headers=self.headers, timeout=self.DEFAULT_TIMEOUT)
-            page = response.json()
+            page = self.decode_json(response)
             branches.extend(page.get('values', []))
             if page.get('isLastPage', True):
                 break
@@ -165,7 +165,7 @@ class Dbsm2API (API.HttpAPI):
         if not resp.status_code == 200:
             logging.error('Server returned an error [%s] [%s]' % (resp.status_code, resp.text))
             return None
-        images = resp.json()['items']
+        images = self.decode_json(resp)['items']
         logging.debug('found [%s] images' % len(images))
         logging.debug('Dumping images data')
         logging.debug(json.dumps(images, indent=4))
@@ -191,7 +191,7 @@ class Dbsm2API (API.HttpAPI):
         status_code = resp.status_code
         if 200 <= status_code <= 299:
             logging.debug('[%s] status code received, trying to return json' % status_code)
-            return resp.json()
+            return self.decode_json(resp)
         else:
             logging.error('[%s] status code received, assuming an error, returning None' % status_code)
         return None
@@ -213,7 +213,7 @@ class Dbsm2API (API.HttpAPI):
         }
         url = posixpath.join('api', 'v1', 'auth', 'access-token')
         resp = self.post(url, data=login_data)
-        resp_data = resp.json()
+        resp_data = self.decode_json(resp)
         if resp.status_code == 200:
             token_type = resp_data['token_type']
             access_token = resp_data['access_token']
@@ -19,6 +19,9 @@ class DmsAPI(API.HttpAPI):
 
     # this automatically allows usage of DMS_* environment variables - everything is done in HttpAPI for you
     _env_prefix = 'DMS'
+    retry_policy = dict(API.HttpAPI.retry_policy, total=4)
+    # exports are prepared before the first byte is sent
+    read_timeout = 600
     _env_token = '_TOKEN'
     # for now we have a separate Components Registry Service for components info obtaining
     # TODO: refactor when it will be joined with base DMS API on the server-side
@@ -102,33 +105,58 @@ class DmsAPI(API.HttpAPI):
         :param ctype:     type of artifact. if not specified - query all known types
         :returns:         list of artifacts
         """
-        assert bool(re.match('^[a-zA-Z0-9_-]*$', component)
-                    ), "Component name must contain only latin letters, numbers, underscores and hyphens"
-        assert bool(re.match('^[a-zA-Z0-9._-]*$', version)
-                    ), "Version must contain only latin letters, numbers, underscores, hyphens and dots"
         logging.debug('Reached %s.get_artifacts', self.__class__.__name__)
-
-        if ctype is None:
-            types = self.get_types()
-        else:
-            assert bool(re.match('^[a-zA-Z0-9_-]*$', ctype)
-                        ), "Component type must contain only latin letters, numbers, underscores and hyphens"
-            types = [ctype]
-
         artifacts = []
 
-        for t in types:
+        for t in self.__artifact_types(component, version, ctype):
             req = ['2', 'component', component, 'version', version, t, 'list']
 
             # Why do you use write_to parameter instead of just using response object ?
             # also, requests has json parser, no need to re-invent it
-            artifacts += self.get(req, headers=self.headers, verify=False).json()
+            artifacts += self.decode_json(self.get(req, headers=self.headers, verify=False))
 
         # logging has its own format-string engine
         logging.debug('About to return an array of %d elements', len(artifacts))
 
         return artifacts
 
+    def iter_artifacts(self, component, version, ctype=None):
+        """
+        Iterates over artifacts of given component, version and type,
+        decoding them one by one while lists are being received
+        :param component: dms component name
+        :param version:   dms version name
+        :param ctype:     type of artifact. if not specified - query all known types
+        :returns:         generator of artifacts
+        """
+        logging.debug('Reached %s.iter_artifacts', self.__class__.__name__)
+
+        for t in self.__artifact_types(component, version, ctype):
+            req = ['2', 'component', component, 'version', version, t, 'list']
+
+            for artifact in self.iter_json(req, path='item', headers=self.headers, verify=False):
+                yield artifact
+
+    def __artifact_types(self, component, version, ctype=None):
+        """
+        Checks artifact query arguments
+        :param component: dms component name
+        :param version:   dms version name
+        :param ctype:     type of artifact. if not specified - all known types
+        :returns:         list of types to query
+        """
+        assert bool(re.match('^[a-zA-Z0-9_-]*$', component)
+                    ), "Component name must contain only latin letters, numbers, underscores and hyphens"
+        assert bool(re.match('^[a-zA-Z0-9._-]*$', version)
+                    ), "Version must contain only latin letters, numbers, underscores, hyphens and dots"
+
+        if ctype is None:
+            return self.get_types()
+
+        assert bool(re.match('^[a-zA-Z0-9_-]*$', ctype)
+                    ), "Component type must contain only latin letters, numbers, underscores and hyphens"
+        return [ctype]
+
     def get_components(self):
         """
         Gets list of components known to DMS
@@ -138,7 +166,7 @@ class DmsAPI(API.HttpAPI):
         req = ['1', 'components']
 
         crs_request_url = self.crs_re(req)
-        components = self.web.get(crs_request_url, verify=False).json().get('components', list())
+        components = self.decode_json(self.web.get(crs_request_url, verify=False)).get('components', list())
         logging.debug('About to return an array of %d elements', len(components))
 
         return components
@@ -175,7 +203,7 @@ class DmsAPI(API.HttpAPI):
                         ), "Non-empty classifier must contain only latin letters, hyphens and underscores"
             params = {'classifier': classifier}
 
-        gav = self.get(req, params, headers=self.headers).json()
+        gav = self.decode_json(self.get(req, params, headers=self.headers))
 
         assert bool(re.match('^[a-zA-Z0-9\._-]+$', gav['groupId'])
                     ), "groupId have not to be empty and must contain only latin letters, numbers, underscores, hyphens and dots"
@@ -216,7 +244,7 @@ class DmsAPI(API.HttpAPI):
 
         req = ['2', 'component', component, 'versions']
 
-        _result = self.get(req, headers=self.headers).json().get('versions')
+        _result = self.decode_json(self.get(req, headers=self.headers)).get('versions')
         # filter versions by-type
         if version_status:
             logging.debug(f"Filtering versions")
@@ -247,6 +275,11 @@ class DmsAPIv3(API.HttpAPI):
     DMS API v.3 implementation
     """
     _env_prefix = 'DMS'
+    retry_policy = dict(API.HttpAPI.retry_policy, total=4)
+    # exports are prepared before the first byte is sent
+    read_timeout = 600
+    # components list barely changes, cached if cache backend is given
+    cache_ttls = {r'^components$': 600}
 
     def __req(self, req):
         """
@@ -307,24 +340,47 @@ class DmsAPIv3(API.HttpAPI):
         """
         logging.debug(f"Requested artifacts for [{component}], version {version}, type [{ctype}])")
 
-        _result = self.get(['components', component, 'versions', version, 'artifacts'], 
-                           params=None if not ctype else {"type": ctype}).json().get('artifacts', list())
+        _result = self.decode_json(self.get(['components', component, 'versions', version, 'artifacts'], 
+                                            params=None if not ctype else {"type": ctype})).get('artifacts', list())
 
         logging.debug(f'About to return an array of [{len(_result)}] elements')
 
         return _result
 
+    def iter_artifacts(self, component, version, ctype=None):
+        """
+        Iterate over artifacts of given component, version and type,
+        decoding them one by one while the list is being received
+        :param str component: DMS component name
+        :param str version: DMS version name
+        :param str ctype: type of artifact if not specified - query all known types
+        :return: generator of artifacts
+        """
+        logging.debug(f"Iterating artifacts for [{component}], version {version}, type [{ctype}])")
+
+        return self.iter_json(['components', component, 'versions', version, 'artifacts'], path='artifacts.item',
+                              params=None if not ctype else {"type": ctype})
+
     def get_components(self):
         """
         Gets list of components known to DMS
         :return list: components
         """
         logging.debug("Requested components list")
-        _result = self.get('components').json().get('components', list())
+        _result = self.decode_json(self.get('components')).get('components', list())
         logging.debug(f"About to return array of [{len(_result)}] elements")
 
         return _result
 
+    def iter_components(self):
+        """
+        Iterate over components known to DMS, decoding them one by one while the list is being received
+        :return: generator of components
+        """
+        logging.debug("Iterating components list")
+
+        return self.iter_json('components', path='components.item')
+
     # 'get_gav' is not supported in v.3 since 'DEB' and 'RPM' packages do not have GAVs by-default
 
     # Some DMS implementations may return a result without 'status' key
@@ -337,7 +393,7 @@ class DmsAPIv3(API.HttpAPI):
         :return list: versions
         """
         logging.debug(f"Requested versions for [{component}], version statuses: [{version_status}]")
-        _result = self.get(['components', component, 'versions']).json().get("versions", list())
+        _result = self.decode_json(self.get(['components', component, 'versions'])).get("versions", list())
         logging.debug(f"Got array of [{len(_result)}] elements")
 
         if version_status:
@@ -386,4 +442,4 @@ class DmsAPIv3(API.HttpAPI):
         :return dict:
         """
         logging.debug(f"Getting artifact information: [{artifact_id}]")
-        return self.get(['components', component, 'versions', version, 'artifacts', str(artifact_id)]).json()
+        return self.decode_json(self.get(['components', component, 'versions', version, 'artifacts', str(artifact_id)]))
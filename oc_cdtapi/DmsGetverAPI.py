@@ -126,7 +126,7 @@ class DmsGetverAPI (API.HttpAPI):
 
         if resp.status_code == 200:
             logging.debug('OK response from dms-getver')
-            gav = resp.json()
+            gav = self.decode_json(resp)
             # we have to raise an exception if anything were not returned
             # it is the cause to rid of 'get' method usage
             gav_text = ':'.join(list(map(lambda x: gav[x], [
@@ -262,7 +262,7 @@ class DmsGetverAPI (API.HttpAPI):
             distr_state_info['id'] = None
             distr_state_info['state'] = 'HTTP/%s' % resp.status_code
         else:
-            distr_state_info = resp.json()
+            distr_state_info = self.decode_json(resp)
 
         distr_state = distr_state_info['state']
         distr_id = distr_state_info['id']
@@ -282,7 +282,7 @@ class DmsGetverAPI (API.HttpAPI):
         logging.debug('Reached _dumb_404')
 
         try:
-            j = resp.json()
+            j = self.decode_json(resp)
         except ValueError as e:
             logging.debug('Failed to get json from dms response, returning False')
             return False
@@ -329,7 +329,7 @@ class DmsGetverAPI (API.HttpAPI):
 
         # ok status
         else:
-            distr_state_info = resp.json()
+            distr_state_info = self.decode_json(resp)
 
         distr_id = distr_state_info['id']
         distr_state = distr_state_info['state']
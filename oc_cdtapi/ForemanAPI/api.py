@@ -34,6 +34,10 @@ class ForemanAPI(HttpAPI):
 
     _error = ForemanAPIError
     _env_prefix = "FOREMAN"
+    # reference data barely changes, cached if cache backend is given
+    cache_ttls = {r'^(architectures|domains|operatingsystems)(/|$)': 3600}
+    # Foreman is slow under provisioning load, back off longer
+    retry_policy = dict(HttpAPI.retry_policy, backoff_factor=1, backoff_max=60)
 
     headers = {
         "Accept": "application/json;version=2",
@@ -57,7 +61,7 @@ class ForemanAPI(HttpAPI):
 
     def __set_foreman_versions(self):
         logging.debug('Reached set_foreman_versions')
-        response = self.get("status").json()
+        response = self.decode_json(self.get("status"))
         self.__foreman_version = response.get("version")
         logging.debug('version = [%s]' % self.__foreman_version)
         self.__apiversion = response.get("api_version")
@@ -112,7 +116,7 @@ class ForemanAPI(HttpAPI):
         }
         if include is not None:
             params['include'] = include
-        response = self.get('hosts', params=params).json()
+        response = self.decode_json(self.get('hosts', params=params))
         results = response.get('results')
         return results
 
@@ -136,7 +140,7 @@ class ForemanAPI(HttpAPI):
         logging.debug('Reached get_environment_v2')
         logging.debug('env_name = [%s]' % env_name)
         params = {'search': 'name=%s' % env_name}
-        response = self.get('environments', params=params).json()
+        response = self.decode_json(self.get('environments', params=params))
         results = response.get('results')
         for result in results:
             if result.get('name') != env_name:
@@ -213,7 +217,7 @@ class ForemanAPI(HttpAPI):
         params = {'search': 'name=%s' % group_name}
         response = self.get('usergroups', params=params)
 
-        data = response.json()
+        data = self.decode_json(response)
 
         try:
             group_id = data["results"][0]["id"]
@@ -401,7 +405,7 @@ class ForemanAPI(HttpAPI):
         logging.debug('Reached get_architecture_id_v2')
         logging.debug('arch_name = [%s]' % arch_name)
         params = {'search': 'name=%s' % arch_name}
-        response = self.get('architectures', params=params).json()
+        response = self.decode_json(self.get('architectures', params=params))
         logging.debug('Received response: %s')
         logging.debug(response)
         results = response.get('results')
@@ -438,7 +442,7 @@ class ForemanAPI(HttpAPI):
         logging.debug('hostname = [%s]' % hostname)
         domain = '.'.join(hostname.split('.')[1:])
         response = self.get('domains')
-        j = response.json()
+        j = self.decode_json(response)
         domains = j['results']
         logging.debug('Searching domain [%s]' % domain)
         logging.debug('Domains list:')
@@ -470,7 +474,7 @@ class ForemanAPI(HttpAPI):
         logging.debug('Reached get_host_info_v1')
         logging.debug('hostname = [%s]' % hostname)
         response = self.get(posixpath.join("hosts", hostname))
-        return response.json()
+        return self.decode_json(response)
 
     def get_host_info_v2(self, hostname):
         logging.debug('Reached get_host_info_v2')
@@ -497,7 +501,7 @@ class ForemanAPI(HttpAPI):
         logging.debug('Reached get_ptable_id_v2')
         logging.debug('os_id = [%s]' % os_id)
         logging.debug('ptable_name = [%s]' % ptable_name)
-        response = self.get(posixpath.join('operatingsystems', str(os_id), 'ptables')).json()
+        response = self.decode_json(self.get(posixpath.join('operatingsystems', str(os_id), 'ptables')))
         logging.debug('response is:')
         logging.debug(response)
         results = response.get('results')
@@ -589,7 +593,7 @@ class ForemanAPI(HttpAPI):
         """
         logging.debug('Reached puppet_class_info_v1')
         response = self.get(posixpath.join("puppetclasses", classname), headers=self.headers)
-        return response.json()
+        return self.decode_json(response)
 
     def puppet_class_info_v2(self, classname):
         """
@@ -597,7 +601,7 @@ class ForemanAPI(HttpAPI):
         """
         logging.debug('Reached puppet_class_info_v2')
         response = self.get(posixpath.join("foreman_puppet", "api", "puppetclasses", classname), headers=self.headers)
-        return response.json()
+        return self.decode_json(response)
 
     def smart_class_info(self, scid):
         """
@@ -618,7 +622,7 @@ class ForemanAPI(HttpAPI):
         """
         logging.debug('Reached smart_class_info_v1')
         response = self.get(posixpath.join("smart_class_parameters", str(scid)), headers=self.headers)
-        return response.json()
+        return self.decode_json(response)
 
     def smart_class_info_v2(self, scid):
         """
@@ -678,7 +682,7 @@ class ForemanAPI(HttpAPI):
         """
         logging.debug('Reached get_hostgroup_puppetclasses_v1')
         response = self.get(posixpath.join("hostgroups", str(hostgroup_id), "puppetclasses"), headers=self.headers)
-        return response.json()
+        return self.decode_json(response)
 
     def get_hostgroup_puppetclasses_v2(self, hostgroup_id):
         """
@@ -686,7 +690,7 @@ class ForemanAPI(HttpAPI):
         """
         logging.debug('Reached get_hostgroup_puppetclasses_v2')
         response = self.get(posixpath.join('foreman_puppet', 'api', 'hostgroups', str(hostgroup_id), 'puppetclasses'))
-        return response.json()
+        return self.decode_json(response)
 
     def add_puppet_class_to_host(self, hostname, params):
         """
@@ -737,9 +741,9 @@ class ForemanAPI(HttpAPI):
         Returns all available subnets
         """
         logging.debug('Reached get_subnets_v1')
-        subnets_count = self.get("subnets", headers=self.headers).json()["total"]
+        subnets_count = self.decode_json(self.get("subnets", headers=self.headers))["total"]
         response = self.get("subnets?per_page={}".format(subnets_count), headers=self.headers)
-        return response.json()
+        return self.decode_json(response)
 
     def get_subnets_v2(self):
         """
@@ -772,7 +776,7 @@ class ForemanAPI(HttpAPI):
 
         response = self.get(_rq, headers=self.headers)
 
-        return response.json()
+        return self.decode_json(response)
 
     def get_host_reports_v2(self, hostname, last):
         """
@@ -783,13 +787,13 @@ class ForemanAPI(HttpAPI):
         logging.debug('last = [%s]' % last)
         if not last:
             params = {'search': 'host=%s' % hostname}
-            response = self.get('config_reports', params=params).json()
+            response = self.decode_json(self.get('config_reports', params=params))
             logging.debug('Received response:')
             logging.debug(response)
         else:
             host_id = self.get_host_info(hostname).get('id')
             logging.debug('host_id = [%s]' % host_id)
-            response = self.get(posixpath.join('hosts', str(host_id), "config_reports", "last")).json()
+            response = self.decode_json(self.get(posixpath.join('hosts', str(host_id), "config_reports", "last")))
             logging.debug('Received response:')
             logging.debug(response)
         return response
@@ -799,7 +803,7 @@ class ForemanAPI(HttpAPI):
         Returns true if host is powered on
         """
         logging.debug('Reached is_host_powered_on')
-        response = self.get(posixpath.join("hosts", hostname, "power")).json()
+        response = self.decode_json(self.get(posixpath.join("hosts", hostname, "power")))
         return response['state'] == 'on'
 
     def host_power(self, hostname, action):
@@ -860,7 +864,7 @@ class ForemanAPI(HttpAPI):
         :return: response in json format
         """
         response = self.get(posixpath.join("config_reports", str(id)), headers=self.headers)
-        return response.json()
+        return self.decode_json(response)
 
     def get_report_v2(self, id):
         """
@@ -891,7 +895,7 @@ class ForemanAPI(HttpAPI):
         :return: int
         """
         logging.debug('Reached get_hostgroup_id_v1')
-        hostgroups = self.get("hostgroups", headers=self.headers).json()["results"]
+        hostgroups = self.decode_json(self.get("hostgroups", headers=self.headers))["results"]
 
         for hostgroup in hostgroups:
             if hostgroup.get("name") == hostgroup_name:
@@ -930,9 +934,9 @@ class ForemanAPI(HttpAPI):
         """
         logging.debug('Reached get_organization_id_v1')
         organization_id = None
-        organizations_count = self.get("organizations", headers=self.headers).json()["total"]
-        organizations = self.get("organizations?per_page={}".format(
-            organizations_count), headers=self.headers).json()["results"]
+        organizations_count = self.decode_json(self.get("organizations", headers=self.headers))["total"]
+        organizations = self.decode_json(self.get("organizations?per_page={}".format(
+            organizations_count), headers=self.headers))["results"]
 
         try:
             organization_id = next(organization["id"]
@@ -971,7 +975,7 @@ class ForemanAPI(HttpAPI):
         logging.debug('Reached get_os_id_v2')
         logging.debug('os_name = [%s]' % os_name)
         params = {'search': 'name=%s' % os_name}
-        response = self.get('operatingsystems', params=params).json()
+        response = self.decode_json(self.get('operatingsystems', params=params))
         logging.debug('response is:')
         logging.debug(response)
         results = response.get('results')
@@ -1040,10 +1044,11 @@ class ForemanAPI(HttpAPI):
         :return: str
         """
         logging.debug('Reached get_image_uuid_v1')
-        os_list = self.get("operatingsystems", headers=self.headers).json()["results"]
+        os_list = self.decode_json(self.get("operatingsystems", headers=self.headers))["results"]
         try:
             os_id = next(os["id"] for os in os_list if os["description"] == os_name)
-            images_list = self.get(posixpath.join("operatingsystems", str(os_id), "images")).json()["results"]
+            images_list = self.decode_json(
+                self.get(posixpath.join("operatingsystems", str(os_id), "images")))["results"]
             image_uuid = next(image["uuid"] for image in images_list if image["name"] == image_name)
             return image_uuid
         except StopIteration:
@@ -1079,8 +1084,8 @@ class ForemanAPI(HttpAPI):
         :return: int
         """
         logging.debug('Reached get_flavor_id_v1')
-        flavors_list = self.get(posixpath.join("compute_resources", str(compute_resource_id),
-                                               "available_flavors")).json()["results"]
+        flavors_list = self.decode_json(self.get(posixpath.join("compute_resources", str(compute_resource_id),
+                                                                "available_flavors")))["results"]
 
         try:
             flavor_id = next(flavor["id"] for flavor in flavors_list if flavor["name"] == flavor_name)
@@ -1116,7 +1121,8 @@ class ForemanAPI(HttpAPI):
         :return: str
         """
         logging.debug('Reached get_tenant_id_v1')
-        compute_resource_info = self.get(posixpath.join("compute_resources", str(compute_resource_id))).json()
+        compute_resource_info = self.decode_json(
+            self.get(posixpath.join("compute_resources", str(compute_resource_id))))
 
         try:
             tenant_id = compute_resource_info["compute_attributes"][0]["attributes"]["tenant_id"]
@@ -1151,10 +1157,8 @@ class ForemanAPI(HttpAPI):
         :return: dict
         """
         logging.debug('Reached get_hosts_uuids_v1')
-        hosts_total_qty = self.get("hosts", params={"per_page": 1}).json()["total"]
-        hostnames_uuids = {host["name"]: host["uuid"]
-                           for host in self.get("hosts", params={"per_page": hosts_total_qty}).json()["results"]}
-        uuids = {hostname: uuid for hostname, uuid in hostnames_uuids.items() if hostname in hostnames}
+        hostnames = set(hostnames)
+        uuids = {host["name"]: host["uuid"] for host in self.iter_hosts() if host["name"] in hostnames}
         return uuids
 
     def get_hosts_uuids_v2(self, hostnames):
@@ -1166,6 +1170,18 @@ class ForemanAPI(HttpAPI):
         logging.debug('Passing to get_hosts_uuids_v1')
         return self.get_hosts_uuids_v1(hostnames)
 
+    def iter_hosts(self, params=None):
+        """
+        Iterate over all hosts, decoding them one by one while the list is being received,
+        so memory used does not depend on the number of hosts
+        :param dict params: additional search parameters, e.g. 'search'
+        :return: generator of host dicts
+        """
+        logging.debug('Reached iter_hosts')
+        params = params or {}
+        hosts_total_qty = self.decode_json(self.get("hosts", params=dict(params, per_page=1)))["total"]
+        return self.iter_json("hosts", path="results.item", params=dict(params, per_page=hosts_total_qty))
+
     def get_host_uuid(self, hostname):
         """
         wrapper api v1/v2
@@ -1185,7 +1201,7 @@ class ForemanAPI(HttpAPI):
         """
         logging.debug('Reached get_host_uuid_v1')
         try:
-            return self.get(posixpath.join("hosts", hostname)).json()["uuid"]
+            return self.decode_json(self.get(posixpath.join("hosts", hostname)))["uuid"]
         except KeyError:
             return None
 
@@ -1205,7 +1221,7 @@ class ForemanAPI(HttpAPI):
         """
         logging.debug('Reached get_host_compute_attributes')
         response = self.get(posixpath.join("hosts", hostname, "vm_compute_attributes"))
-        data = response.json()
+        data = self.decode_json(response)
         return dto.HostComputeAttributes.from_json(data=data)
 
     def get_host_disk_size(self, hostname) -> Optional[int]:
@@ -1230,17 +1246,18 @@ class ForemanAPI(HttpAPI):
         """
         :return: list
         """
-        users_qty = self.get("users", params={"per_page": 1}).json()["total"]
+        users_qty = self.decode_json(self.get("users", params={"per_page": 1}))["total"]
         users = [{"firstname": user["firstname"], "lastname": user["lastname"], "login": user["login"]}
-                 for user in self.get("users", params={"per_page": users_qty}).json()["results"]]
+                 for user in self.decode_json(self.get("users", params={"per_page": users_qty}))["results"]]
         return users
 
     def get_all_usergroups(self):
         """
         :return: list
         """
-        groups_qty = self.get("usergroups", params={"per_page": 1}).json()["total"]
-        groups = [group["name"] for group in self.get("usergroups", params={"per_page": groups_qty}).json()["results"]]
+        groups_qty = self.decode_json(self.get("usergroups", params={"per_page": 1}))["total"]
+        groups = [group["name"] for group in self.decode_json(
+            self.get("usergroups", params={"per_page": groups_qty}))["results"]]
         return groups
 
     def set_host_owner(self, hostname, owner):
@@ -1302,7 +1319,7 @@ class ForemanAPI(HttpAPI):
             return self._template_cache[template_name]
 
         response = self.get(posixpath.join("job_templates"), params={'per_page': 'all'})
-        templates = response.json()["results"]
+        templates = self.decode_json(response)["results"]
 
         for job in templates:
             self._template_cache[job["name"]] = job["id"]
@@ -1359,7 +1376,7 @@ class ForemanAPI(HttpAPI):
             json=payload
         )
 
-        return response.json()["id"]
+        return self.decode_json(response)["id"]
 
     def is_job_invocation_success(self, job_id, timeout=300, poll_interval=5):
         """
@@ -1374,13 +1391,13 @@ class ForemanAPI(HttpAPI):
             if time.time() - start_time > timeout:
                 raise ForemanAPIError(code=500, text=f"Job {job_id} timed out after {timeout} seconds")
             response = self.get(posixpath.join("job_invocations", str(job_id)))
-            is_pending = bool(response.json().get("pending", False))
+            is_pending = bool(self.decode_json(response).get("pending", False))
             if not is_pending:
                 break
             logging.debug(f"job still pending, sleeping for {poll_interval} second")
             sleep(poll_interval)
 
-        return bool(response.json().get("succeeded", False))
+        return bool(self.decode_json(response).get("succeeded", False))
 
     def get_parameter_value(self, hostname, parameter_name):
         """
@@ -1446,7 +1463,7 @@ class ForemanAPI(HttpAPI):
         logging.debug('Reached get_host_ansible_roles')
 
         response = self.get(posixpath.join("hosts", hostname, "ansible_roles"), headers=self.headers)
-        roles = response.json()
+        roles = self.decode_json(response)
 
         return roles
 
@@ -1459,7 +1476,8 @@ class ForemanAPI(HttpAPI):
 
         if not roles:
             params = {'per_page': 'all'}
-            response = self.get(posixpath.join("ansible", "api", "ansible_roles"), params=params, headers=self.headers).json()
+            response = self.decode_json(
+                self.get(posixpath.join("ansible", "api", "ansible_roles"), params=params, headers=self.headers))
 
             logging.debug(f"About to return {response.get('subtotal')} roles")
             return response.get("results")
@@ -1481,7 +1499,8 @@ class ForemanAPI(HttpAPI):
         params["search"] = " or ".join(query)
 
         logging.debug(f"Search param is {params.get('search')}")
-        response = self.get(posixpath.join("ansible", "api", "ansible_roles"), params=params, headers=self.headers).json()
+        response = self.decode_json(
+            self.get(posixpath.join("ansible", "api", "ansible_roles"), params=params, headers=self.headers))
 
         logging.debug(f"About to return {response.get('subtotal')} roles")
         return response.get("results")
@@ -1550,7 +1569,8 @@ class ForemanAPI(HttpAPI):
         for key, values in roles.items():
             params = {"search": f"ansible_role={key}", "per_page": "all"}
 
-            variables = self.get(posixpath.join("ansible", "api", "ansible_variables"), params=params).json()["results"]
+            variables = self.decode_json(
+                self.get(posixpath.join("ansible", "api", "ansible_variables"), params=params))["results"]
             valid_params = {v["parameter"]: v["id"] for v in variables}
 
             missing = [p for p in values.keys() if p not in valid_params]
@@ -0,0 +1,279 @@
+# Response cache backends for idempotent HttpAPI GET requests
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import requests
+
+# response snapshot kept in cache: everything needed to rebuild requests.Response
+CacheEntry = namedtuple('CacheEntry', ['status_code', 'url', 'headers', 'encoding', 'content'])
+
+# characters URL may be followed by in cache key: path separator, query, fragment and key parts separator
+_boundaries = ['', '/', '?', '#', '\n']
+
+
+def entry_from_response(resp):
+    """
+    Make cache entry from response
+    :param requests.Response resp: response with content read
+    :return CacheEntry:
+    """
+    return CacheEntry(resp.status_code, resp.url, dict(resp.headers), resp.encoding, resp.content)
+
+
+def response_from_entry(entry, parsed=None):
+    """
+    Rebuild response from cache entry, a new object is returned every time
+    :param CacheEntry entry: cache entry
+    :param dict parsed: storage for parsed JSON body shared by all responses rebuilt from the entry
+    :return CachedResponse:
+    """
+    resp = CachedResponse(parsed)
+    resp.status_code = entry.status_code
+    resp.url = entry.url
+    resp.headers = requests.structures.CaseInsensitiveDict(entry.headers)
+    resp.encoding = entry.encoding
+    resp._content = entry.content
+    return resp
+
+
+def _is_below(key, prefix):
+    """
+    Check if cache key is for URL given or the one below it: prefix has to end at path segment boundary,
+    so 'foo/1' matches 'foo/1', 'foo/1/bar' and 'foo/1?x=y' but not 'foo/10'
+    :param str key: cache key, URL first
+    :param str prefix: URL
+    :return bool:
+    """
+    if prefix is None:
+        return True
+
+    if not key.startswith(prefix):
+        return False
+
+    return prefix.endswith('/') or key[len(prefix):len(prefix) + 1] in _boundaries
+
+
+def _copy_json(value):
+    """
+    Copy decoded JSON value: only objects and arrays are mutable there, so it is much cheaper than 'deepcopy'
+    :param value: decoded JSON value
+    :return: copy of the value
+    """
+    if isinstance(value, dict):
+        return dict((_k, _copy_json(_v)) for _k, _v in value.items())
+
+    if isinstance(value, list):
+        return list(map(_copy_json, value))
+
+    return value
+
+
+class CachedResponse(requests.Response):
+    """
+    Response rebuilt from cache.
+    If 'parsed' storage is given then JSON body is parsed once for all responses sharing it,
+    every 'json' call gets its own copy of the parsed value, so callers may modify it.
+    """
+    from_cache = True
+
+    def __init__(self, parsed=None):
+        super(CachedResponse, self).__init__()
+        self._parsed = parsed
+
+    def json(self, **kvarg):
+        if self._parsed is None or kvarg:
+            return super(CachedResponse, self).json(**kvarg)
+
+        if 'json' not in self._parsed:
+            self._parsed['json'] = super(CachedResponse, self).json()
+
+        return _copy_json(self._parsed['json'])
+
+
+class MemoryCache(object):
+    """
+    In-process LRU cache with per-entry TTL. Thread-safe.
+    Keys are strings, request URL first, so entries may be invalidated by URL and ones below it.
+    """
+
+    def __init__(self, maxsize=1024):
+        """
+        :param int maxsize: maximum number of entries, least recently used ones are evicted first
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        :param str key: cache key
+        :return CacheEntry: cached entry, None if missing or expired
+        """
+        with self._lock:
+            _item = self._entries.get(key)
+
+            if _item is not None and _item[0] < time.monotonic():
+                del self._entries[key]
+                _item = None
+
+            if _item is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return _item[1]
+
+    def set(self, key, entry, ttl):
+        """
+        :param str key: cache key
+        :param CacheEntry entry: entry to keep
+        :param float ttl: seconds to keep the entry for
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, entry)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, prefix=None):
+        """
+        Drop entries
+        :param str prefix: drop entries for this URL and ones below it, all entries if not given
+        :return int: number of entries dropped
+        """
+        with self._lock:
+            _keys = [x for x in self._entries if _is_below(x, prefix)]
+
+            for _key in _keys:
+                del self._entries[_key]
+
+            return len(_keys)
+
+    def stats(self):
+        """
+        :return dict: 'hits', 'misses', 'size' and 'maxsize'
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self), 'maxsize': self.maxsize}
+
+
+class SqliteCache(MemoryCache):
+    """
+    On-disk LRU cache with per-entry TTL in sqlite database file.
+    The same file may be used by several processes at once, hit/miss counters are per-process though.
+    """
+
+    def __init__(self, path, maxsize=1024, timeout=30):
+        """
+        :param str path: database file path, created if missing
+        :param int maxsize: maximum number of entries, least recently used ones are evicted first
+        :param float timeout: seconds to wait for database lock held by another process
+        """
+        super(SqliteCache, self).__init__(maxsize=maxsize)
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+
+        with self._lock:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS http_cache (key TEXT PRIMARY KEY, expires REAL, used REAL, "
+                "status_code INTEGER, url TEXT, headers TEXT, encoding TEXT, content BLOB)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS http_cache_used ON http_cache (used)")
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM http_cache").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def get(self, key):
+        # wall clock is used instead of monotonic one since entries are shared between processes
+        _now = time.time()
+
+        with self._lock:
+            _row = self._db.execute(
+                "SELECT expires, status_code, url, headers, encoding, content FROM http_cache WHERE key = ?",
+                (key,)).fetchone()
+
+            if _row is not None and _row[0] < _now:
+                self._db.execute("DELETE FROM http_cache WHERE key = ?", (key,))
+                _row = None
+
+            if _row is None:
+                self.misses += 1
+                return None
+
+            self._db.execute("UPDATE http_cache SET used = ? WHERE key = ?", (_now, key))
+            self.hits += 1
+
+        return CacheEntry(_row[1], _row[2], json.loads(_row[3]), _row[4], bytes(_row[5]))
+
+    def set(self, key, entry, ttl):
+        _now = time.time()
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, _now + ttl, _now, entry.status_code, entry.url, json.dumps(entry.headers), entry.encoding,
+                 sqlite3.Binary(entry.content)))
+            self._db.execute(
+                "DELETE FROM http_cache WHERE key IN "
+                "(SELECT key FROM http_cache ORDER BY used DESC LIMIT -1 OFFSET ?)", (self.maxsize,))
+
+    def invalidate(self, prefix=None):
+        with self._lock:
+            if prefix is None:
+                return self._db.execute("DELETE FROM http_cache").rowcount
+
+            # 'LIKE' would require escaping of URL characters
+            _keys = [x[0] for x in self._db.execute(
+                "SELECT key FROM http_cache WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)).fetchall()
+                     if _is_below(x[0], prefix)]
+            self._db.executemany("DELETE FROM http_cache WHERE key = ?", ((x,) for x in _keys))
+            return len(_keys)
+
+
+def make_cache(cache):
+    """
+    Make cache backend from HttpAPI 'cache' setting
+    :param cache: backend object, True, 'memory' or boolean-like string for MemoryCache,
+        'sqlite:<path>' or path with directory separator for SqliteCache
+    :return: cache backend, None if caching is off
+    """
+    if cache is None or cache is False:
+        return None
+
+    if cache is True:
+        return MemoryCache()
+
+    if isinstance(cache, str):
+        _value = cache.strip()
+
+        # boolean-like values are the same as for other HttpAPI settings, see API._str_to_bool
+        if _value.lower() in ['memory', '1', 'true', 'yes', 'on', 'y']:
+            return MemoryCache()
+
+        if _value.lower() in ['', '0', 'false', 'no', 'off', 'n']:
+            return None
+
+        if _value.startswith('sqlite:'):
+            return SqliteCache(os.path.expanduser(_value[len('sqlite:'):]))
+
+        # bare word is a typo much more likely than a file name
+        if any(x and x in _value for x in [os.sep, os.altsep]):
+            return SqliteCache(os.path.expanduser(_value))
+
+        raise ValueError("Unsupported cache setting [%s]: 'memory' or 'sqlite:<path>' expected" % cache)
+
+    return cache
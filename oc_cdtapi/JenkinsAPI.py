@@ -41,6 +41,10 @@ class Jenkins(HttpAPI):
 
     _error = JenkinsError
     _env_prefix = 'JENKINS'
+    # Jenkins answers 503 while restarting, wait for it longer
+    retry_policy = dict(HttpAPI.retry_policy, total=5, backoff_factor=1, backoff_max=60)
+    # build triggering may wait for the queue before answering
+    read_timeout = 600
 
     def re(self, req):
         if req and req.startswith('!'):
@@ -58,7 +62,7 @@ class Jenkins(HttpAPI):
         """Gets job list"""
         jobs = self.get('', params={'tree': 'jobs[name]'})
         return filter(lambda x: (not prefix or x.startswith(prefix)) and (not suffix or x.endswith(suffix)),
-                      map(lambda x: x['name'], jobs.json().get('jobs', [])))
+                      map(lambda x: x['name'], self.decode_json(jobs).get('jobs', [])))
 
     def get_node(self, node):
         """Gets config.xml for specific slave"""
@@ -144,7 +148,7 @@ class Jenkins(HttpAPI):
 
     def is_node_idle(self, node):
         """Retrieve 'idle' attribute of a node via newer JSON API (may require Jenkins 2.x)."""
-        return self.get(posixpath.join("computer", node, "api", "json")).json().get('idle')
+        return self.decode_json(self.get(posixpath.join("computer", node, "api", "json"))).get('idle')
 
     def list_nodes(self):
         """
@@ -152,10 +156,9 @@ class Jenkins(HttpAPI):
         :return: List of strings with node names, possible empty
         """
         raw_data = self.get("computer", params={"tree": "computer[displayName]"})
-        str_data = raw_data.text
 
 #        return map( lambda x: x[ "displayName" ], json.loads( self.get( "computer", params = { "tree" : "computer[displayName]" } ).text )[ "computer" ] );
-        return [x["displayName"] for x in json.loads(str_data)["computer"]]
+        return [x["displayName"] for x in self.decode_json(raw_data)["computer"]]
 
     def job_xml_enable(self, config):
         """
@@ -259,7 +262,7 @@ class Jenkins(HttpAPI):
             dict_parms["tree"] = "executors[idle,currentExecutable[idle,building,builtOn,number,fullDisplayName,url]]"
 
         response = self.get(str_request, params=dict_parms)
-        dict_resp = json.loads(response.text)
+        dict_resp = self.decode_json(response)
 
         if node is not None:
             if len(dict_resp["executors"]) == 0:
@@ -300,7 +303,7 @@ class Jenkins(HttpAPI):
         """
         ls_result = list()
         obj_resp = self.get("queue")
-        dict_resp = json.loads(obj_resp.text or {})
+        dict_resp = self.decode_json(obj_resp, empty=dict())
 
         if not 'items' in dict_resp:
             return ls_result
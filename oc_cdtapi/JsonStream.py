@@ -0,0 +1,194 @@
+# Incremental decoding of JSON values from streamed response bodies, see HttpAPI 'iter_json'
+import codecs
+import json
+import re
+
+# ijson is optional: without it documents are scanned with standard library decoder
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+_whitespace = ' \t\n\r'
+_delimiter = re.compile(r'[\s,:\]}]')
+
+
+def iter_items(fd, path='item', chunk_size=64 * 1024, encoding=None):
+    """
+    Decode JSON values found at path one by one, reading file object chunk-by-chunk,
+    so only a chunk and the current value are kept in memory whatever the document size is
+    :param fd: binary file object with JSON document
+    :param str path: dot-separated object keys leading to the values, 'item' stands for every array element
+        (ijson prefix notation): 'item' for top-level array elements, 'results.item' for ones of 'results' array
+    :param int chunk_size: bytes to read at once
+    :param str encoding: document encoding, UTF-8 if not given
+    :return: generator of decoded values, ValueError is raised for malformed document
+
+    >>> import io
+    >>> list(iter_items(io.BytesIO(b'{"total": 2, "results": [{"id": 1}, {"id": 2}]}'), 'results.item'))
+    [{'id': 1}, {'id': 2}]
+    """
+    if ijson is not None and codecs.lookup(encoding or 'utf-8').name == 'utf-8':
+        return _ijson_items(fd, path, chunk_size)
+
+    return _Scanner(fd, chunk_size, encoding).items(path.split('.') if path else [])
+
+
+def _ijson_items(fd, path, chunk_size):
+    """
+    Decode values with ijson, its errors are converted to ValueError as standard library raises
+    """
+    try:
+        for _item in ijson.items(fd, path, buf_size=chunk_size, use_float=True):
+            yield _item
+    except ijson.JSONError as e:
+        raise ValueError(str(e))
+
+
+class _Scanner(object):
+    """
+    Minimal incremental JSON scanner: walks document structure down to the path requested
+    and decodes values there with standard library decoder. Everything else is skipped without decoding
+    """
+
+    def __init__(self, fd, chunk_size, encoding=None):
+        """
+        :param fd: binary file object
+        :param int chunk_size: bytes to read at once
+        :param str encoding: document encoding, UTF-8 if not given
+        """
+        self._fd = fd
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        self._json = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def __fill(self):
+        """
+        Read next chunk to buffer, dropping the part scanned already
+        :return bool: False if there is nothing to read
+        """
+        if self._eof:
+            return False
+
+        _data = self._fd.read(self._chunk_size)
+        self._eof = not _data
+        self._buffer = self._buffer[self._pos:] + self._decoder.decode(_data, final=self._eof)
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """
+        :return str: next non-whitespace character, empty at the end of document
+        """
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _whitespace:
+                self._pos += 1
+
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+
+            if not self.__fill():
+                return ''
+
+    def _expect(self, chars):
+        """
+        Skip the next non-whitespace character, which has to be one of given
+        :return str: the character
+        """
+        _char = self._peek()
+
+        if not _char or _char not in chars:
+            raise json.JSONDecodeError("Expecting one of %r" % chars, self._buffer, self._pos)
+
+        self._pos += 1
+        return _char
+
+    def _value(self):
+        """
+        Decode the next value, reading as many chunks as it takes
+        """
+        # numbers and literals are not self-delimiting: '-2.' is decoded as '-2', so wait for delimiter
+        if self._peek() not in '"[{':
+            while not _delimiter.search(self._buffer, self._pos) and self.__fill():
+                pass
+
+        while True:
+            try:
+                _value, self._pos = self._json.raw_decode(self._buffer, self._pos)
+                return _value
+            except json.JSONDecodeError:
+                if not self.__fill():
+                    raise
+
+    def _members(self, opening, closing):
+        """
+        Walk object or array members, the member value is to be consumed by caller
+        :param str opening: '{' or '['
+        :param str closing: '}' or ']'
+        :return: generator of object keys, None for array elements
+        """
+        self._expect(opening)
+
+        if self._peek() == closing:
+            self._pos += 1
+            return
+
+        while True:
+            _key = None
+
+            if opening == '{':
+                if self._peek() != '"':
+                    raise json.JSONDecodeError("Expecting property name", self._buffer, self._pos)
+
+                _key = self._value()
+                self._expect(':')
+
+            yield _key
+
+            if self._expect(',' + closing) == closing:
+                return
+
+    def _skip(self):
+        """
+        Skip the next value, decoding scalars only
+        """
+        _char = self._peek()
+
+        if _char == '[':
+            for _ in self._members('[', ']'):
+                self._skip()
+        elif _char == '{':
+            for _ in self._members('{', '}'):
+                self._skip()
+        else:
+            self._value()
+
+    def items(self, path):
+        """
+        :param list path: object keys and 'item' for array elements
+        :return: generator of values found at path
+        """
+        if not path:
+            yield self._value()
+            return
+
+        _char = self._peek()
+
+        if _char == '[' and path[0] == 'item':
+            for _ in self._members('[', ']'):
+                for _item in self.items(path[1:]):
+                    yield _item
+
+        elif _char == '{':
+            for _key in self._members('{', '}'):
+                if _key == path[0]:
+                    for _item in self.items(path[1:]):
+                        yield _item
+                else:
+                    self._skip()
+
+        else:
+            self._skip()
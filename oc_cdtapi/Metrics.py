@@ -0,0 +1,302 @@
+# Request-level instrumentation for HttpAPI: hooks, in-process metrics registry and exporters
+import math
+import re
+import threading
+import time
+
+# OpenTelemetry is optional: without it 'OpenTelemetryInstrument' can not be used
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+# path segments replaced with '{id}' in endpoint templates: numbers, UUIDs and hexadecimal hashes
+_id_segment = re.compile(r'^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|'
+                         r'[0-9a-fA-F]{16,})$')
+
+default_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+
+def endpoint_template(req, templates=None):
+    """
+    Make low-cardinality endpoint name from request sub-URL, to group metrics by
+    :param str req: request sub-URL, may be list of str
+    :param dict templates: regular expression searched in request => template, the first found wins
+    :return str: template given, or request with identifier-like path segments replaced by '{id}'
+
+    >>> endpoint_template('operatingsystems/12/ptables')
+    'operatingsystems/{id}/ptables'
+    >>> endpoint_template('content/repositories/maven/g/a/v/a-v.jar', {r'^content/repositories/': 'content'})
+    'content'
+    """
+    if isinstance(req, list):
+        req = '/'.join(req)
+
+    for _pattern, _template in (templates or {}).items():
+        if re.search(_pattern, req):
+            return _template
+
+    return '/'.join('{id}' if _id_segment.match(x) else x for x in req.split('?', 1)[0].split('/'))
+
+
+class RequestEvent(object):
+    """
+    Single request passed to instruments: filled before the request is sent and completed after it
+    """
+    __slots__ = ('client', 'method', 'req', 'endpoint', 'started', 'seconds', 'response', 'error', 'status_code',
+                 'bytes_sent', 'bytes_received', 'retries', 'circuit', 'context')
+
+    def __init__(self, client, method, req, endpoint):
+        """
+        :param str client: API class name
+        :param str method: HTTP method, upper-case
+        :param str req: request sub-URL
+        :param str endpoint: endpoint template, see 'endpoint_template'
+        """
+        self.client = client
+        self.method = method
+        self.req = req
+        self.endpoint = endpoint
+        self.started = time.monotonic()
+        self.seconds = None
+        self.response = None
+        self.error = None
+        self.status_code = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+        # circuit breaker state before the request, None if there is no circuit breaker
+        self.circuit = None
+        # anything instruments need to keep between 'before' and 'after', by instrument
+        self.context = dict()
+
+
+class Instrument(object):
+    """
+    Base class for HttpAPI instruments, all hooks do nothing by default
+    """
+
+    def before(self, event):
+        """
+        Called before request is sent
+        :param RequestEvent event: request
+        """
+        pass
+
+    def after(self, event):
+        """
+        Called after response is post-processed or request failed
+        :param RequestEvent event: request with result: 'seconds', 'status_code', 'error' etc.
+        """
+        pass
+
+    def circuit(self, breaker, state):
+        """
+        Called when circuit breaker changes its state
+        :param API.CircuitBreaker breaker: circuit breaker
+        :param str state: new state: 'closed', 'open' or 'half-open'
+        """
+        pass
+
+
+class Histogram(object):
+    """
+    Cumulative histogram of observed values, not thread-safe by itself
+    """
+
+    def __init__(self, buckets=default_buckets):
+        """
+        :param tuple buckets: upper bounds, ascending, the last one should be infinity
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """
+        :param float value: value to add
+        """
+        self.count += 1
+        self.sum += value
+
+        for _i, _bound in enumerate(self.buckets):
+            if value <= _bound:
+                self.counts[_i] += 1
+
+    def snapshot(self):
+        """
+        :return dict: 'count', 'sum' and cumulative 'buckets' as upper bound => count
+        """
+        return {'count': self.count, 'sum': self.sum, 'buckets': dict(zip(self.buckets, self.counts))}
+
+
+class MetricsRegistry(Instrument):
+    """
+    In-process metrics grouped by client class, HTTP method and endpoint template:
+    latency histogram, bytes sent and received, retries and number of responses by status code.
+    Thread-safe, may be shared by any number of HttpAPI instances.
+    """
+
+    def __init__(self, buckets=default_buckets):
+        """
+        :param tuple buckets: latency histogram buckets, seconds
+        """
+        self.buckets = buckets
+        self._metrics = dict()
+        self._circuits = dict()
+        self._lock = threading.Lock()
+
+    def after(self, event):
+        _key = (event.client, event.method, event.endpoint)
+        # connection errors and the like have no status code
+        _code = str(event.status_code) if event.status_code is not None else type(event.error).__name__
+
+        with self._lock:
+            if _key not in self._metrics:
+                self._metrics[_key] = {'latency': Histogram(self.buckets), 'bytes_sent': 0, 'bytes_received': 0,
+                                       'retries': 0, 'codes': dict()}
+
+            _metrics = self._metrics[_key]
+            _metrics['latency'].observe(event.seconds)
+            _metrics['bytes_sent'] += event.bytes_sent
+            _metrics['bytes_received'] += event.bytes_received
+            _metrics['retries'] += event.retries
+            _metrics['codes'][_code] = _metrics['codes'].get(_code, 0) + 1
+
+    def circuit(self, breaker, state):
+        with self._lock:
+            _circuit = self._circuits.setdefault(breaker.name, {'state': state, 'opened': 0})
+            _circuit['state'] = state
+
+            if state == 'open':
+                _circuit['opened'] += 1
+
+    def circuits(self):
+        """
+        :return dict: circuit breaker name => last 'state' reported and number of times it 'opened'
+        """
+        with self._lock:
+            return dict((_name, dict(_value)) for _name, _value in self._circuits.items())
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+            self._circuits.clear()
+
+    def snapshot(self):
+        """
+        :return dict: (client, method, endpoint) => 'latency' histogram snapshot, 'bytes_sent', 'bytes_received',
+            'retries' and 'codes' as status code (or exception class name) => number of responses
+        """
+        with self._lock:
+            return dict((_key, {'latency': _value['latency'].snapshot(), 'bytes_sent': _value['bytes_sent'],
+                                'bytes_received': _value['bytes_received'], 'retries': _value['retries'],
+                                'codes': dict(_value['codes'])})
+                        for _key, _value in self._metrics.items())
+
+    def top(self, count=10):
+        """
+        Endpoints taking most of wall-clock time
+        :param int count: number of endpoints to return
+        :return list: ((client, method, endpoint), total seconds, number of requests), the slowest first
+        """
+        _totals = [(_key, _value['latency']['sum'], _value['latency']['count'])
+                   for _key, _value in self.snapshot().items()]
+        return sorted(_totals, key=lambda x: x[1], reverse=True)[:count]
+
+    def prometheus_text(self, prefix='oc_cdtapi'):
+        """
+        Render metrics in Prometheus text exposition format
+        :param str prefix: metric names prefix
+        :return str: metrics text
+        """
+        _lines = ['# TYPE %s_request_seconds histogram' % prefix]
+        _counters = [('bytes_sent', 'request_bytes_sent_total'), ('bytes_received', 'request_bytes_received_total'),
+                     ('retries', 'request_retries_total')]
+        _snapshot = sorted(self.snapshot().items())
+
+        for _key, _value in _snapshot:
+            _labels = self.__labels(_key)
+
+            for _bound, _count in sorted(_value['latency']['buckets'].items()):
+                _lines.append('%s_request_seconds_bucket{%s,le="%s"} %d' % (
+                    prefix, _labels, '+Inf' if math.isinf(_bound) else repr(_bound), _count))
+
+            _lines.append('%s_request_seconds_sum{%s} %r' % (prefix, _labels, _value['latency']['sum']))
+            _lines.append('%s_request_seconds_count{%s} %d' % (prefix, _labels, _value['latency']['count']))
+
+        for _field, _name in _counters:
+            _lines.append('# TYPE %s_%s counter' % (prefix, _name))
+            _lines.extend('%s_%s{%s} %d' % (prefix, _name, self.__labels(_key), _value[_field])
+                          for _key, _value in _snapshot)
+
+        _lines.append('# TYPE %s_responses_total counter' % prefix)
+
+        for _key, _value in _snapshot:
+            _lines.extend('%s_responses_total{%s,code="%s"} %d' % (prefix, self.__labels(_key), _code, _count)
+                          for _code, _count in sorted(_value['codes'].items()))
+
+        _circuits = sorted(self.circuits().items())
+
+        if _circuits:
+            _lines.append('# TYPE %s_circuit_open gauge' % prefix)
+            _lines.extend('%s_circuit_open{breaker="%s"} %d' % (prefix, _name, int(_value['state'] != 'closed'))
+                          for _name, _value in _circuits)
+
+        return '\n'.join(_lines) + '\n'
+
+    def __labels(self, key):
+        """
+        :param tuple key: (client, method, endpoint)
+        :return str: Prometheus labels
+        """
+        return ','.join('%s="%s"' % (_name, _value.replace('\\', '\\\\').replace('"', '\\"'))
+                        for _name, _value in zip(['client', 'method', 'endpoint'], key))
+
+
+class OpenTelemetryInstrument(Instrument):
+    """
+    Reports each request as OpenTelemetry client span, requires 'opentelemetry-api' installed
+    """
+
+    def __init__(self, tracer=None):
+        """
+        :param tracer: OpenTelemetry tracer, the global tracer provider one is used if not given
+        """
+        if tracer is None:
+            if otel_trace is None:
+                raise ValueError("OpenTelemetry instrument requested but 'opentelemetry-api' is not installed")
+
+            tracer = otel_trace.get_tracer(__name__)
+
+        self.tracer = tracer
+
+    def before(self, event):
+        _kind = otel_trace.SpanKind.CLIENT if otel_trace is not None else None
+        event.context[self] = self.tracer.start_span('%s %s' % (event.method, event.endpoint), kind=_kind, attributes={
+            'http.request.method': event.method, 'oc_cdtapi.client': event.client,
+            'oc_cdtapi.endpoint': event.endpoint})
+
+    def after(self, event):
+        _span = event.context.pop(self, None)
+
+        if _span is None:
+            return
+
+        if event.status_code is not None:
+            _span.set_attribute('http.response.status_code', event.status_code)
+
+        _span.set_attribute('oc_cdtapi.retries', event.retries)
+
+        if event.error is not None:
+            _span.record_exception(event.error)
+
+            if otel_trace is not None:
+                _span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, str(event.error)))
+
+        _span.end()
+
+
+# registry used by default, see HttpAPI 'instruments'
+registry = MetricsRegistry()
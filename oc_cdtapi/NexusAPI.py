@@ -1,12 +1,23 @@
 import doctest
+import fnmatch
+import hashlib
+import io
+import json
 import os
 import re
 from xml.etree import ElementTree
 import posixpath
 import logging
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 
 import requests
-from .API import HttpAPI, HttpAPIError
+from .API import HttpAPI, HttpAPIError, UploadStream
+from .AsyncAPI import AsyncHttpAPI
 
 import sys
 if sys.version_info.major == 2:
@@ -18,6 +29,13 @@ elif sys.version_info.major == 3:
 # GAV has the following format: groupid:artifactid:version[:packaging[:clasifier]]
 # This interface should be considered low-level
 
+_gav_keys = ('g', 'a', 'v', 'p', 'c')
+_gav_required = frozenset(['g', 'a', 'v'])
+_gav_cache_size = 65536
+# batch conversions of shorter sequences are never offloaded to processes
+_batch_processes_min = 10000
+
+
 class NexusAPIError(HttpAPIError):
     def __str__(self):
         return 'Nexus error: ' + self.text + ': Code ' + str(self.code) + ' ' + self.url
@@ -28,8 +46,10 @@ def parse_gav(gav, relaxed=False):
     Parses GAV string and returns dict with its components suitable for nexus calls
     """
 
+    if isinstance (gav, Gav): return gav.to_dict()
+
     if isinstance (gav, dict):
-        if any([relaxed, set(['a', 'g', 'v']).issubset(set(gav.keys()))]): return gav
+        if relaxed or _gav_required.issubset(gav): return gav
         raise ValueError("Expected string or dict with g/a/v but got dict")
 
     if relaxed and (gav == None or gav == ''): return {}
@@ -37,20 +57,21 @@ def parse_gav(gav, relaxed=False):
     gav_list = gav.split(':')
     if len(gav_list) < 3 and not relaxed: raise ValueError("GroupId, ArtifactId and Version are mandatory")
     if len(gav_list) > 5: raise ValueError("Incorrect GAV format")
-    gav_dict = {}
-    for i, v in enumerate(gav_list): gav_dict[['g', 'a', 'v', 'p', 'c'][i]] = v
-    return gav_dict
+    return dict(zip(_gav_keys, gav_list))
 
 
 def gav_to_path(gav, relaxed=False):
     """
-    Converts GAV to repository path. Gav can be either string or dict from parse_gav function
+    Converts GAV to repository path. Gav can be either string, Gav or dict from parse_gav function
     """
 
+    if isinstance (gav, Gav): return gav.path
+    if isinstance (gav, strtype) and not relaxed: return Gav.parse(gav).path
+
     if isinstance (gav, strtype):
         gav = parse_gav(gav, relaxed)
 
-    if not relaxed and not set(['g', 'a', 'v']).issubset(set(gav.keys())):
+    if not relaxed and not _gav_required.issubset(gav):
         raise ValueError('ArtifactId, GroupId and Version are mandatory!')
 
     url = ''
@@ -62,7 +83,7 @@ def gav_to_path(gav, relaxed=False):
 
 def gav_to_artifact_path(gav):
     """ Converts gav to name like artifactid/version/filename """
-    if isinstance (gav, strtype):
+    if isinstance (gav, (strtype, Gav)):
         gav = parse_gav(gav, relaxed=True)
 
     path = gav['a']
@@ -75,30 +96,33 @@ def gav_to_artifact_path(gav):
 
 def gav_to_filename(gav):
     """ Converts gav to name like artifactid-version.packaging """
+    if isinstance (gav, Gav): return gav.filename
+    # full string GAV has the same filename as its parsed and cached form
+    if isinstance (gav, strtype) and gav.count(':') >= 2: return Gav.parse(gav).filename
+
     if isinstance (gav, strtype):
         gav = parse_gav(gav, relaxed=True)
 
-    if not set(['a', 'v']).issubset(set(gav.keys())):
+    if 'a' not in gav or 'v' not in gav:
         raise ValueError("Artifactid and version required to make path")
 
-    filename = '-'.join(
-            filter(None, map(lambda x: gav.get(x), ['a', 'v', 'c'])))
+    filename = '-'.join(filter(None, (gav['a'], gav['v'], gav.get('c'))))
 
     return '.'.join([filename, gav.get('p', 'jar')])
 
 def gav_to_str(parsed_gav):
     """ Converts parsed GAV back to colon-separated string """
-    required_keys=["g", "a", "v"]
+    if isinstance(parsed_gav, Gav): return str(parsed_gav)
 
-    if not set(required_keys).issubset(set(parsed_gav.keys())):
+    if not _gav_required.issubset(parsed_gav):
         raise ValueError("At least groupid, artifactid and version should be presented in parsed gav")
 
-    _result = ':'.join(map(lambda x: parsed_gav.get(x), required_keys))
+    _result = ':'.join((parsed_gav['g'], parsed_gav['a'], parsed_gav['v']))
 
-    if not 'p' in parsed_gav.keys():
+    if not 'p' in parsed_gav:
         return _result
 
-    return ':'.join([_result] + list(filter(None, map(lambda x: parsed_gav.get(x), ['p', 'c']))))
+    return ':'.join([_result] + list(filter(None, (parsed_gav['p'], parsed_gav.get('c')))))
 
 
 def pom_from_gav(gav, no_packaging=True):
@@ -130,7 +154,7 @@ def pom_from_gav(gav, no_packaging=True):
       </project>
     '''
 
-    if isinstance (gav, strtype):
+    if isinstance (gav, (strtype, Gav)):
         gav = parse_gav(gav)
     else:
         gav = gav.copy()
@@ -182,6 +206,282 @@ def gav_from_path(path, dictionary=True):
 
     return generated_gav if dictionary else gav_to_str(generated_gav)
 
+def gavs_from_paths(paths, dictionary=True, processes=None):
+    """
+    Batch version of 'gav_from_path', result is the same as of the scalar function applied to each path
+    :param paths: iterable of paths to artifacts
+    :param bool dictionary: return parsed GAV dicts if True, GAV strings otherwise
+    :param int processes: split very long sequences between this number of processes
+    :return list: GAVs in the order of paths
+    """
+    return _map_batch(_gavs_from_paths, paths, processes, dictionary)
+
+
+def _gavs_from_paths(paths, dictionary=True):
+    """ Sequential part of 'gavs_from_paths' """
+    _splitext = posixpath.splitext
+    _sep = posixpath.sep
+    _result = []
+    _append = _result.append
+
+    for _path in paths:
+        _parts = _path.strip('.').strip(_sep).split(_sep)
+        _a = _parts[-3]
+        _v = _parts[-2]
+        _gav = {'g': '.'.join(_parts[:-3]), 'a': _a, 'v': _v}
+        _av_part = _a + '-' + _v
+        _file_name = _parts[-1]
+
+        if _file_name.startswith(_av_part):
+            _cp_part = _file_name[len(_av_part):].strip('-').strip('.')
+
+            if _cp_part:
+                _classifier, _file_ext = _splitext(_cp_part)
+
+                if _file_ext:
+                    _gav['p'] = _file_ext.strip('.')
+                    _gav['c'] = _classifier
+                else:
+                    _gav['p'] = _classifier
+
+        _append(_gav if dictionary else gav_to_str(_gav))
+
+    return _result
+
+
+def paths_from_gavs(gavs, processes=None):
+    """
+    Batch version of 'gav_to_path', result is the same as of the scalar function applied to each GAV
+    :param gavs: iterable of GAVs, strings, dicts or Gav
+    :param int processes: split very long sequences between this number of processes
+    :return list: repository paths in the order of GAVs
+    """
+    return _map_batch(_paths_from_gavs, gavs, processes)
+
+
+def _paths_from_gavs(gavs):
+    """ Sequential part of 'paths_from_gavs' """
+    _sep = posixpath.sep
+    _result = []
+    _append = _result.append
+
+    for _gav in gavs:
+        _parts = _gav.split(':') if isinstance(_gav, strtype) else None
+
+        # anything unusual is left to the scalar function to get the same result or error
+        if not _parts or not 3 <= len(_parts) <= 5 or not all(_parts[:3]) or _sep in _gav:
+            _append(gav_to_path(_gav))
+            continue
+
+        _a = _parts[1]
+        _v = _parts[2]
+        _classifier = _parts[4] if len(_parts) > 4 else None
+        _file_name = _a + '-' + _v + '-' + _classifier if _classifier else _a + '-' + _v
+        _append(_sep.join((_parts[0].replace('.', _sep), _a, _v,
+                           _file_name + '.' + (_parts[3] if len(_parts) > 3 else 'jar'))))
+
+    return _result
+
+
+def _map_batch(func, items, processes=None, *args):
+    """
+    Apply batch function to the whole sequence, in chunks by a process pool if requested and worth it
+    :param callable func: module-level function taking list of items and 'args', returning list of results
+    :param items: iterable of items
+    :param int processes: number of processes
+    :return list: results in the order of items
+    """
+    items = items if isinstance(items, list) else list(items)
+
+    if not processes or processes < 2 or len(items) < _batch_processes_min:
+        return func(items, *args)
+
+    # a few chunks per process to even out the load
+    _chunk = -(-len(items) // (processes * 4))
+    _chunks = [items[_i:_i + _chunk] for _i in range(0, len(items), _chunk)]
+    _result = []
+
+    with ProcessPoolExecutor(max_workers=processes) as _executor:
+        for _part in _executor.map(func, _chunks, *[[_arg] * len(_chunks) for _arg in args]):
+            _result.extend(_part)
+
+    return _result
+
+
+class Gav(namedtuple('_GavTuple', _gav_keys)):
+    """
+    Immutable parsed GAV: groupid, artifactid, version, packaging and classifier,
+    the last two are None if absent.
+    Hashable and accepted everywhere string or dict GAV is.
+    Instances made by 'parse' are interned: the same string gives the same object,
+    path, filename and string forms are computed once for each distinct GAV.
+
+    >>> gav = Gav.parse('group.id:artifact:0.1:zip')
+    >>> gav.path, gav.filename, str(gav)
+    ('group/id/artifact/0.1/artifact-0.1.zip', 'artifact-0.1.zip', 'group.id:artifact:0.1:zip')
+    >>> gav is Gav.parse('group.id:artifact:0.1:zip')
+    True
+    """
+    __slots__ = ()
+
+    def __new__(cls, g, a, v, p=None, c=None):
+        return super(Gav, cls).__new__(cls, g, a, v, p, c)
+
+    @classmethod
+    def parse(cls, gav):
+        """
+        Make Gav from any supported GAV form
+        :param gav: GAV string, dict from 'parse_gav' or Gav
+        :return Gav:
+        """
+        if isinstance(gav, Gav): return gav
+        if isinstance(gav, dict): return cls.from_dict(gav)
+        if not isinstance(gav, strtype): raise ValueError("Expected string but got " + str(type(gav)))
+        return _gav_intern(gav)
+
+    @classmethod
+    def from_dict(cls, gav):
+        """
+        :param dict gav: parsed GAV with g/a/v at least
+        :return Gav:
+        """
+        gav = parse_gav(gav)
+        return cls(*map(gav.get, _gav_keys))
+
+    @classmethod
+    def from_path(cls, path):
+        """
+        :param str path: path to artifact, see 'gav_from_path'
+        :return Gav:
+        """
+        return cls.from_dict(gav_from_path(path))
+
+    def to_dict(self):
+        """
+        :return dict: new dict in 'parse_gav' form, absent components are omitted
+        """
+        return dict((_k, _v) for _k, _v in zip(_gav_keys, self) if _v is not None)
+
+    @property
+    def path(self):
+        """ Repository path, see 'gav_to_path' """
+        return _gav_forms(self)[0]
+
+    @property
+    def filename(self):
+        """ File name, see 'gav_to_filename' """
+        return _gav_forms(self)[1]
+
+    def __str__(self):
+        return _gav_forms(self)[2]
+
+
+@lru_cache(maxsize=_gav_cache_size)
+def _gav_intern(gav):
+    """ Parse GAV string to Gav once """
+    return Gav.from_dict(parse_gav(gav))
+
+
+@lru_cache(maxsize=_gav_cache_size)
+def _gav_forms(gav):
+    """ Path, filename and string forms of Gav, computed from its dict form once """
+    _dict = gav.to_dict()
+    return (gav_to_path(_dict), gav_to_filename(_dict), gav_to_str(_dict))
+
+
+class ArtifactFilter(object):
+    """
+    Artifact filter for 'ls': artifact is accepted if it matches any of 'include' patterns (or there are none)
+    and does not match any of 'exclude' patterns.
+    Pattern may be:
+        - regular expression string, searched anywhere in artifact
+        - compiled regular expression, searched as well
+        - shell-style pattern prefixed with 'glob:', matched against the whole artifact
+        - callable returning boolean for artifact string
+    Patterns are compiled once, string patterns compiled are cached.
+    """
+    __slots__ = ('include', 'exclude')
+
+    def __init__(self, include=None, exclude=None):
+        """
+        :param include: pattern or list of patterns to include
+        :param exclude: pattern or list of patterns to exclude
+        """
+        self.include = tuple(map(_compile_filter_pattern, _filter_patterns(include)))
+        self.exclude = tuple(map(_compile_filter_pattern, _filter_patterns(exclude)))
+
+    def __call__(self, artifact):
+        """
+        :param str artifact: artifact string to check
+        :return bool: is artifact accepted
+        """
+        if self.include and not any(_match(artifact) for _match in self.include):
+            return False
+
+        return not any(_match(artifact) for _match in self.exclude)
+
+
+def _filter_patterns(patterns):
+    """
+    Normalize filter patterns to a list
+    """
+    if not patterns:
+        return list()
+
+    if isinstance(patterns, (list, tuple, set, frozenset)):
+        return list(patterns)
+
+    return [patterns]
+
+
+def _compile_filter_pattern(pattern):
+    """
+    Make predicate from filter pattern, see ArtifactFilter
+    :return callable:
+    """
+    if isinstance(pattern, strtype):
+        return _compile_filter_string(pattern)
+
+    if hasattr(pattern, 'search'):
+        return lambda x: pattern.search(x) is not None
+
+    if callable(pattern):
+        return pattern
+
+    raise ValueError("Unsupported filter pattern: %s" % str(pattern))
+
+
+@lru_cache(maxsize=256)
+def _compile_filter_string(pattern):
+    if pattern.startswith('glob:'):
+        return re.compile(fnmatch.translate(pattern[len('glob:'):])).match
+
+    _re = re.compile(pattern)
+    return lambda x: _re.search(x) is not None
+
+
+def make_filter(filter=None, filter_revert=False):
+    """
+    Make ArtifactFilter from 'ls' arguments
+    :param filter: ArtifactFilter, pattern or list of patterns
+    :param bool filter_revert: exclude artifacts matching patterns instead of including them
+    :return ArtifactFilter:
+
+    >>> make_filter('zip$')('g:a:v:zip')
+    True
+    >>> make_filter(['glob:a:*:zip', 'glob:a:*:tgz'], filter_revert=True)('a:v:tgz')
+    False
+    """
+    if isinstance(filter, ArtifactFilter):
+        if filter_revert: raise ValueError("Reverting ArtifactFilter is not supported, use 'exclude' instead")
+        return filter
+
+    if filter_revert:
+        return ArtifactFilter(exclude=filter)
+
+    return ArtifactFilter(include=filter)
+
+
 class NexusAPI(HttpAPI):
     _error = NexusAPIError
     _env_prefix = 'MVN'
@@ -190,9 +490,23 @@ class NexusAPI(HttpAPI):
 
     codepage = 'utf-8'
     codepage_errors = 'replace'
+    search_page_size = 200  # artifacts per search page for 'iter_ls'
+    # artifact storage is shared by many pipelines, so load spikes are common there
+    retry_policy = dict(HttpAPI.retry_policy, total=5, backoff_max=60)
+    # large artifacts and searches may take long to start being sent when storage is loaded
+    read_timeout = 600
+    artifactory_aql = False  # list Artifactory with AQL queries instead of GAVC search
+    # artifact information requests ('info'), cached if cache backend is given
+    cache_ttls = {r'^(service/local/repositories/[^/]+/content|api/storage)/': 300}
+    # artifact paths are grouped by repository-level endpoints in metrics
+    endpoint_templates = {
+        r'^content/repositories/[^/]+/': 'content/repositories/{repo}/{path}',
+        r'^service/local/repositories/[^/]+/content/': 'service/local/repositories/{repo}/content/{path}',
+        r'^api/storage/[^/]+/': 'api/storage/{repo}/{path}',
+        r'^(?!api/|service/|content/)[^/]+/.': '{repo}/{path}'}
 
     def __init__(self, root=None, user=None, auth=None,
-                 readonly=False, anonymous=False, upload_repo=None, download_repo=None):
+                 readonly=False, anonymous=False, upload_repo=None, download_repo=None, **kvarg):
         """
         :param root: service URL
         :type root: str
@@ -209,10 +523,15 @@ class NexusAPI(HttpAPI):
         :type repo: str
         :param download_repo: repository to download artifacts from
         :type download_repo: str
+        :param kvarg: connection pool settings, see HttpAPI constructor
         """
-        super(NexusAPI, self).__init__(root, user, auth, readonly, anonymous)
+        super(NexusAPI, self).__init__(root, user, auth, readonly, anonymous, **kvarg)
         self.__upload_repo = upload_repo
         self.__download_repo = download_repo
+        # metadata updates deferred by 'metadata_batch'
+        self.__metadata_lock = threading.Lock()
+        self.__metadata_depth = 0
+        self.__metadata_pending = list()
     
     @property
     def repo_default(self):
@@ -238,6 +557,27 @@ class NexusAPI(HttpAPI):
         """
         return self.root.rstrip(posixpath.sep).endswith(posixpath.sep + "nexus")
 
+    def _get_download_repo(self, repo=None):
+        """
+        Repository to download from: explicitly given, constructor argument, environment or default one
+        :param str repo: explicitly given repository
+        :return str: repository ID
+        """
+        if not repo: repo = self.__download_repo
+        if not repo: repo = os.getenv(self._env_prefix + self._env_download_repo, self.repo_default)
+        return repo
+
+    def _get_upload_repo(self, repo=None):
+        """
+        Repository to upload to: explicitly given, constructor argument or environment
+        :param str repo: explicitly given repository
+        :return str: repository ID
+        """
+        if not repo: repo = self.__upload_repo
+        if not repo: repo = os.getenv(self._env_prefix + self._env_upload_repo)
+        if not repo: raise (ValueError("You must provide repo name"))
+        return repo
+
     def gav_get_url(self, gav, repo=None):
         """
         Get full artifact URL.
@@ -250,9 +590,9 @@ class NexusAPI(HttpAPI):
         if not gav:
             raise ValueError("GAV is mandatory")
 
-        return posixpath.join(self.root, self.__gav_get_url(gav, repo=repo))
+        return posixpath.join(self.root, self._gav_sub_url(gav, repo=repo))
 
-    def __gav_get_url(self, gav, repo, relaxed=False):
+    def _gav_sub_url(self, gav, repo, relaxed=False):
         """
         Full sub-path for get/post requests to 'gav'
         :param gav: gav
@@ -270,7 +610,7 @@ class NexusAPI(HttpAPI):
         return _rq.rstrip(posixpath.sep)
 
     def cat(self, gav, repo=None, binary=False, response=False, stream=False, encoding=None, enc_errors=None,
-            write_to=None, rest_call=False, **argv):
+            write_to=None, rest_call=False, checksums=None, verify=False, **argv):
         """
         Gets data from maven repo
         :param gav: GAV
@@ -290,21 +630,42 @@ class NexusAPI(HttpAPI):
         :param rest_call: try to search artifact via REST API instead of getting directly from repository
         :param rest_call: WARNING: this flag is ignored for Artifactory
         :type rest_call: bool
+        :param checksums: hashlib algorithm names to calculate while reading artifact data,
+        :param checksums: hexadecimal digests are stored in 'checksums' attribute of response
+        :type checksums: list
+        :param verify: calculate md5 and sha1 and compare with checksum recorded by repository,
+        :param verify: raise NexusAPIError (and remove file written to) if it does not match
+        :type verify: bool
         """
 
         # we set binary to true to ignore codepage issues
         params = parse_gav(gav)
-        if not repo: repo = self.__download_repo
-        if not repo: repo = os.getenv(self._env_prefix + self._env_download_repo, self.repo_default)
-        params['r'] = repo
+        params['r'] = self._get_download_repo(repo)
+
+        if verify:
+            checksums = sorted(set(checksums or []) | set(["md5", "sha1"]))
+
+        if checksums:
+            argv['checksums'] = checksums
 
         # workaround Nexus REST API can't work with plain text files, so we use direct download instead
         if rest_call and self.is_nexus:
             r = self.get(posixpath.join('service', 'local', 'artifact', 'maven', 'content'), params, stream=stream, write_to=write_to, **argv)
         else:
-            _rq = self.__gav_get_url(gav, repo=params['r'])
+            _rq = self._gav_sub_url(gav, repo=params['r'])
             r = self.get(_rq, stream=stream, write_to=write_to, **argv)
 
+        if verify:
+            _algorithm, _expected = self.__expected_checksum(gav, params['r'], r, list(r.checksums.keys()))
+            self.__check_checksum(gav, r, _algorithm, _expected, r.checksums.get(_algorithm), write_to)
+
+        return self._cat_result(r, binary=binary, response=response, encoding=encoding,
+                                enc_errors=enc_errors, write_to=write_to)
+
+    def _cat_result(self, r, binary=False, response=False, encoding=None, enc_errors=None, write_to=None):
+        """
+        Convert 'cat' response to the result requested, see 'cat' for arguments
+        """
         if response or write_to: return r
         if binary: return r.content
 
@@ -315,6 +676,164 @@ class NexusAPI(HttpAPI):
 
         return r.text
 
+    def download_many(self, gavs, dest_dir, workers=None, repo=None, filenames=None):
+        """
+        Downloads artifacts in parallel streaming each one directly to disk.
+        No separate existence checks are done: 404 for download request means artifact is missing.
+        :param gavs: GAVs to download
+        :type gavs: list
+        :param dest_dir: directory to download to
+        :type dest_dir: str
+        :param workers: number of parallel downloads, connection pool size by default
+        :type workers: int
+        :param repo: repository to download from
+        :type repo: str
+        :param filenames: file names for artifacts, in the same order as GAVs, generated from GAVs if omitted
+        :type filenames: list
+        :return: download statistics for each GAV: 'path', 'size' in bytes, 'seconds' and 'rate' in bytes per second,
+        :return: None if artifact is missing
+        :return type: dict
+        """
+        gavs = list(map(lambda x: gav_to_str(x) if isinstance(x, (dict, Gav)) else x, gavs))
+
+        if not filenames:
+            filenames = list(map(gav_to_filename, gavs))
+
+        if len(filenames) != len(gavs):
+            raise ValueError("GAVs and filenames quantity does not match")
+
+        if not os.path.isdir(dest_dir):
+            raise ValueError("Destination directory [%s] does not exist" % dest_dir)
+
+        repo = self._get_download_repo(repo)
+
+        with ThreadPoolExecutor(max_workers=workers or self.pool_maxsize) as executor:
+            return dict(zip(gavs, executor.map(
+                lambda x: self.__download_one(x[0], os.path.join(dest_dir, x[1]), repo), zip(gavs, filenames))))
+
+    def __download_one(self, gav, path, repo):
+        """
+        Download single artifact to file for 'download_many'
+        :return dict: download statistics, None if artifact is missing
+        """
+        _started = time.monotonic()
+
+        try:
+            self.cat(gav, repo=repo, binary=True, stream=True, write_to=path)
+        except NexusAPIError as e:
+            if e.code == 404:
+                logging.info("Missing: [%s]", gav)
+                return None
+
+            raise
+        except Exception:
+            # do not leave partially downloaded file
+            if os.path.exists(path):
+                os.remove(path)
+
+            raise
+
+        _seconds = time.monotonic() - _started
+        _size = os.path.getsize(path)
+        _rate = _size / _seconds if _seconds > 0 else float(_size)
+        logging.info("Downloaded: [%s] ==> [%s], %d bytes in %.3f s (%.1f KiB/s)", gav, path, _size, _seconds, _rate / 1024)
+
+        return {"path": path, "size": _size, "seconds": _seconds, "rate": _rate}
+
+    def download(self, gav, path, repo=None, resume=True, segments=1, attempts=3, verify=True):
+        """
+        Downloads artifact to file resuming partial download, see HttpAPI.download_file
+        :param gav: GAV
+        :type gav: str
+        :param path: file path to download to
+        :type path: str
+        :param repo: repository to download from
+        :type repo: str
+        :param resume: continue partially downloaded file
+        :type resume: bool
+        :param segments: number of parallel ranged requests for one artifact
+        :type segments: int
+        :param attempts: number of attempts to continue interrupted transfer
+        :type attempts: int
+        :param verify: compare checksum of file with md5 given by 'info' or ETag header
+        :type verify: bool
+        :return: path downloaded to
+        :return type: str
+        """
+        repo = self._get_download_repo(repo)
+        req = self._gav_sub_url(gav, repo)
+        head = self.download_file(req, path, resume=resume, segments=segments, attempts=attempts)
+
+        if not verify:
+            return path
+
+        _algorithm, _expected = self.__expected_checksum(gav, repo, head, ["sha256", "sha1", "md5"])
+        _hash = hashlib.new(_algorithm)
+
+        if _expected:
+            with open(path, 'rb') as fd:
+                for _chunk in iter(lambda: fd.read(self.chunk_size), b''):
+                    _hash.update(_chunk)
+
+        # do not resume broken file next time
+        self.__check_checksum(gav, head, _algorithm, _expected, _hash.hexdigest(), path)
+        return path
+
+    def __expected_checksum(self, gav, repo, resp, algorithms):
+        """
+        Get checksum recorded by the repository: 'X-Checksum-*' header (Artifactory),
+        md5 from artifact information or ETag header
+        :param str gav: GAV
+        :param str repo: repository
+        :param requests.Response resp: response for artifact
+        :param list algorithms: hashlib algorithm names acceptable
+        :return tuple: (algorithm, checksum), checksum is None if not available
+        """
+        for _algorithm in ["sha256", "sha1", "md5"]:
+            _value = resp.headers.get("X-Checksum-" + _algorithm.capitalize())
+            if _value and _algorithm in algorithms: return _algorithm, _value.lower()
+
+        if "md5" in algorithms:
+            try:
+                _info = self.info(gav, repo=repo)
+            except NexusAPIError as e:
+                logging.debug("Unable to get information for [%s]: %s", gav, e)
+                _info = None
+
+            if _info and _info.get("md5"):
+                return "md5", _info["md5"].lower()
+
+        # Nexus sends ETag as '"{SHA1{...}}"', Artifactory and plain servers send hexadecimal checksum
+        _etag = re.sub(r'^(W/)?"?(\{SHA1\{)?|(\}\})?"?$', '', resp.headers.get("ETag", "")).lower()
+
+        if re.match(r'^[0-9a-f]{32}$', _etag) and "md5" in algorithms: return "md5", _etag
+        if re.match(r'^[0-9a-f]{40}$', _etag) and "sha1" in algorithms: return "sha1", _etag
+
+        return algorithms[-1], None
+
+    def __check_checksum(self, gav, resp, algorithm, expected, actual, path=None):
+        """
+        Compare checksum calculated with the one recorded by the repository
+        :param str gav: GAV
+        :param requests.Response resp: response for artifact
+        :param str algorithm: checksum algorithm
+        :param str expected: checksum recorded by the repository, verification is skipped if None
+        :param str actual: checksum calculated
+        :param path: file path artifact was written to, removed if checksum does not match
+        """
+        if not expected:
+            logging.warning("No checksum available to verify [%s]", gav)
+            return
+
+        if actual == expected:
+            return
+
+        if isinstance(path, strtype) and os.path.exists(path):
+            os.remove(path)
+
+        raise NexusAPIError(0, resp.url, resp, "Checksum mismatch for [%s]: %s expected [%s], got [%s]" % (
+            gav, algorithm, expected, actual))
+
     def exists(self, gav, repo=None, rest_call=False):
         """
         Checks if artifact exists in repo
@@ -327,10 +846,7 @@ class NexusAPI(HttpAPI):
         :type rest_call: bool
         """
         params = parse_gav(gav)
-
-        if not repo: repo = self.__download_repo
-        if not repo: repo = os.getenv(self._env_prefix + self._env_download_repo, self.repo_default)
-        params['r'] = repo
+        params['r'] = self._get_download_repo(repo)
 
         if rest_call and self.is_nexus:
             try:
@@ -341,7 +857,7 @@ class NexusAPI(HttpAPI):
             if r.status_code == 307: return True
             raise self._error(r.status_code, r.url, r, 'Incorrect response code - only 404 and 307 are expected')
         
-        _req = self.__gav_get_url(gav, repo=params['r'])
+        _req = self._gav_sub_url(gav, repo=params['r'])
         try:
             r = self.head(_req)
         except NexusAPIError as e:
@@ -351,9 +867,121 @@ class NexusAPI(HttpAPI):
 
         raise self._error(r.status_code, r.url, r, 'Incorrect response code - only 404 and 200 are expected')
 
-    def upload(self, gav, repo=None, data=None, pom=None, metadata=False):
+    def exists_many(self, gavs, repo=None, concurrency=None, search=False):
+        """
+        Checks if artifacts exist in repo. HEAD requests are sent in parallel re-using pooled connections.
+        :param gavs: GAVs to check
+        :type gavs: list
+        :param repo: repository to search artifacts in
+        :type repo: str
+        :param concurrency: number of parallel requests, connection pool size by default
+        :type concurrency: int
+        :param search: answer with one search request per groupId:artifactId first.
+        :param search: Artifacts not found are checked with HEAD anyway since search index may be outdated
+        :type search: bool
+        :return: existence flag for each GAV, dictionary GAVs are converted to strings for keys
+        :return type: dict
+        """
+        gavs = list(map(lambda x: gav_to_str(x) if isinstance(x, (dict, Gav)) else x, gavs))
+        repo = self._get_download_repo(repo)
+        result = dict()
+
+        if not gavs:
+            return result
+
+        with ThreadPoolExecutor(max_workers=concurrency or self.pool_maxsize) as executor:
+            if search:
+                found = set()
+
+                for _paths in executor.map(lambda x: self.__search_paths(x, repo), self.__search_groups(gavs)):
+                    found.update(_paths)
+
+                for _gav in gavs:
+                    if gav_to_path(_gav) in found:
+                        result[_gav] = True
+
+            _rest = list(filter(lambda x: x not in result, gavs))
+            result.update(zip(_rest, executor.map(lambda x: self.exists(x, repo=repo), _rest)))
+
+        return result
+
+    def __search_groups(self, gavs):
+        """
+        Group GAVs for search: one group per groupId:artifactId, version is included if it is the same for all
+        :param list gavs: GAVs
+        :return list: search parameters for each group
+        """
+        groups = dict()
+
+        for _gav in map(parse_gav, gavs):
+            groups.setdefault((_gav['g'], _gav['a']), set()).add(_gav['v'])
+
+        result = list()
+
+        for (_g, _a), _versions in groups.items():
+            _params = {'g': _g, 'a': _a}
+
+            if len(_versions) == 1:
+                _params['v'] = _versions.pop()
+
+            result.append(_params)
+
+        return result
+
+    def __search_paths(self, params, repo):
+        """
+        Search artifacts and return their repository paths
+        :param dict params: search parameters: 'g', 'a' and optional 'v'
+        :param str repo: repository ID
+        :return set: paths found, empty if search is not available or inconclusive
+        """
+        try:
+            if self.is_nexus:
+                return self.__search_paths_nexus(params, repo)
+
+            if self.is_artifactory:
+                return self.__search_paths_artifactory(params, repo)
+        except NexusAPIError as e:
+            logging.exception(e)
+
+        return set()
+
+    def __search_paths_nexus(self, params, repo):
+        params = params.copy()
+        params['repositoryId'] = repo
+        resp = self.get(posixpath.join("service", "local", "lucene", "search"), params)
+        xml = ElementTree.fromstring(resp.content)
+        result = set()
+
+        # collapsed results do not contain all artifacts, so they prove nothing
+        if xml.findtext('tooManyResults', 'false').strip().lower() == 'true':
+            return result
+
+        for artifact in xml.find('data').findall('artifact'):
+            _gav = {'g': artifact.findtext('groupId'), 'a': artifact.findtext('artifactId'),
+                    'v': artifact.findtext('version')}
+
+            for link in artifact.iter('artifactLink'):
+                _gav['p'] = link.findtext('extension')
+                _gav['c'] = link.findtext('classifier')
+
+                if _gav['p']:
+                    result.add(gav_to_path(_gav))
+
+        return result
+
+    def __search_paths_artifactory(self, params, repo):
+        params = params.copy()
+        params['repos'] = repo
+        resp = self.get(posixpath.join("api", "search", "gavc"), params=params, headers={'X-Result-Detail': 'info'})
+        return set(filter(None, map(lambda x: (x.get('path') or '').strip(posixpath.sep),
+                                    (self.decode_json(resp) or dict()).get('results') or list())))
+
+    def upload(self, gav, repo=None, data=None, pom=None, metadata=False, dedup=False, chunk_size=None, progress=None):
         """ Puts data into maven repo under gav
         pom can be set to actual pom content or to True for automatic pom generation
+        With 'dedup' Artifactory is asked to deploy content by checksum first,
+        so data is sent only if content with the same checksum is not stored yet
         :param gav: GAV
         :type gav: str
         :param repo: repository to upload to
@@ -365,10 +993,15 @@ class NexusAPI(HttpAPI):
         :param metadata: update metadata
         :param metadata: WARNING: this flag is valid for Nexus only and ignored for others
         :type metadata: bool
+        :param dedup: try checksum deploy before uploading data
+        :param dedup: WARNING: this flag is valid for Artifactory only and ignored for others
+        :type dedup: bool
+        :param chunk_size: stream data by chunks of this size, see UploadStream
+        :type chunk_size: int
+        :param progress: stream data calling progress(sent, length) after each chunk, see UploadStream
+        :type progress: callable
         """
-        if not repo: repo = self.__upload_repo
-        if not repo: repo = os.getenv(self._env_prefix + self._env_upload_repo)
-        if not repo: raise (ValueError("You must provide repo name"))
+        repo = self._get_upload_repo(repo)
 
         # Raise exception manually instead of
         # making data mandatory for backwards-compatibility
@@ -381,10 +1014,10 @@ class NexusAPI(HttpAPI):
         #       'repo' may be "repositories/id/sub" or longer. This case we need second component only.
         if repo.startswith('repositories' + posixpath.sep): repo = repo.split(posixpath.sep)[1]
 
-        url = self.__gav_get_url(gav, repo=repo)
+        url = self._gav_sub_url(gav, repo=repo)
         params = parse_gav(gav)
         params['p'] = 'pom'
-        pom_url = self.__gav_get_url(params, repo=repo)
+        pom_url = self._gav_sub_url(params, repo=repo)
 
         # we need 'True' exactly
         if pom is True: 
@@ -394,47 +1027,202 @@ class NexusAPI(HttpAPI):
 
         # uploading generated or provided pom
         if pom: self.put(pom_url, data=pom, headers=custom_headers)
-        resp = self.put(url, data=data, headers=custom_headers)
+
+        if dedup and self.is_artifactory:
+            resp = self.__upload_dedup(url, data, custom_headers, chunk_size, progress)
+        else:
+            resp = self.__upload_put(url, data, custom_headers, chunk_size, progress)
 
         if all([self.is_nexus, pom, metadata]): self.update_metadata(params['g'], repo)
 
         return resp
 
+    def upload_many(self, files, repo=None, pom=True, metadata=False, workers=None, dedup=False):
+        """
+        Uploads artifacts from files concurrently.
+        Existence of POMs to be generated is checked in one batch before uploading,
+        POM and artifact PUTs are sent in parallel, metadata is updated once per groupId at the end.
+        :param files: pairs (GAV, file path) to upload
+        :type files: list
+        :param repo: repository to upload to
+        :type repo: str
+        :param pom: upload auto-generated POMs if they do not exist yet
+        :type pom: bool
+        :param metadata: update metadata for groups POMs were uploaded for
+        :param metadata: WARNING: this flag is valid for Nexus only and ignored for others
+        :type metadata: bool
+        :param workers: number of parallel uploads, connection pool size by default
+        :type workers: int
+        :param dedup: try checksum deploy before uploading data, see 'upload'
+        :type dedup: bool
+        :return: response for each GAV uploaded
+        :return type: dict
+        """
+        repo = self._get_upload_repo(repo)
+        files = list(map(lambda x: (gav_to_str(x[0]) if isinstance(x[0], (dict, Gav)) else x[0], x[1]), files))
+        workers = workers or self.pool_maxsize
+        poms = dict()
+
+        if pom:
+            for _gav, _path in files:
+                _pom = parse_gav(_gav)
+                _pom['p'] = 'pom'
+                poms.setdefault(gav_to_str(_pom), _gav)
+
+            # real POMs given are uploaded instead of generated ones, never along with them
+            _given = set(map(lambda x: gav_to_str(parse_gav(x[0])), files))
+            poms = dict((x, y) for x, y in poms.items() if x not in _given)
+            _exists = self.exists_many(list(poms.keys()), repo=repo, concurrency=workers)
+            poms = dict((x, y) for x, y in poms.items() if not _exists[x])
+
+        _tasks = list(map(lambda x: (x, pom_from_gav(poms[x], no_packaging=True), None), poms.keys())) + \
+                list(map(lambda x: (x[0], None, x[1]), files))
+
+        with self.metadata_batch():
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                _responses = list(executor.map(lambda x: self.__upload_one(x[0], repo, x[1], x[2], dedup), _tasks))
+
+            if metadata:
+                _groups = list(map(lambda x: parse_gav(x)['g'], poms.keys())) + list(map(
+                    lambda x: x['g'], filter(lambda x: x.get('p') == 'pom', map(lambda x: parse_gav(x[0]), files))))
+
+                for _group in dict.fromkeys(_groups):
+                    self.update_metadata(_group, repo)
+
+        return dict(zip(list(map(lambda x: x[0], files)), _responses[len(poms):]))
+
+    def __upload_one(self, gav, repo, data, path, dedup):
+        """
+        Upload single artifact for 'upload_many'
+        :param str gav: GAV
+        :param str repo: repository
+        :param data: data to upload, if 'path' is not set
+        :param str path: file path to upload
+        :param bool dedup: try checksum deploy first
+        :return requests.Response:
+        """
+        if path is None:
+            return self.upload(gav, repo=repo, data=data, dedup=dedup)
+
+        with open(path, 'rb') as fd:
+            resp = self.upload(gav, repo=repo, data=fd, dedup=dedup)
+
+        logging.info("Uploaded: [%s] ==> [%s]", path, gav)
+        return resp
+
+    def __upload_dedup(self, url, data, headers, chunk_size=None, progress=None):
+        """
+        Upload with Artifactory checksum deploy: PUT checksums only, send data if checksum is unknown
+        :param str url: artifact sub-URL
+        :param data: data to upload
+        :param dict headers: request headers
+        :param int chunk_size: chunk size for streaming data
+        :param callable progress: progress callback for streaming data
+        :return requests.Response: response for the last PUT
+        """
+        if isinstance(data, strtype):
+            data = data.encode("utf-8")
+
+        _checksums = self.__data_checksums(data, ["sha1", "sha256"])
+
+        if not _checksums:
+            logging.debug("Checksums can not be calculated for non-seekable data, uploading [%s]", url)
+            return self.__upload_put(url, data, headers, chunk_size, progress)
+
+        headers = dict(headers)
+        headers.update({"X-Checksum-Sha1": _checksums["sha1"], "X-Checksum-Sha256": _checksums["sha256"]})
+
+        try:
+            return self.put(url, headers=dict(list(headers.items()) + [("X-Checksum-Deploy", "true")]))
+        except NexusAPIError as e:
+            # Artifactory returns 404 if there is no content with this checksum
+            if e.code != 404: raise
+
+        logging.debug("Checksum [%s] is unknown, uploading [%s]", _checksums["sha1"], url)
+        return self.__upload_put(url, data, headers, chunk_size, progress)
+
+    def __upload_put(self, url, data, headers, chunk_size=None, progress=None):
+        """
+        PUT data, streaming it if chunk size or progress callback is given
+        """
+        if chunk_size or progress:
+            return self.upload_stream(url, data=data, headers=headers, chunk_size=chunk_size, progress=progress)
+
+        return self.put(url, data=data, headers=headers)
+
+    def __data_checksums(self, data, algorithms):
+        """
+        Calculate checksums of data to upload in a streaming pass
+        :param data: bytes or seekable file-like object, rewound to its initial position after reading
+        :param list algorithms: hashlib algorithm names
+        :return dict: hexadecimal digests, None if data can not be re-read
+        """
+        _hashes = dict((x, hashlib.new(x)) for x in algorithms)
+
+        if isinstance(data, (bytes, bytearray)):
+            list(map(lambda x: x.update(data), _hashes.values()))
+            return dict((x, y.hexdigest()) for x, y in _hashes.items())
+
+        if not all([hasattr(data, "read"), hasattr(data, "seekable"), hasattr(data, "tell")]) or not data.seekable():
+            return None
+
+        _position = data.tell()
+
+        for _chunk in iter(lambda: data.read(self.chunk_size), b''):
+            list(map(lambda x: x.update(_chunk), _hashes.values()))
+
+        data.seek(_position)
+        return dict((x, y.hexdigest()) for x, y in _hashes.items())
+
     def update_metadata(self, gav=None, repo=None):
         """
-        Update metadata in repo for gav
+        Update metadata in repo for gav.
+        Inside 'metadata_batch' the update is deferred until the batch ends.
         :param gav: GAV
         :type gav: str
         :param repo: repository ID
         :type repo: str
+        :return: response for metadata update request, None if deferred or not Nexus
         """
         if not self.is_nexus:
             return None
 
-        if not repo: repo = self.__upload_repo
-        if not repo: repo = os.getenv(self._env_prefix + self._env_upload_repo)
-        if not repo: raise (ValueError("You must provide repo name"))
-
+        repo = self._get_upload_repo(repo)
         _req = posixpath.join("service", "local", "metadata", "repositories", repo, 'content')
         
         if gav:
             _req = posixpath.join(_req, gav_to_path(gav, relaxed=True))
 
-        return self.delete(_req)
-
-    def __check_filter(self, str_artifact, str_filter, b_filter_revert):
-        if not str_filter:
-            return True
+        with self.__metadata_lock:
+            if self.__metadata_depth:
+                if _req not in self.__metadata_pending: self.__metadata_pending.append(_req)
+                return None
 
-        re_filter = re.compile(r'' + str_filter)
+        return self.delete(_req)
 
-        if (not b_filter_revert) and (re_filter.search(str_artifact) is not None):
-            return True
+    @contextmanager
+    def metadata_batch(self):
+        """
+        Context manager coalescing metadata updates: 'update_metadata' calls inside it are collected
+        and one request per unique repository and group is sent when the outermost batch ends,
+        even if it ends with an exception since artifacts uploaded need their metadata anyway.
+        Usage:
+            with api.metadata_batch():
+                for gav in gavs: api.upload(gav, data=..., pom=True, metadata=True)
+        """
+        with self.__metadata_lock:
+            self.__metadata_depth += 1
 
-        if (b_filter_revert) and (re_filter.search(str_artifact) is None):
-            return True
+        try:
+            yield self
+        finally:
+            with self.__metadata_lock:
+                self.__metadata_depth -= 1
+                _pending = list() if self.__metadata_depth else self.__metadata_pending
+                if not self.__metadata_depth: self.__metadata_pending = list()
 
-        return False
+            for _req in _pending:
+                self.delete(_req)
 
     #TODO: replace 'filter' keyword argument - it is RESERVED in recent Python interpreters
     def ls(self, gav, repo=None, filter=None, filter_revert=False):
@@ -444,15 +1232,242 @@ class NexusAPI(HttpAPI):
         :tytpe gav: str
         :param repo: repository ID
         :type repo: str
-        :param filter: filter for artifacts
-        :type filter: dict
+        :param filter: filter for artifacts: regular expression, glob pattern, callable or their list, see ArtifactFilter
+        :type filter: str, list, callable, ArtifactFilter
+        :param filter_revert: exclude artifacts matching filter instead of including them
+        :type filter_revert: bool
+
+        Artifactory is listed with AQL if 'artifactory_aql' is set: filters by repository, GAV parts and
+        extension are applied on server side and results are requested page-by-page.
+        """
+        artifact_filter = make_filter(filter, filter_revert)
+
+        if self.is_nexus: return self.__ls_nexus(gav, repo, artifact_filter)
+        if self.is_artifactory and self.artifactory_aql: return list(self.__iter_ls_aql(gav, repo, artifact_filter,
+                                                                                        self.search_page_size))
+        if self.is_artifactory: return self.__ls_artifactory(gav, repo, artifact_filter)
+        raise NotImplementedError("Not implemented for '%s'" % posixpath.basename(self.root.rstrip(posixpath.sep)))
+
+    def iter_ls(self, gav, repo=None, filter=None, filter_revert=False, page_size=None):
+        """
+        Generator version of 'ls': artifacts are yielded as search results arrive,
+        so processing may start before listing finishes.
+        Nexus search results are requested page-by-page and parsed incrementally,
+        memory used does not depend on the number of artifacts found.
+        NexusAPIError is raised if Nexus refuses to list results since there are too many of them.
+        :param gav: gav to search for, may be regular expression
+        :type gav: str
+        :param repo: repository ID
+        :type repo: str
+        :param filter: filter for artifacts, see 'ls'
+        :type filter: str, list, callable, ArtifactFilter
+        :param filter_revert: exclude artifacts matching filter instead of including them
+        :type filter_revert: bool
+        :param page_size: number of artifacts per search page ('search_page_size' by default)
+        :type page_size: int
+        :return: artifacts GAVs
+        :return type: generator
         """
-        if self.is_nexus: return self.__ls_nexus(gav, repo=repo, filter=filter, filter_revert=filter_revert)
-        if self.is_artifactory: return self.__ls_artifactory(gav, repo=repo, filter=filter, filter_revert=filter_revert)
+        artifact_filter = make_filter(filter, filter_revert)
+
+        if self.is_nexus: return self.__iter_ls_nexus(gav, repo, artifact_filter, page_size or self.search_page_size)
+        if self.is_artifactory and self.artifactory_aql: return self.__iter_ls_aql(gav, repo, artifact_filter,
+                                                                                   page_size or self.search_page_size)
+        if self.is_artifactory: return iter(self.__ls_artifactory(gav, repo, artifact_filter))
         raise NotImplementedError("Not implemented for '%s'" % posixpath.basename(self.root.rstrip(posixpath.sep)))
 
+    def __iter_ls_nexus(self, gav, repo, artifact_filter, page_size):
+        g_s = parse_gav(gav, relaxed=True)
+        g_p = dict((x, g_s[x]) for x in ['g', 'a', 'v', 'c'] if g_s.get(x))
+
+        if repo:
+            g_p['repositoryId'] = repo
+
+        if not g_s.get('a'):
+            # search without artifactId gives incomplete hits, so list each artifactId found separately
+            ls_artif = list(dict.fromkeys(map(lambda x: x.find('artifactId').text, self.__iter_search_nexus(g_p, page_size))))
+
+            for str_art in ls_artif:
+                for _gav in self.__iter_ls_nexus(':'.join([g_s.get('g'), str_art, g_s.get('v', ""), g_s.get('p', ""),
+                                                           g_s.get('c', "")]), repo, artifact_filter, page_size):
+                    yield _gav
+
+            return
+
+        found = list()
+        candidates = list()
+
+        for artifact in self.__iter_search_nexus(g_p, page_size):
+            _found, _candidates = self.__ls_nexus_artifact(artifact, g_s, repo, artifact_filter)
+            found += list(dict.fromkeys(_found))
+            candidates += list(dict.fromkeys(x for x in _candidates if x not in _found))
+
+            if len(found) + len(candidates) < page_size:
+                continue
+
+            for _gav in self.__ls_verified(found, candidates, repo):
+                yield _gav
+
+            found, candidates = list(), list()
+
+        for _gav in self.__ls_verified(found, candidates, repo):
+            yield _gav
+
+    def __ls_verified(self, found, candidates, repo):
+        """
+        Artifacts proven by search followed by candidates verified in one concurrent batch
+        """
+        _exists = self.exists_many(candidates, repo=repo)
+        return found + list(x for x in candidates if _exists[x])
+
+    def __iter_search_nexus(self, params, page_size):
+        """
+        Iterate over 'artifact' elements of lucene search response page-by-page.
+        Each page is parsed incrementally and elements processed are dropped.
+        :param dict params: search parameters
+        :param int page_size: number of artifacts per page
+        :return: artifact elements
+        :return type: generator
+        """
+        _from = 0
+
+        while True:
+            resp = self.get(posixpath.join("service", "local", "lucene", "search"),
+                            dict(params, **{'from': _from, 'count': page_size}), stream=True)
+            _count = 0
+            _total = None
+            _data = None
+            _too_many = False
+
+            # streamed response keeps pooled connection until closed, also if consumer stops early
+            try:
+                for _event, _element in ElementTree.iterparse(self.__response_stream(resp), events=('start', 'end')):
+                    if _event == 'start':
+                        if _element.tag == 'data': _data = _element
+                        continue
+
+                    if _element.tag == 'totalCount' and _element.text:
+                        _total = int(_element.text)
+                    elif _element.tag == 'tooManyResults':
+                        _too_many = (_element.text or '').strip().lower() == 'true'
+                    elif _element.tag == 'artifact' and _data is not None:
+                        _count += 1
+                        yield _element
+                        _data.remove(_element)
+            finally:
+                resp.close()
+
+            # search refused to list anything: empty result would be a lie
+            if _too_many and not _count:
+                raise NexusAPIError(resp.status_code, resp.url, resp,
+                                    "Too many search results for %s, narrow the query" % params)
+
+            _from += _count
+
+            if _count < page_size or (_total is not None and _from >= _total):
+                return
+
+    def __response_stream(self, resp):
+        """
+        File-like object to read response body from, raw stream is used for streamed responses
+        """
+        raw = getattr(resp, 'raw', None)
+
+        if raw is None or not hasattr(raw, 'read'):
+            return io.BytesIO(resp.content)
+
+        raw.decode_content = True
+        return raw
+
+    def __iter_ls_aql(self, gav, repo, artifact_filter, page_size):
+        """
+        List Artifactory with AQL, falls back to GAVC search if AQL is not permitted
+        """
+        parsed_gav = parse_gav(gav, relaxed=True)
+        query = self.__aql_query(parsed_gav, repo)
+        found = set()
+        offset = 0
+
+        while True:
+            try:
+                resp = self.post(posixpath.join("api", "search", "aql"),
+                                 data='%s.offset(%d).limit(%d)' % (query, offset, page_size),
+                                 headers={'Content-Type': 'text/plain'})
+            except NexusAPIError as e:
+                if offset or e.code not in [400, 401, 403]: raise
+
+                # AQL is available for authenticated users only by default
+                logging.warning("AQL search is not available, falling back to GAVC search: %s", e)
+
+                for _gav in self.__ls_artifactory(gav, repo, artifact_filter):
+                    yield _gav
+
+                return
+
+            results = self.decode_json(resp).get('results') or list()
+
+            for item in results:
+                try:
+                    artifact_gav_dict = gav_from_path(posixpath.join(item.get('path'), item.get('name')))
+                except (IndexError, TypeError):
+                    continue
+
+                # server-side patterns are wider than GAV parts
+                if not all(map(lambda x: self.__gav_part_matches(parsed_gav.get(x), artifact_gav_dict.get(x)),
+                               ['g', 'a', 'v', 'p', 'c'])):
+                    continue
+
+                generated_gav = gav_to_str(artifact_gav_dict)
+
+                if generated_gav in found or not artifact_filter(generated_gav):
+                    continue
+
+                found.add(generated_gav)
+                yield generated_gav
+
+            if len(results) < page_size:
+                return
+
+            offset += page_size
+
+    def __gav_part_matches(self, pattern, value):
+        """
+        Check GAV part found against the one searched for, '*' wildcards are accepted as GAVC search does
+        :param str pattern: GAV part searched for, anything matches if not set
+        :param str value: GAV part found
+        :return bool:
+        """
+        if not pattern:
+            return True
+
+        if '*' in pattern:
+            return fnmatch.fnmatchcase(value or '', pattern)
+
+        return pattern == value
+
+    def __aql_query(self, parsed_gav, repo):
+        """
+        Build AQL query for artifacts files matching GAV parts given, POMs are excluded
+        :param dict parsed_gav: relaxed-parsed GAV
+        :param str repo: repository, all repositories if not set
+        :return str: query without offset and limit
+        """
+        path = posixpath.join(
+            parsed_gav['g'].replace('.', posixpath.sep) if parsed_gav.get('g') else '*',
+            parsed_gav.get('a') or '*', parsed_gav.get('v') or '*')
+        name = '%s-%s%s.%s' % (parsed_gav.get('a') or '*', parsed_gav.get('v') or '*',
+                               '-' + parsed_gav['c'] if parsed_gav.get('c') else '*', parsed_gav.get('p') or '*')
+        criteria = [{"type": "file"}, {"path": {"$match": path}}, {"name": {"$match": name}},
+                    {"name": {"$nmatch": "*.pom"}}]
+
+        if repo:
+            criteria.insert(0, {"repo": repo})
+
+        return 'items.find(%s).include("repo", "path", "name").sort({"$asc": ["repo", "path", "name"]})' % json.dumps(
+            {"$and": criteria})
+
     # the same for specific systems
-    def __ls_artifactory(self, gav, repo=None, filter=None, filter_revert=False):
+    def __ls_artifactory(self, gav, repo, artifact_filter):
         parsed_gav = parse_gav(gav, relaxed=True)
         search_parameters = parsed_gav.copy()
 
@@ -471,7 +1486,7 @@ class NexusAPI(HttpAPI):
         # we need to return empty list if we found nothing
         try:
             resp = self.get(_req, params=search_parameters, headers={'X-Result-Detail': 'info'})
-            resp = resp.json()
+            resp = self.decode_json(resp)
             resp = resp.get('results')
         except NexusAPIError as e:
             if e.code != 404:
@@ -500,20 +1515,51 @@ class NexusAPI(HttpAPI):
                 continue
 
             # check our artifact for filter
-            generated_gav = gav_from_path(artifact.get('path'), dictionary=False)
+            generated_gav = gav_to_str(artifact_gav_dict)
             
-            if self.__check_filter(generated_gav, filter, filter_revert):
+            if artifact_filter(generated_gav):
                 artifacts.append(generated_gav)
 
         return list(set(artifacts))
 
-    def __ls_nexus(self, gav, repo=None, filter=None, filter_revert=False):
+    def __ls_nexus(self, gav, repo, artifact_filter):
+        """
+        List artifacts level by level: GAV given first, then each artifactId found if it was not specified.
+        One bounded pool runs the searches of a level and its candidates are verified with one 'exists_many' call,
+        so the number of threads does not grow with recursion
+        """
+        artifacts = set()
+        level = [gav]
+
+        with ThreadPoolExecutor(max_workers=self.pool_maxsize) as executor:
+            while level:
+                candidates = list()
+                next_level = list()
+
+                # phase one: collect artifacts proven by search hits and candidates to be verified
+                for _found, _candidates, _children in executor.map(
+                        lambda x: self.__ls_nexus_search(x, repo, artifact_filter), level):
+                    artifacts.update(_found)
+                    candidates += _candidates
+                    next_level += _children
+
+                # phase two: verify all candidates of the level in one concurrent batch
+                candidates = list(dict.fromkeys(x for x in candidates if x not in artifacts))
+                artifacts.update(x for x, y in self.exists_many(candidates, repo=repo).items() if y)
+                level = list(dict.fromkeys(next_level))
+
+        return list(artifacts)
+
+    def __ls_nexus_search(self, gav, repo, artifact_filter):
+        """
+        Search one GAV with lucene search
+        :param str gav: GAV, may be partial
+        :param str repo: repository ID
+        :return tuple: (GAVs proven by search hits, GAVs to be verified with HEAD, GAVs to search for each artifactId
+            found if artifactId was not specified)
+        """
         g_s = parse_gav(gav, relaxed=True)
         g_p = dict()
-        ls_artif = None
-
-        if not g_s.get('a'):
-            ls_artif = list()
 
         # Filter values of parsed GAV for Lucene Search search Nexus plugin
         # Packaging is to be excluded due to that plugin "feature"
@@ -526,86 +1572,96 @@ class NexusAPI(HttpAPI):
 
         resp = self.get(posixpath.join("service", "local", "lucene", "search"), g_p)
         xml = ElementTree.fromstring(resp.content)
-        artifacts = []
+        found = list()
+        candidates = list()
+        ls_artif = list()
+
         for artifact in xml.find('data').findall('artifact'):
-            for hit in artifact.find('artifactHits').findall('artifactHit'):
-                b_ext_found = False
-                if not 'p' in g_s:
-                    b_ext_found = True; # do not search if we was not asked for it
+            _found, _candidates = self.__ls_nexus_artifact(artifact, g_s, repo, artifact_filter)
+            found += _found
+            candidates += _candidates
 
-                for ext_t in hit.find('artifactLinks').findall('artifactLink'):
-                    ext = ext_t.find('extension')
+            if not g_s.get('a') and artifact.find('artifactId').text not in ls_artif:
+                ls_artif.append(artifact.find('artifactId').text)
 
-                    if (ext is not None and ext.text == 'pom'):
-                        continue
+        # here we may not use gav_to_str since
+        # we need empty values for some attributes,
+        # but gav_to_str silently skips them
+        # or raises undesirable exception
+        ls_gavs = list(map(lambda x: ':'.join([
+            g_s.get('g'), x, g_s.get('v', ""), g_s.get('p', ""), g_s.get('c', "")]), ls_artif))
 
-                    clsf = ext_t.find('classifier')
-                    str_artifact_full = gav_to_str({
-                        'g': artifact.find('groupId').text,
-                        'a': artifact.find('artifactId').text,
-                        'v': artifact.find('version').text,
-                        'p': ext.text if ext is not None else None,
-                        'c': clsf.text if clsf is not None else None})
-
-                    __unused, str_artifact = str_artifact_full.split(':', 1)
-                    
-                    if not self.__check_filter(str_artifact, filter, filter_revert):
-                        continue
+        return found, candidates, ls_gavs
 
-                    if not g_s.get('p'):
-                        if str_artifact_full not in artifacts \
-                                and self.exists(str_artifact_full, repo=repo):
-                            artifacts.append(str_artifact_full)
+    def __ls_nexus_artifact(self, artifact, g_s, repo, artifact_filter):
+        """
+        Collect artifacts from one 'artifact' element of lucene search response
+        :param xml.etree.ElementTree.Element artifact: search response element
+        :param dict g_s: parsed GAV searched for
+        :param str repo: repository ID
+        :return tuple: (GAVs proven by search hits, GAVs to be verified with HEAD)
+        """
+        found = list()
+        candidates = list()
 
-                        continue
+        for hit in artifact.find('artifactHits').findall('artifactHit'):
+            # search hit from the repository requested proves the file exists there,
+            # otherwise it has to be checked in the repository artifacts are downloaded from
+            hit_repo = hit.find('repositoryId')
+            b_proven = all([repo, hit_repo is not None and hit_repo.text == repo])
+            b_ext_found = False
+            if not 'p' in g_s:
+                b_ext_found = True; # do not search if we was not asked for it
 
-                    if ext is not None and g_s.get('p') != ext.text:
-                        continue
+            for ext_t in hit.find('artifactLinks').findall('artifactLink'):
+                ext = ext_t.find('extension')
 
-                    b_ext_found = bool(ext is not None and ext.text)
+                if (ext is not None and ext.text == 'pom'):
+                    continue
 
-                    if str_artifact_full not in artifacts:
-                        artifacts.append(str_artifact_full)
+                clsf = ext_t.find('classifier')
+                str_artifact_full = gav_to_str({
+                    'g': artifact.find('groupId').text,
+                    'a': artifact.find('artifactId').text,
+                    'v': artifact.find('version').text,
+                    'p': ext.text if ext is not None else None,
+                    'c': clsf.text if clsf is not None else None})
 
-                if not b_ext_found:
-                    # produce fake gav and check if exist
-                    str_artifact_full = gav_to_str({
-                        'g': artifact.find('groupId').text,
-                        'a': artifact.find('artifactId').text,
-                        'v': artifact.find('version').text,
-                        'p': g_s.get('p'),
-                        'c': g_s.get('c')})
+                __unused, str_artifact = str_artifact_full.split(':', 1)
+                
+                if not artifact_filter(str_artifact):
+                    continue
 
-                    if str_artifact_full in artifacts:
-                        continue
+                if not g_s.get('p'):
+                    (found if b_proven else candidates).append(str_artifact_full)
+                    continue
 
-                    __unused, str_artifact = str_artifact_full.split(':', 1)
+                if ext is not None and g_s.get('p') != ext.text:
+                    continue
 
-                    if not self.__check_filter(str_artifact, filter, filter_revert):
-                        continue
+                b_ext_found = bool(ext is not None and ext.text)
+                found.append(str_artifact_full)
 
-                    if self.exists(str_artifact_full):
-                        artifacts.append(str_artifact_full)
+            if not b_ext_found:
+                # produce fake gav and check if exist
+                str_artifact_full = gav_to_str({
+                    'g': artifact.find('groupId').text,
+                    'a': artifact.find('artifactId').text,
+                    'v': artifact.find('version').text,
+                    'p': g_s.get('p'),
+                    'c': g_s.get('c')})
 
-            if ls_artif is not None and artifact.find('artifactId').text not in ls_artif:
-                ls_artif.append(artifact.find('artifactId').text)
+                if str_artifact_full in found:
+                    continue
 
-        if ls_artif is not None:
-            for str_art in ls_artif:
-                # here we may not use gav_to_str since
-                # we need empty values for some attributes, 
-                # but gav_to_str silently skips them
-                # or raises undesirable exception
-                str_gav_c = ':'.join([
-                    g_s.get('g'), 
-                    str_art,
-                    g_s.get('v', ""),
-                    g_s.get('p', ""),
-                    g_s.get('c', "")])
-
-                artifacts += self.__ls_nexus(str_gav_c, repo, filter, filter_revert)
+                __unused, str_artifact = str_artifact_full.split(':', 1)
 
-        return list(set(artifacts))
+                if not artifact_filter(str_artifact):
+                    continue
+
+                candidates.append(str_artifact_full)
+
+        return found, candidates
 
     def info(self, gav, repo=None):
         """
@@ -623,9 +1679,35 @@ class NexusAPI(HttpAPI):
         if self.is_artifactory: return self.__info_artifactory(gav, repo=repo)
         raise NotImplementedError("Not implemented for '%s'" % posixpath.basename(self.root.rstrip(posixpath.sep)))
 
+    def _info_request(self, gav, repo):
+        """
+        Request and its parameters to get artifact information
+        :param gav: GAV
+        :param str repo: repository ID
+        :return tuple: (request, parameters)
+        """
+        if self.is_nexus:
+            return posixpath.join("service", "local", "repositories", repo, "content", gav_to_path(gav)), {"describe": "info"}
+
+        return posixpath.join("api", "storage", repo, gav_to_path(gav)), None
+
+    def _info_parse(self, http_resp):
+        """
+        Parse artifact information response
+        :param requests.Response http_resp: response for '_info_request'
+        :return dict: artifact information: md5sum, mime-type, None if not available
+        """
+        if not http_resp or not http_resp.content:
+            return None
+
+        if self.is_nexus:
+            return self.__info_parse_nexus(http_resp)
+
+        return self.__info_parse_artifactory(http_resp)
+
     ### the same as general info for different systems
     def __info_artifactory(self, gav, repo):
-        _req = posixpath.join("api", "storage", repo, gav_to_path(gav))
+        _req, _params = self._info_request(gav, repo)
 
         try:
             http_resp = self.get(_req)
@@ -637,10 +1719,10 @@ class NexusAPI(HttpAPI):
 
             return None
 
-        if not http_resp or not http_resp.content:
-            return None
+        return self._info_parse(http_resp)
 
-        response_json = http_resp.json()
+    def __info_parse_artifactory(self, http_resp):
+        response_json = self.decode_json(http_resp)
 
         if response_json is None:
             return None
@@ -656,13 +1738,11 @@ class NexusAPI(HttpAPI):
         return {"md5": artifact_md5, "mime": artifact_mime}
 
     def __info_nexus(self, gav, repo):
-        str_path = posixpath.join("service", "local", "repositories", repo, "content", gav_to_path(gav))
-        dict_parms = {"describe" : "info"}
+        str_path, dict_parms = self._info_request(gav, repo)
         http_resp = self.get(str_path, dict_parms)
+        return self._info_parse(http_resp)
 
-        if not http_resp or not http_resp.content:
-            return None
-
+    def __info_parse_nexus(self, http_resp):
         obj_xml = ElementTree.fromstring(http_resp.content)
 
         # NOTE: xml.etree.ElementTree drops warning if simple 'not obj_xml' is used
@@ -687,14 +1767,103 @@ class NexusAPI(HttpAPI):
         :return: Response, response for delete request
         """
 
-        if not repo:
-            repo = self.__upload_repo
-        if not repo:
-            repo = os.getenv(self._env_prefix + self._env_upload_repo)
-        if not repo:
-            raise (ValueError("You must provide repo name"))
-
-        _req = self.__gav_get_url(gav, repo=repo, relaxed=True)
+        repo = self._get_upload_repo(repo)
+        _req = self._gav_sub_url(gav, repo=repo, relaxed=True)
 
         return self.delete(_req)
 
+
+class AsyncNexusAPI(AsyncHttpAPI):
+    """
+    Asynchronous variant of NexusAPI.
+    'cat', 'exists' and 'info' send requests natively with aiohttp backend,
+    'ls' and 'upload' are always offloaded to the thread pool.
+    Synchronous NexusAPI sharing the same session is available as 'sync' attribute for everything else.
+    """
+    _error = NexusAPIError
+    _env_prefix = NexusAPI._env_prefix
+    read_timeout = NexusAPI.read_timeout
+
+    def __init__(self, root=None, user=None, auth=None, readonly=False, anonymous=False,
+                 upload_repo=None, download_repo=None, backend=None, **kvarg):
+        """
+        :param str backend: 'aiohttp' or 'thread', see AsyncHttpAPI
+        See NexusAPI for other arguments
+        """
+        super(AsyncNexusAPI, self).__init__(root, user, auth, readonly, anonymous, backend=backend, **kvarg)
+        self.sync = NexusAPI(self.root, user, auth, readonly, anonymous,
+                             upload_repo=upload_repo, download_repo=download_repo, **kvarg)
+        # share connection pool with synchronous twin
+        self.sync.web = self.web
+
+    @property
+    def _native(self):
+        return self.backend == self.backend_aiohttp
+
+    async def cat(self, gav, repo=None, binary=False, response=False, stream=False, encoding=None, enc_errors=None,
+                  write_to=None, rest_call=False, verify=False, **argv):
+        """
+        Gets data from maven repo, see NexusAPI.cat
+        """
+        if not self._native or (rest_call and self.sync.is_nexus) or verify:
+            return await self._offload(
+                self.sync.cat, gav, repo=repo, binary=binary, response=response, stream=stream, encoding=encoding,
+                enc_errors=enc_errors, write_to=write_to, rest_call=rest_call, verify=verify, **argv)
+
+        parse_gav(gav)
+        r = await self.get(self.sync._gav_sub_url(gav, repo=self.sync._get_download_repo(repo)),
+                           stream=stream, write_to=write_to, **argv)
+
+        return self.sync._cat_result(r, binary=binary, response=response, encoding=encoding,
+                                     enc_errors=enc_errors, write_to=write_to)
+
+    async def exists(self, gav, repo=None, rest_call=False):
+        """
+        Checks if artifact exists in repo, see NexusAPI.exists
+        """
+        if not self._native or (rest_call and self.sync.is_nexus):
+            return await self._offload(self.sync.exists, gav, repo=repo, rest_call=rest_call)
+
+        parse_gav(gav)
+
+        try:
+            r = await self.head(self.sync._gav_sub_url(gav, repo=self.sync._get_download_repo(repo)))
+        except NexusAPIError as e:
+            if e.code == 404: return False
+            raise (e)
+
+        if r.status_code == 200: return True
+
+        raise self._error(r.status_code, r.url, r, 'Incorrect response code - only 404 and 200 are expected')
+
+    async def info(self, gav, repo=None):
+        """
+        Get md5 checksum and mime-type for a gav, see NexusAPI.info
+        """
+        if not self._native or not any([self.sync.is_nexus, self.sync.is_artifactory]):
+            return await self._offload(self.sync.info, gav, repo=repo)
+
+        if not repo: repo = self.sync.repo_default
+        _req, _params = self.sync._info_request(gav, repo)
+
+        try:
+            http_resp = await self.get(_req, _params)
+        except NexusAPIError as e:
+            # Artifactory returns 404 if information is not available, Nexus errors are raised as is
+            if self.sync.is_nexus: raise (e)
+            if e.code != 404: logging.exception(e)
+            return None
+
+        return self.sync._info_parse(http_resp)
+
+    async def ls(self, gav, repo=None, filter=None, filter_revert=False):
+        """
+        List of artifacts suitable for filter in repository given, see NexusAPI.ls
+        """
+        return await self._offload(self.sync.ls, gav, repo=repo, filter=filter, filter_revert=filter_revert)
+
+    async def upload(self, gav, repo=None, data=None, pom=None, metadata=False):
+        """
+        Puts data into maven repo under gav, see NexusAPI.upload
+        """
+        return await self._offload(self.sync.upload, gav, repo=repo, data=data, pom=pom, metadata=metadata)
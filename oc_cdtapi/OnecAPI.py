@@ -67,7 +67,7 @@ class OnecAPI(HttpAPI):
             else:
                 error_msg = (
                     f"Client request failed with status {response.status_code}. "
-                    f"Response: {response.json()}"
+                    f"Response: {self.decode_json(response)}"
                 )
                 logging.warning(error_msg)
                 return None, error_msg
@@ -101,13 +101,35 @@ class OnecAPI(HttpAPI):
         
         try:
             response = self.get('clientLicenses', params={"client": query_params})
-            return response.json(), None
+            return self.decode_json(response), None
             
         except HttpAPIError as e:
             error_msg = f"Error communicating with 1C API: {e}"
             logging.error(error_msg)
             return None, error_msg
     
+    def iter_clients_licenses(self, clients=None):
+        """
+        Iterate over license information for specified clients without loading
+        the whole list to memory, see get_clients_licenses.
+        
+        Args:
+            clients: Optional list of client codes. If None or exceeds 100 clients,
+                    iterates over all licenses.
+        
+        Returns:
+            Generator of license dictionaries, decoded one by one while the
+            response is being received.
+        
+        Raises:
+            OnecError: On failure to communicate with 1C API, on first iteration.
+        """
+        logging.debug("Iterating client licenses for %s clients", 
+                    len(clients) if clients else "all")
+        
+        query_params = self._build_license_query_params(clients)
+        return self.iter_json('clientLicenses', path='item', params={"client": query_params})
+    
     def get_licenses_codes(self, client_code=None):
         """
         Retrieve active license codes for a specific client.
@@ -139,7 +161,7 @@ class OnecAPI(HttpAPI):
             response = self.get('components', params={"client": client_code})
             
             if response.status_code == 200:
-                licenses = response.json()
+                licenses = self.decode_json(response)
                 license_codes = [
                     license["code"] 
                     for license in licenses 
@@ -210,7 +232,7 @@ class OnecAPI(HttpAPI):
             Tuple of (parsed_clients, error_message)
         """
         try:
-            clients_data = response.json()
+            clients_data = self.decode_json(response)
             
             sorted_clients = sorted(clients_data, key=itemgetter('code'))
             logging.debug("Successfully retrieved %d clients", len(sorted_clients))
@@ -219,7 +241,7 @@ class OnecAPI(HttpAPI):
         except KeyError as e:
             error_msg = (
                 f"Corrupted client data from 1C - missing 'code' field: "
-                f"{response.json()}"
+                f"{self.decode_json(response)}"
             )
             logging.error(error_msg)
             return None, error_msg
@@ -8,6 +8,9 @@ from oc_cdtapi.API import HttpAPIError
 class PostgresAPI(API.HttpAPI):
     _env_prefix = 'PSQL'
     _env_token = 'TOKEN'
+    # CI types barely change, cached if cache backend is given
+    cache_ttls = {r'^rest/api/1/citype/': 3600}
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -34,7 +37,7 @@ class PostgresAPI(API.HttpAPI):
             'CP456'
         """
         req = f"rest/api/1/citypedms/{citype}"
-        res = self.get(req).json()
+        res = self.decode_json(self.get(req))
         logging.debug(f'Using get_citypedms_by_citype_id to get information about {citype}')
 
         return res
@@ -65,7 +68,7 @@ class PostgresAPI(API.HttpAPI):
         res = self.get(req)
         logging.debug(f'Using get_citypedms_by_dms_id to get information about {dms_id}')
 
-        return res.json()
+        return self.decode_json(res)
 
     def get_ci_type_by_code(self, request):
         """
@@ -98,7 +101,7 @@ class PostgresAPI(API.HttpAPI):
         res = self.get(req)
         logging.debug(f'Using get_ci_type_by_code to get information about citype with code {request}')
 
-        return res.json()
+        return self.decode_json(res)
 
     def get_deliveries(self, request):
         """
@@ -127,7 +130,30 @@ class PostgresAPI(API.HttpAPI):
         res = self.get(req, params=request)
         logging.debug(f'Using get_delivery_by_gav to get information about delivery with {request}')
 
-        return res.json()
+        return self.decode_json(res)
+
+    def iter_deliveries(self, request):
+        """
+        Iterate over deliveries matching the search criteria.
+
+        Same as get_deliveries, but deliveries are decoded one by one while the response
+        is being received, so memory used does not depend on the number of deliveries.
+
+        Args:
+            request (dict): A dictionary containing search parameters, see get_deliveries.
+
+        Returns:
+            generator: Delivery objects matching the search criteria.
+
+        Example:
+            >>> request = {'flag_approved': True}
+            >>> for delivery in api.iter_deliveries(request):
+            ...     print(delivery['gav'])
+        """
+        req = f"rest/api/1/deliveries"
+        logging.debug(f'Using iter_deliveries to get information about deliveries with {request}')
+
+        return self.iter_json(req, path='item', params=request)
 
     def get_historicaldelivery(self, request):
         """
@@ -156,7 +182,7 @@ class PostgresAPI(API.HttpAPI):
         res = self.get(req, params=request)
         logging.debug(f'Using get_historicaldelivery to get information about {request}')
 
-        return res.json()
+        return self.decode_json(res)
 
     def update_delivery_by_gav(self, gav, json):
         """
@@ -318,7 +344,7 @@ class PostgresAPI(API.HttpAPI):
             else:
                 raise HttpAPIError(e)
 
-        return res.json()[0]
+        return self.decode_json(res)[0]
 
     def get_task_by_id_and_username(self, task_id, username):
         """
@@ -348,7 +374,7 @@ class PostgresAPI(API.HttpAPI):
             else:
                 raise HttpAPIError(e)
 
-        return res.json()[0]
+        return self.decode_json(res)[0]
 
     def get_task_custom_filter(self, **kwargs):
         """
@@ -378,7 +404,35 @@ class PostgresAPI(API.HttpAPI):
             else:
                 raise HttpAPIError(e)
 
-        return res.json()
+        return self.decode_json(res)
+    
+    def iter_task_custom_filter(self, **kwargs):
+        """
+        Iterate over tasks matching custom filter.
+
+        Same as get_task_custom_filter, but tasks are decoded one by one while the response
+        is being received, so memory used does not depend on the number of tasks.
+
+        Args:
+            **kwargs : Keyword arguments for filtering.
+
+        Returns:
+            generator: Tasks matching the filter, nothing if none found.
+
+        Example:
+            >>> param = {"owner": "username"}
+            >>> for task in api.iter_task_custom_filter(**param):
+            ...     print(task['id'])
+            1
+        """
+        req = f"rest/api/1/tasks"
+
+        try:
+            for task in self.iter_json(req, path='item', params=kwargs):
+                yield task
+        except HttpAPIError as e:
+            if e.code != 404:
+                raise
     
     def get_clients_list(self):
         """
@@ -413,8 +467,28 @@ class PostgresAPI(API.HttpAPI):
         req = "rest/api/1/clients"
         res = self.get(req)
 
-        return res.json()
+        return self.decode_json(res)
 
+    def iter_clients_list(self):
+        """
+        Iterate over clients list.
+
+        Same as get_clients_list, but clients are decoded one by one while the response
+        is being received, so memory used does not depend on the number of clients.
+
+        Returns:
+            generator: Client dictionaries including the ftp upload option.
+
+        Example:
+            >>> for client in self.iter_clients_list():
+            ...     print(client['code'])
+            _TEST_1
+            _TEST_2
+        """
+        req = "rest/api/1/clients"
+
+        return self.iter_json(req, path='item')
+    
     def get_client_by_code(self, code):
         """
         Get a client by code.
@@ -436,7 +510,7 @@ class PostgresAPI(API.HttpAPI):
         req = f"rest/api/1/clients/{code}"
         res = self.get(req)
 
-        return res.json()
+        return self.decode_json(res)
 
     def post_new_component(self, payload):
         """
@@ -468,6 +542,8 @@ class PostgresAPI(API.HttpAPI):
         req = f"rest/api/1/manage_citype"
         res = self.post(req, json=payload)
         logging.debug(f'Using post_manage_citype to register new component')
+        # CI types are changed by another endpoint, so cached ones are not invalidated by POST itself
+        self.cache_invalidate("rest/api/1/citype")
 
         return res
 
@@ -498,4 +574,4 @@ class PostgresAPI(API.HttpAPI):
         req = f"rest/api/1/clients/{quote(code, safe='')}/distributions"
         res = self.get(req, params={'citype': citype})
 
-        return res.json()
+        return self.decode_json(res)
@@ -18,7 +18,7 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 import requests.status_codes
 
 class RundeckAPI(HttpAPI):
-    def __init__(self, url, user=None, password=None, token=None):
+    def __init__(self, url, user=None, password=None, token=None, **kwargs):
         """
         Basic initialization.
         Authorization may be with user/password pair or token
@@ -26,6 +26,7 @@ class RundeckAPI(HttpAPI):
         :param str user: Rundeck user
         :param str password: Rundeck password
         :param str token: Rundeck token
+        :param kwargs: connection pool settings, see HttpAPI constructor
         """
 
         self._logger = logging.getLogger(__name__)
@@ -37,7 +38,7 @@ class RundeckAPI(HttpAPI):
         self._password = password
         self.__args_supported_values = {"scm_integration": ["import", "export"]}
 
-        super().__init__(root=url, user=user, auth=password)
+        super().__init__(root=url, user=user, auth=password, **kwargs)
         self._auth_cookie = None
 
     def __check_args(self, **kwargs):
@@ -144,10 +145,10 @@ class RundeckAPI(HttpAPI):
         self.raise_exception_high = 999
         _response = self.web.get(super().re(["api", "unsupported"]), headers={
             'Content-type': 'application/json', "Accept": 'application/json'})
-        self._logger.log(5, f"Response for API: {_response.json()}")
+        self._logger.log(5, f"Response for API: {self.decode_json(_response)}")
         # restore exceptions raising
         self.raise_exception_low, self.raise_exception_high = _tmp_exceptions
-        self._api_version = _response.json().get("apiversion")
+        self._api_version = self.decode_json(_response).get("apiversion")
         self._logger.info(f"Rundeck API version: [{self._api_version}]")
 
     @property
@@ -235,7 +236,7 @@ class RundeckAPI(HttpAPI):
         if key_path:
             _req = self.__append_path_list(_req, key_path)
 
-        return self.get(_req, headers=self.headers, cookies=self.cookies).json()
+        return self.decode_json(self.get(_req, headers=self.headers, cookies=self.cookies))
 
     def __object_exists(self, method, object_id):
         try:
@@ -288,7 +289,7 @@ class RundeckAPI(HttpAPI):
         self._logger.debug(f"Key type after adjustment: [{key_type}]")
         _headers["Content-type"] = key_type
         _method = self.put if self.key_storage__exists(key_path) else self.post
-        return _method(req=_req, headers=_headers, cookies=self.cookies, data=key_data).json()
+        return self.decode_json(_method(req=_req, headers=_headers, cookies=self.cookies, data=key_data))
 
     def key_storage__delete(self, key_path):
         """
@@ -314,7 +315,7 @@ class RundeckAPI(HttpAPI):
         """
         self._logger.info("Lsting projects")
         _req = ["projects"]
-        return self.get(_req, headers=self.headers, cookies=self.cookies).json()
+        return self.decode_json(self.get(_req, headers=self.headers, cookies=self.cookies))
 
     def project__info(self, project):
         """
@@ -325,7 +326,7 @@ class RundeckAPI(HttpAPI):
         self._logger.info(f"Get project info: [{project}]")
         self.__check_args(project=project)
         _req = ["project", project]
-        return self.get(_req, headers=self.headers, cookies=self.cookies).json()
+        return self.decode_json(self.get(_req, headers=self.headers, cookies=self.cookies))
 
     def project__exists(self, project):
         """
@@ -345,7 +346,7 @@ class RundeckAPI(HttpAPI):
         self._logger.info(f"Getting project configuration: [{project}]")
         self.__check_args(project=project)
         _req = ["project", project, "config"]
-        return self.get(_req, headers=self.headers, cookies=self.cookies).json()
+        return self.decode_json(self.get(_req, headers=self.headers, cookies=self.cookies))
 
     def project__update(self, project_configuration):
         """
@@ -386,15 +387,15 @@ class RundeckAPI(HttpAPI):
 
         if self.project__exists(project):
             self._logger.info(f"Project [{project}] exists, performing an update...")
-            return self.put(
+            return self.decode_json(self.put(
                 ["project", project, "config"],
                 data=json.dumps(project_configuration.get("config")),
                 headers=self.headers,
-                cookies=self.cookies).json()
+                cookies=self.cookies))
 
         self._logger.info(f"Project [{project}] does not exist, creating new one")
-        return self.post("projects", data=json.dumps(project_configuration),
-                         headers=self.headers, cookies=self.cookies).json()
+        return self.decode_json(self.post("projects", data=json.dumps(project_configuration),
+                                          headers=self.headers, cookies=self.cookies))
 
     def project__delete(self, project):
         """
@@ -442,7 +443,8 @@ class RundeckAPI(HttpAPI):
 
         _req = ["project", project, "scm", scm_integration, "plugin", scm_plugin_type, "setup"]
 
-        return self.post(_req, headers=self.headers, cookies=self.cookies, data=json.dumps(scm_configuration)).json()
+        return self.decode_json(
+            self.post(_req, headers=self.headers, cookies=self.cookies, data=json.dumps(scm_configuration)))
 
     def scm__enable(self, project, scm_integration, scm_plugin_type, enable=False):
         """
@@ -464,7 +466,7 @@ class RundeckAPI(HttpAPI):
 
         _req = ["project", project, "scm", scm_integration, "plugin", scm_plugin_type, "enable" if enable else "disable"]
 
-        return self.post(_req, headers=self.headers, cookies=self.cookies).json()
+        return self.decode_json(self.post(_req, headers=self.headers, cookies=self.cookies))
 
     def scm__get_action_inputs(self, project, scm_integration, scm_action):
         """
@@ -483,7 +485,7 @@ class RundeckAPI(HttpAPI):
 
         _req = ["project", project, "scm", scm_integration, "action", scm_action, "input"]
 
-        return self.get(_req, headers=self.headers, cookies=self.cookies).json()
+        return self.decode_json(self.get(_req, headers=self.headers, cookies=self.cookies))
 
     def scm__action_perform(self, project, scm_integration, scm_action, scm_action_data):
         """
@@ -508,7 +510,8 @@ class RundeckAPI(HttpAPI):
 
         _req = ["project", project, "scm", scm_integration, "action", scm_action]
 
-        return self.post(_req, headers=self.headers, cookies=self.cookies, data=json.dumps(scm_action_data)).json()
+        return self.decode_json(
+            self.post(_req, headers=self.headers, cookies=self.cookies, data=json.dumps(scm_action_data)))
 
     def scm__perform_all_actions(self, project, scm_integration, scm_action, commit_message=None):
         """
@@ -574,4 +577,4 @@ class RundeckAPI(HttpAPI):
 
         _req = ["project", project, "scm", scm_integration, "status"]
 
-        return self.get(_req, headers=self.headers, cookies=self.cookies).json()
+        return self.decode_json(self.get(_req, headers=self.headers, cookies=self.cookies))
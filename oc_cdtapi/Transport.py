@@ -0,0 +1,292 @@
+# Pluggable transports for HttpAPI sessions: HTTP/2 one based on httpx
+import http.client
+import io
+import os
+import ssl
+import threading
+
+import requests
+import urllib3
+
+# httpx with HTTP/2 support is optional: without it 'Http2Adapter' can not be used
+try:
+    import httpx
+    import h2  # noqa: F401, required by httpx for HTTP/2
+except ImportError:
+    httpx = None
+
+# connection-specific request headers set by 'requests', httpx manages them itself
+_hop_headers = frozenset(['connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade'])
+
+
+class _RetryResponse(object):
+    """
+    Minimal urllib3 response interface used by urllib3.Retry to decide on retry and its delay
+    """
+
+    def __init__(self, resp):
+        """
+        :param httpx.Response resp: response
+        """
+        self.status = resp.status_code
+        self.headers = resp.headers
+
+    def get_redirect_location(self):
+        # redirects are followed by requests.Session, never by transport
+        return False
+
+
+class _OriginalResponse(object):
+    """
+    Minimal http.client response interface used by requests.cookies.extract_cookies_to_jar to read 'Set-Cookie'
+    """
+
+    def __init__(self, headers):
+        """
+        :param httpx.Headers headers: response headers
+        """
+        self.msg = http.client.HTTPMessage()
+
+        for _name, _value in headers.multi_items():
+            self.msg[_name] = _value
+
+
+class RawResponse(io.RawIOBase):
+    """
+    File-like body of httpx response used as 'raw' attribute of requests.Response.
+    Unlike urllib3 'raw' the body is decoded according to 'Content-Encoding' already
+    """
+
+    def __init__(self, resp, retries=None):
+        """
+        :param httpx.Response resp: streamed response
+        :param urllib3.Retry retries: retry state with history of retries made, for metrics
+        """
+        super(RawResponse, self).__init__()
+        self.retries = retries
+        self._original_response = _OriginalResponse(resp.headers)
+        self._resp = resp
+        self._chunks = resp.iter_bytes()
+        self._buffer = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        try:
+            while not self._buffer:
+                self._buffer = next(self._chunks, None)
+
+                if self._buffer is None:
+                    self._buffer = b''
+                    return 0
+
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(e)
+
+        _size = min(len(b), len(self._buffer))
+        b[:_size] = self._buffer[:_size]
+        self._buffer = self._buffer[_size:]
+        return _size
+
+    def close(self):
+        self._resp.close()
+        super(RawResponse, self).close()
+
+    def release_conn(self):
+        self.close()
+
+
+class Http2Adapter(requests.adapters.BaseAdapter):
+    """
+    Transport adapter sending requests with httpx, over HTTP/2 if server supports it
+    (negotiated with TLS ALPN, plain HTTP connections stay HTTP/1.1).
+    Concurrent requests to the same server are multiplexed over a few connections
+    instead of a connection per request.
+    Responses are converted to requests.Response, so 'pp' and everything above work unchanged.
+    Connection errors, timeouts, cookies, proxies and 'max_retries' are handled the same way
+    as by requests.adapters.HTTPAdapter.
+    """
+
+    def __init__(self, pool_maxsize=requests.adapters.DEFAULT_POOLSIZE, idle_timeout=None, max_retries=None,
+                 timeout=None):
+        """
+        :param int pool_maxsize: maximum number of connections per server
+        :param float idle_timeout: seconds to keep idle connection open, forever if not set
+        :param urllib3.Retry max_retries: retry policy, no retries if not given
+        :param timeout: default (connect, read) timeouts, seconds, None to wait forever
+        """
+        if httpx is None:
+            raise ValueError("HTTP/2 transport requested but 'httpx[http2]' is not installed")
+
+        super(Http2Adapter, self).__init__()
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        self.max_retries = max_retries if max_retries is not None else urllib3.Retry(0, read=False)
+        self.timeout = timeout
+        self._clients = dict()
+        self._lock = threading.Lock()
+
+    def _client(self, verify=True, cert=None, proxy=None):
+        """
+        Get client for certificate and proxy settings given,
+        since they are per-request for 'requests' and per-client for httpx
+        :param verify: verify server certificate, or CA bundle path
+        :param cert: client certificate path or (certificate, key) pair
+        :param str proxy: proxy URL, direct connection if not given
+        :return httpx.Client:
+        """
+        _key = (verify, tuple(cert) if isinstance(cert, list) else cert, proxy)
+
+        with self._lock:
+            if _key not in self._clients:
+                if isinstance(verify, str):
+                    verify = ssl.create_default_context(
+                        **{'capath' if os.path.isdir(verify) else 'cafile': verify})
+
+                _limits = httpx.Limits(max_connections=self.pool_maxsize, max_keepalive_connections=self.pool_maxsize,
+                                       keepalive_expiry=self.idle_timeout)
+                self._clients[_key] = httpx.Client(transport=httpx.HTTPTransport(
+                    http2=True, verify=verify, cert=_key[1], limits=_limits, proxy=proxy), trust_env=False)
+
+            return self._clients[_key]
+
+    def reap_idle_connections(self, force=False):
+        """
+        Close all connections, idle ones are closed by httpx itself after 'idle_timeout'
+        :param bool force: close connections, nothing is done otherwise
+        :return bool: True if connections were closed
+        """
+        if not force:
+            return False
+
+        self.close()
+        return True
+
+    def close(self):
+        with self._lock:
+            for _client in self._clients.values():
+                _client.close()
+
+            self._clients.clear()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if timeout is None:
+            timeout = self.timeout
+
+        if not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+
+        # proxies are taken from environment by requests.Session already, 'no_proxy' included
+        _client = self._client(verify, cert, requests.utils.select_proxy(request.url, proxies) if proxies else None)
+        _headers = [(x, y) for x, y in request.headers.items() if x.lower() not in _hop_headers]
+        _body = request.body.encode('utf-8') if isinstance(request.body, str) else request.body
+        _body_pos = _body.tell() if hasattr(_body, 'seekable') and _body.seekable() else None
+        retries = self.max_retries
+        _budget = getattr(retries, 'budget', None)
+
+        if _budget is not None:
+            _budget.request()
+
+        while True:
+            try:
+                _resp = _client.send(_client.build_request(
+                    request.method, request.url, headers=_headers, content=_body,
+                    timeout=httpx.Timeout(None, connect=timeout[0], read=timeout[1], write=timeout[1],
+                                          pool=timeout[0])), stream=True)
+            except httpx.TransportError as e:
+                retries = self.__increment(request, retries, error=self.__urllib3_error(e, request))
+                retries.sleep()
+                self.__rewind(_body, _body_pos)
+                continue
+
+            if not retries.is_retry(request.method, _resp.status_code, 'Retry-After' in _resp.headers):
+                break
+
+            try:
+                retries = retries.increment(method=request.method, url=request.url, response=_RetryResponse(_resp))
+            except urllib3.exceptions.MaxRetryError:
+                if retries.raise_on_status:
+                    _resp.close()
+                    raise requests.exceptions.RetryError(request=request)
+
+                # error response is returned as is when retries are exhausted
+                break
+
+            _resp.close()
+            retries.sleep(_RetryResponse(_resp))
+            self.__rewind(_body, _body_pos)
+
+        return self.build_response(request, _resp, stream, retries)
+
+    def __increment(self, request, retries, error):
+        """
+        Count failed attempt, converting exhausted retries to 'requests' exception as HTTPAdapter does
+        :return urllib3.Retry: new retry state
+        """
+        try:
+            return retries.increment(method=request.method, url=request.url, error=error)
+        except urllib3.exceptions.MaxRetryError as e:
+            if isinstance(e.reason, urllib3.exceptions.ConnectTimeoutError) and \
+                    not isinstance(e.reason, urllib3.exceptions.NewConnectionError):
+                raise requests.exceptions.ConnectTimeout(e, request=request)
+
+            raise requests.exceptions.ConnectionError(e, request=request)
+        except urllib3.exceptions.NewConnectionError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+        except urllib3.exceptions.ConnectTimeoutError as e:
+            raise requests.exceptions.ConnectTimeout(e, request=request)
+        except urllib3.exceptions.ReadTimeoutError as e:
+            raise requests.exceptions.ReadTimeout(e, request=request)
+        except urllib3.exceptions.HTTPError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+
+    def __urllib3_error(self, error, request):
+        """
+        Convert httpx error to urllib3 one, so urllib3.Retry classifies it properly
+        :param httpx.TransportError error: httpx error
+        :return urllib3.exceptions.HTTPError:
+        """
+        if isinstance(error, httpx.ConnectTimeout):
+            return urllib3.exceptions.ConnectTimeoutError(None, str(error))
+
+        if isinstance(error, httpx.ConnectError):
+            return urllib3.exceptions.NewConnectionError(None, str(error))
+
+        if isinstance(error, httpx.TimeoutException):
+            return urllib3.exceptions.ReadTimeoutError(None, request.url, str(error))
+
+        return urllib3.exceptions.ProtocolError(str(error), error)
+
+    def __rewind(self, body, position):
+        """
+        Rewind request body stream before sending it again
+        """
+        if position is not None:
+            body.seek(position)
+
+    def build_response(self, request, resp, stream=False, retries=None):
+        """
+        Convert httpx response to requests.Response
+        :param requests.PreparedRequest request: request sent
+        :param httpx.Response resp: streamed response
+        :param bool stream: keep body unread
+        :param urllib3.Retry retries: retry state
+        :return requests.Response:
+        """
+        response = requests.Response()
+        response.status_code = resp.status_code
+        response.reason = resp.reason_phrase
+        response.headers = requests.structures.CaseInsensitiveDict(resp.headers.items())
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.raw = RawResponse(resp, retries)
+        requests.cookies.extract_cookies_to_jar(response.cookies, request, response.raw)
+
+        if not stream:
+            response._content = response.raw.read()
+            response.raw.close()
+
+        return response
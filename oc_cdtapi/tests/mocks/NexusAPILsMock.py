@@ -3,6 +3,7 @@ import posixpath
 from copy import deepcopy
 from xml.etree import ElementTree
 import re
+import fnmatch
 import json
 
 class ResponseMock(object):
@@ -10,6 +11,10 @@ class ResponseMock(object):
         self.status_code = status_code
         self.content = content
         self.url = url
+        self.closed = False
+
+    def close(self):
+        self.closed = True
 
     def json(self):
 
@@ -70,14 +75,16 @@ class NexusAPILsMock(object):
             if not params.get(__p):
                 continue
 
-            _res = list(filter(lambda x: x.get(__p) == params.get(__p), _res))
+            # search servers accept '*' wildcards
+            _res = list(filter(lambda x: fnmatch.fnmatchcase(x.get(__p) or '', params.get(__p))
+                               if '*' in params.get(__p) else x.get(__p) == params.get(__p), _res))
 
         return _res
 
-    def __xml_search_response(self, lst, too_many_results):
+    def __xml_search_response(self, lst, too_many_results, start=0, count=None):
         _rsp = ElementTree.Element("searchNGResponse")
         _tc = ElementTree.SubElement(_rsp, "totalCount")
-        _tc.text = str(len(lst))
+        _tc.text = str(len(set(map(lambda x: ":".join([x.get("g"), x.get("a"), x.get("v")]), lst))))
         _tmr = ElementTree.SubElement(_rsp, "tooManyResults")
         _tmr.text = str(too_many_results).lower()
         _data = ElementTree.SubElement(_rsp, "data")
@@ -100,6 +107,10 @@ class NexusAPILsMock(object):
 
             _gav.append(_gav_s)
 
+            # paging is done by unique GAVs
+            if len(_gav) <= start or (count is not None and len(_gav) > start + count):
+                continue
+
             _afx = ElementTree.SubElement(_data, "artifact")
             ElementTree.SubElement(_afx, "groupId").text = _af.get("g")
             ElementTree.SubElement(_afx, "artifactId").text = _af.get("a")
@@ -154,7 +165,9 @@ class NexusAPILsMock(object):
 
         return ResponseMock(req, 200, 
                 content=ElementTree.tostring(
-                    self.__xml_search_response(_pres, too_many_results=("a" not in params.keys()))))
+                    self.__xml_search_response(_pres, too_many_results=("a" not in params.keys()),
+                        start=int(params.get("from", 0)),
+                        count=int(params["count"]) if "count" in params else None)))
 
     def head(self, req, params=None, data=None, files=None, headers=None, **kvargs):
         __req = self._strip_request_url(req)
@@ -201,3 +214,40 @@ class ArtifactoryAPILsMock(NexusAPILsMock):
         _pres = self._filter_artifacts(params)
 
         return ResponseMock(req, 200, content=json.dumps(self.__json_search_response(_pres)))
+
+    def post(self, req, params=None, data=None, files=None, headers=None, **kvargs):
+        __req = self._strip_request_url(req)
+
+        if __req != posixpath.join("api", "search", "aql"):
+            raise ValueError("Unsupported request: %s" % req)
+
+        _query = re.match(r'^items\.find\((.*)\)\.include\(.*\)\.sort\(.*\)\.offset\((\d+)\)\.limit\((\d+)\)$', data)
+
+        if not _query:
+            return ResponseMock(req, 400, content="Unsupported query")
+
+        _criteria, _offset, _limit = json.loads(_query.group(1)).get("$and"), int(_query.group(2)), int(_query.group(3))
+        _res = list()
+
+        for _a in self._filter_artifacts(dict()):
+            _pth = NexusAPI.gav_to_path(_a)
+            _item = {"repo": "public", "path": posixpath.dirname(_pth), "name": posixpath.basename(_pth), "type": "file"}
+
+            if all(map(lambda x: self.__aql_match(_item, x), _criteria)):
+                _res.append(_item)
+
+        _res = sorted(_res, key=lambda x: (x["repo"], x["path"], x["name"]))[_offset:_offset + _limit]
+        return ResponseMock(req, 200, content=json.dumps({"results": _res}))
+
+    def __aql_match(self, item, criterion):
+        for _field, _value in criterion.items():
+            if not isinstance(_value, dict):
+                return item.get(_field) == _value
+
+            if "$match" in _value:
+                return fnmatch.fnmatchcase(item.get(_field), _value["$match"])
+
+            if "$nmatch" in _value:
+                return not fnmatch.fnmatchcase(item.get(_field), _value["$nmatch"])
+
+        raise ValueError("Unsupported criterion: %s" % criterion)
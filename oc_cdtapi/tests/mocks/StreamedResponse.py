@@ -0,0 +1,14 @@
+import io
+import json
+
+import requests
+
+
+def streamed_response(data):
+    """
+    Streamed response with JSON body not read yet
+    """
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.raw = io.BytesIO(json.dumps(data).encode('utf-8'))
+    return resp
@@ -1,6 +1,15 @@
 import unittest
 import doctest
-from .. import API
+import gzip
+import hashlib
+import io
+import json
+import math
+import os
+import tempfile
+import requests
+import urllib3
+from .. import API, HttpCache, Metrics
 from unittest.mock import ANY, MagicMock, patch, call
 from http.client import HTTPMessage
 
@@ -10,13 +19,13 @@ def load_tests(loader, tests, ignore):
 
 class TestHttpAPI(unittest.TestCase):
     def setUp(self):
-        self._api = API.HttpAPI(root="http://test.url", user="admin", auth='pass')
+        self._api = API.HttpAPI(root="http://test.url", user="admin", auth='pass', retry_policy={"backoff_factor": 0})
     
     @patch("urllib3.connectionpool.HTTPConnectionPool._get_conn")
     def test_get_must_retry_on_failed_request(self, getconn_mock):
         getconn_mock.return_value.getresponse.side_effect = [
-            MagicMock(status=401, msg=HTTPMessage(), headers={}),
-            MagicMock(status=401, msg=HTTPMessage(), headers={}),
+            MagicMock(status=503, msg=HTTPMessage(), headers={}),
+            MagicMock(status=503, msg=HTTPMessage(), headers={}),
             MagicMock(status=200, msg=HTTPMessage(), headers={}),
         ]
 
@@ -31,10 +40,10 @@ class TestHttpAPI(unittest.TestCase):
     
     @patch("urllib3.connectionpool.HTTPConnectionPool._get_conn")
     def test_get_must_retry_on_failed_request_for_http(self, getconn_mock):
-        _api = API.HttpAPI(root="http://test.url", user="admin", auth='pass')
+        _api = API.HttpAPI(root="http://test.url", user="admin", auth='pass', retry_policy={"backoff_factor": 0})
         getconn_mock.return_value.getresponse.side_effect = [
-            MagicMock(status=401, msg=HTTPMessage(), headers={}),
-            MagicMock(status=401, msg=HTTPMessage(), headers={}),
+            MagicMock(status=503, msg=HTTPMessage(), headers={}),
+            MagicMock(status=503, msg=HTTPMessage(), headers={}),
             MagicMock(status=200, msg=HTTPMessage(), headers={}),
         ]
 
@@ -49,10 +58,10 @@ class TestHttpAPI(unittest.TestCase):
     
     @patch("urllib3.connectionpool.HTTPConnectionPool._get_conn")
     def test_get_must_retry_on_failed_request_for_https(self, getconn_mock):
-        _api = API.HttpAPI(root="https://test.url", user="admin", auth='pass')
+        _api = API.HttpAPI(root="https://test.url", user="admin", auth='pass', retry_policy={"backoff_factor": 0})
         getconn_mock.return_value.getresponse.side_effect = [
-            MagicMock(status=401, msg=HTTPMessage(), headers={}),
-            MagicMock(status=401, msg=HTTPMessage(), headers={}),
+            MagicMock(status=503, msg=HTTPMessage(), headers={}),
+            MagicMock(status=503, msg=HTTPMessage(), headers={}),
             MagicMock(status=200, msg=HTTPMessage(), headers={}),
         ]
 
@@ -68,9 +77,10 @@ class TestHttpAPI(unittest.TestCase):
     @patch("urllib3.connectionpool.HTTPConnectionPool._get_conn")
     def test_get_must_throw_on_max_retries(self, getconn_mock):
         getconn_mock.return_value.getresponse.side_effect = [
-            MagicMock(status=401, msg=HTTPMessage(), headers={}),
-            MagicMock(status=401, msg=HTTPMessage(), headers={}),
-            MagicMock(status=401, msg=HTTPMessage(), headers={}),
+            MagicMock(status=503, msg=HTTPMessage(), headers={}),
+            MagicMock(status=503, msg=HTTPMessage(), headers={}),
+            MagicMock(status=503, msg=HTTPMessage(), headers={}),
+            MagicMock(status=503, msg=HTTPMessage(), headers={}),
             MagicMock(status=200, msg=HTTPMessage(), headers={}),
         ]
         with self.assertRaises(API.HttpAPIError):
@@ -78,32 +88,39 @@ class TestHttpAPI(unittest.TestCase):
 
         assert getconn_mock.return_value.request.mock_calls == [
             call("GET", "/tests", body=None, headers=ANY, chunked=False, preload_content=False, decode_content=False, enforce_content_length=True),
-            call("GET", "/tests", body=None, headers=ANY, chunked=False, preload_content=False, decode_content=False, enforce_content_length=True),
-            call("GET", "/tests", body=None, headers=ANY, chunked=False, preload_content=False, decode_content=False, enforce_content_length=True),
-        ]
+        ] * 4
 
     @patch("urllib3.connectionpool.HTTPConnectionPool._get_conn")
-    def test_post_must_retry_on_failed_request(self, getconn_mock):
+    def test_get_must_not_retry_unauthorized(self, getconn_mock):
         getconn_mock.return_value.getresponse.side_effect = [
-            MagicMock(status=401, msg=HTTPMessage(), headers={}),
             MagicMock(status=401, msg=HTTPMessage(), headers={}),
             MagicMock(status=200, msg=HTTPMessage(), headers={}),
         ]
+        with self.assertRaises(API.HttpAPIError):
+            self._api.get(req="tests")
 
-        r = self._api.post(req="tests")
-        r.raise_for_status()
+        self.assertEqual(len(getconn_mock.return_value.request.mock_calls), 1)
+
+    @patch("urllib3.connectionpool.HTTPConnectionPool._get_conn")
+    def test_post_must_not_retry_on_failed_request(self, getconn_mock):
+        getconn_mock.return_value.getresponse.side_effect = [
+            MagicMock(status=503, msg=HTTPMessage(), headers={}),
+            MagicMock(status=200, msg=HTTPMessage(), headers={}),
+        ]
+
+        # POST is not idempotent
+        with self.assertRaises(API.HttpAPIError):
+            self._api.post(req="tests")
 
         assert getconn_mock.return_value.request.mock_calls == [
             call("POST", "/tests", body=None, headers=ANY, chunked=False, preload_content=False, decode_content=False, enforce_content_length=True),
-            call("POST", "/tests", body=None, headers=ANY, chunked=False, preload_content=False, decode_content=False, enforce_content_length=True),
-            call("POST", "/tests", body=None, headers=ANY, chunked=False, preload_content=False, decode_content=False, enforce_content_length=True),
         ]
 
     @patch("urllib3.connectionpool.HTTPConnectionPool._get_conn")
     def test_put_must_retry_on_failed_request(self, getconn_mock):
         getconn_mock.return_value.getresponse.side_effect = [
-            MagicMock(status=401, msg=HTTPMessage(), headers={}),
-            MagicMock(status=401, msg=HTTPMessage(), headers={}),
+            MagicMock(status=503, msg=HTTPMessage(), headers={}),
+            MagicMock(status=503, msg=HTTPMessage(), headers={}),
             MagicMock(status=200, msg=HTTPMessage(), headers={}),
         ]
 
@@ -119,8 +136,8 @@ class TestHttpAPI(unittest.TestCase):
     @patch("urllib3.connectionpool.HTTPConnectionPool._get_conn")
     def test_delete_must_retry_on_failed_request(self, getconn_mock):
         getconn_mock.return_value.getresponse.side_effect = [
-            MagicMock(status=401, msg=HTTPMessage(), headers={}),
-            MagicMock(status=401, msg=HTTPMessage(), headers={}),
+            MagicMock(status=503, msg=HTTPMessage(), headers={}),
+            MagicMock(status=503, msg=HTTPMessage(), headers={}),
             MagicMock(status=200, msg=HTTPMessage(), headers={}),
         ]
 
@@ -136,8 +153,8 @@ class TestHttpAPI(unittest.TestCase):
     @patch("urllib3.connectionpool.HTTPConnectionPool._get_conn")
     def test_head_must_retry_on_failed_request(self, getconn_mock):
         getconn_mock.return_value.getresponse.side_effect = [
-            MagicMock(status=401, msg=HTTPMessage(), headers={}),
-            MagicMock(status=401, msg=HTTPMessage(), headers={}),
+            MagicMock(status=503, msg=HTTPMessage(), headers={}),
+            MagicMock(status=503, msg=HTTPMessage(), headers={}),
             MagicMock(status=200, msg=HTTPMessage(), headers={}),
         ]
 
@@ -149,3 +166,930 @@ class TestHttpAPI(unittest.TestCase):
             call("HEAD", "/tests", body=None, headers=ANY, chunked=False, preload_content=False, decode_content=False, enforce_content_length=True),
             call("HEAD", "/tests", body=None, headers=ANY, chunked=False, preload_content=False, decode_content=False, enforce_content_length=True),
         ]
+
+    @patch("urllib3.util.retry.time.sleep")
+    @patch("urllib3.connectionpool.HTTPConnectionPool._get_conn")
+    def test_get_must_limit_retry_after(self, getconn_mock, sleep_mock):
+        getconn_mock.return_value.getresponse.side_effect = [
+            MagicMock(status=429, msg=HTTPMessage(), headers={"Retry-After": "3600"}),
+            MagicMock(status=200, msg=HTTPMessage(), headers={}),
+        ]
+
+        self._api.get(req="tests").raise_for_status()
+        sleep_mock.assert_called_once_with(120)
+
+    @patch("urllib3.connectionpool.HTTPConnectionPool._get_conn")
+    def test_get_must_respect_retry_budget(self, getconn_mock):
+        _api = API.HttpAPI(root="http://test.url", retry_policy={"backoff_factor": 0, "budget_ratio": 0,
+                                                                 "budget_min_retries": 1})
+        getconn_mock.return_value.getresponse.side_effect = [
+            MagicMock(status=503, msg=HTTPMessage(), headers={}) for _ in range(3)]
+
+        with self.assertRaises(API.HttpAPIError):
+            _api.get(req="tests")
+
+        self.assertEqual(len(getconn_mock.return_value.request.mock_calls), 2)
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_budget(self):
+        _budget = API.RetryBudget(ratio=0.5, min_retries=1, window=60)
+        self.assertTrue(_budget.withdraw())
+        self.assertFalse(_budget.withdraw())
+
+        for _ in range(4):
+            _budget.request()
+
+        self.assertTrue(_budget.withdraw())
+        self.assertTrue(_budget.withdraw())
+        self.assertFalse(_budget.withdraw())
+
+    def test_jitter(self):
+        _history = tuple(urllib3.util.retry.RequestHistory("GET", "/", None, 503, None) for _ in range(3))
+        _retry = API.RetryPolicy(backoff_factor=1, history=_history)
+        self.assertEqual(API.RetryPolicy(backoff_factor=1, history=_history, jitter=False).get_backoff_time(), 4)
+
+        for _ in range(20):
+            self.assertTrue(0 <= _retry.get_backoff_time() <= 4)
+
+        _new = _retry.new(total=1)
+        self.assertEqual((_new.jitter, _new.total), (True, 1))
+
+    @patch.dict("os.environ", {"RETRYTEST_URL": "http://test.url", "RETRYTEST_RETRY_TOTAL": "7"})
+    def test_defaults(self):
+        class _RetryTestAPI(API.HttpAPI):
+            _env_prefix = "RETRYTEST"
+            retry_policy = dict(API.HttpAPI.retry_policy, backoff_max=5, budget_ratio=None)
+
+        _retry = _RetryTestAPI().web.get_adapter("http://test.url").max_retries
+        self.assertIsInstance(_retry, API.RetryPolicy)
+        self.assertEqual((_retry.total, _retry.backoff_max, _retry.budget), (7, 5, None))
+        self.assertFalse(_retry.is_retry("GET", 401))
+        self.assertTrue(_retry.is_retry("GET", 503))
+        self.assertFalse(_retry.is_retry("POST", 503))
+
+        _retry = _RetryTestAPI(retry_policy={"total": 1}).web.get_adapter("http://test.url").max_retries
+        self.assertEqual(_retry.total, 1)
+
+        _policy = urllib3.Retry(total=0)
+        self.assertIs(API.HttpAPI(root="http://test.url", retry_policy=_policy).web.get_adapter("http://x").max_retries,
+                      _policy)
+
+
+class TestHttpAPIPool(unittest.TestCase):
+    def tearDown(self):
+        API.HttpAPI._shared_adapters.clear()
+
+    def test_pool_defaults(self):
+        _api = API.HttpAPI(root="http://test.url")
+        _adapter = _api.web.get_adapter("http://test.url")
+        self.assertIsInstance(_adapter, API.PoolAdapter)
+        self.assertEqual(_adapter._pool_connections, 10)
+        self.assertEqual(_adapter._pool_maxsize, 10)
+        self.assertFalse(_adapter._pool_block)
+        self.assertIsNone(_adapter.idle_timeout)
+
+    def test_pool_parameters(self):
+        _api = API.HttpAPI(root="http://test.url", pool_connections=4, pool_maxsize=200,
+                           pool_block=True, pool_idle_timeout=30)
+        _adapter = _api.web.get_adapter("http://test.url")
+        self.assertEqual(_adapter._pool_connections, 4)
+        self.assertEqual(_adapter._pool_maxsize, 200)
+        self.assertTrue(_adapter._pool_block)
+        self.assertEqual(_adapter.idle_timeout, 30.0)
+        self.assertIs(_adapter, _api.web.get_adapter("https://test.url"))
+
+    @patch.dict("os.environ", {"POOLTEST_URL": "http://test.url", "POOLTEST_POOL_CONNECTIONS": "2",
+                               "POOLTEST_POOL_MAXSIZE": "300", "POOLTEST_POOL_BLOCK": "yes",
+                               "POOLTEST_POOL_IDLE_TIMEOUT": "5.5"})
+    def test_pool_environment(self):
+        class _PoolTestAPI(API.HttpAPI):
+            _env_prefix = "POOLTEST"
+
+        _api = _PoolTestAPI()
+        _adapter = _api.web.get_adapter("http://test.url")
+        self.assertEqual(_adapter._pool_connections, 2)
+        self.assertEqual(_adapter._pool_maxsize, 300)
+        self.assertTrue(_adapter._pool_block)
+        self.assertEqual(_adapter.idle_timeout, 5.5)
+
+        # explicit arguments have priority
+        _api = _PoolTestAPI(pool_maxsize=50, pool_block=False)
+        _adapter = _api.web.get_adapter("http://test.url")
+        self.assertEqual(_adapter._pool_maxsize, 50)
+        self.assertFalse(_adapter._pool_block)
+
+    def test_shared_session(self):
+        _api_1 = API.HttpAPI(root="http://test.url/one", user="admin", auth="pass", shared_session=True)
+        _api_2 = API.HttpAPI(root="http://test.url/two", user="other", auth="pass", shared_session=True)
+        # sessions are not thread-safe, so only the connection pool is shared
+        self.assertIsNot(_api_1.web, _api_2.web)
+        self.assertIs(_api_1.web.get_adapter("http://test.url"), _api_2.web.get_adapter("http://test.url"))
+        self.assertEqual((_api_1.web.auth, _api_2.web.auth), (("admin", "pass"), ("other", "pass")))
+
+        # different pool settings or private mode mean different pools
+        self.assertIsNot(_api_1.web.get_adapter("http://test.url"), API.HttpAPI(
+            root="http://test.url/one", user="admin", auth="pass", pool_maxsize=100,
+            shared_session=True).web.get_adapter("http://test.url"))
+        self.assertIsNot(_api_1.web.get_adapter("http://test.url"), API.HttpAPI(
+            root="http://test.url/one", user="admin", auth="pass").web.get_adapter("http://test.url"))
+
+    def test_shared_session_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=16) as _pool:
+            _sessions = list(_pool.map(
+                lambda x: API.HttpAPI(root="http://test.url", shared_session=True).web, range(64)))
+
+        self.assertEqual(len(set(map(id, _sessions))), 64)
+        self.assertEqual(len(set(id(x.get_adapter("http://test.url")) for x in _sessions)), 1)
+
+    def test_idle_reaping(self):
+        _adapter = API.PoolAdapter(idle_timeout=10)
+        _adapter.poolmanager = MagicMock()
+
+        with patch("time.monotonic", return_value=_adapter._last_used + 5):
+            self.assertFalse(_adapter.reap_idle_connections())
+
+        _adapter.poolmanager.clear.assert_not_called()
+
+        with patch("time.monotonic", return_value=_adapter._last_used + 11):
+            self.assertTrue(_adapter.reap_idle_connections())
+
+        _adapter.poolmanager.clear.assert_called_once_with()
+        self.assertTrue(_adapter.reap_idle_connections(force=True))
+
+    def test_reap_idle_connections_forced(self):
+        _api = API.HttpAPI(root="http://test.url")
+        _adapter = _api.web.get_adapter("http://test.url")
+        _adapter.poolmanager = MagicMock()
+        _api.reap_idle_connections()
+        _adapter.poolmanager.clear.assert_called_once_with()
+
+
+class TestHttpAPITimeouts(unittest.TestCase):
+    def _response(self, content=b"data" * 20):
+        _resp = requests.Response()
+        _resp.status_code = 200
+        _resp.url = "http://test.url/file"
+        _resp.raw = io.BytesIO(content)
+        return _resp
+
+    def test_defaults(self):
+        _api = API.HttpAPI(root="http://test.url")
+        self.assertEqual(_api.timeout, (10, 120))
+        self.assertEqual(_api.web.get_adapter("http://test.url").timeout, (10, 120))
+        self.assertEqual(API.HttpAPI(root="http://test.url", connect_timeout=3, read_timeout=0).timeout, (3, None))
+
+    @patch.dict("os.environ", {"TIMEOUTTEST_URL": "http://test.url", "TIMEOUTTEST_CONNECT_TIMEOUT": "2.5",
+                               "TIMEOUTTEST_READ_TIMEOUT": "30", "TIMEOUTTEST_STREAM_DEADLINE": "600"})
+    def test_environment(self):
+        class _TimeoutTestAPI(API.HttpAPI):
+            _env_prefix = "TIMEOUTTEST"
+
+        _api = _TimeoutTestAPI()
+        self.assertEqual((_api.timeout, _api.stream_deadline), ((2.5, 30), 600))
+        self.assertEqual(_TimeoutTestAPI(read_timeout=5).timeout, (2.5, 5))
+
+    def test_class_setting(self):
+        class _TimeoutTestAPI(API.HttpAPI):
+            read_timeout = 600
+
+        self.assertEqual(_TimeoutTestAPI(root="http://test.url").timeout, (10, 600))
+        self.assertEqual(_TimeoutTestAPI(root="http://test.url", read_timeout=0).timeout, (10, None))
+
+        # slow servers wait longer by default
+        from .. import DmsAPI, JenkinsAPI, NexusAPI
+
+        for _cls in [JenkinsAPI.Jenkins, NexusAPI.NexusAPI, NexusAPI.AsyncNexusAPI, DmsAPI.DmsAPI, DmsAPI.DmsAPIv3]:
+            self.assertEqual(_cls.read_timeout, 600)
+
+    @patch("requests.adapters.HTTPAdapter.send")
+    def test_adapter(self, send_mock):
+        _adapter = API.PoolAdapter(timeout=(1, 2))
+        _adapter.send("request", timeout=None, stream=False)
+        send_mock.assert_called_once_with("request", timeout=(1, 2), stream=False)
+        _adapter.send("request", timeout=5)
+        send_mock.assert_called_with("request", timeout=5)
+
+    def test_deadline_not_sent(self):
+        _api = API.HttpAPI(root="http://test.url", stream_deadline=60)
+
+        for _method in ["get", "post", "put", "delete", "head"]:
+            setattr(_api.web, _method, MagicMock(return_value=self._response()))
+            getattr(_api, _method)("file", deadline=10, timeout=(1, 5))
+            getattr(_api.web, _method).assert_called_once_with(
+                "http://test.url/file", params=None, data=None, files=None, headers=None, timeout=(1, 5))
+
+    def test_stream_deadline(self):
+        _api = API.HttpAPI(root="http://test.url", stream_deadline=60)
+        _api.chunk_size = 8
+        _api.web.get = MagicMock(return_value=self._response())
+        _clock = iter(range(0, 1000, 10))
+        _bio = io.BytesIO()
+
+        with patch("time.monotonic", side_effect=lambda: next(_clock)):
+            with self.assertRaises(API.DeadlineExceeded):
+                _api.get("file", stream=True, write_to=_bio)
+
+        # deadline is 60 seconds after the request, the seventh chunk is written at 70 seconds
+        self.assertEqual(_bio.getvalue(), (b"data" * 20)[:56])
+
+        _api.web.get = MagicMock(return_value=self._response())
+        _bio = io.BytesIO()
+        _api.get("file", stream=True, write_to=_bio, deadline=0)
+        self.assertEqual(_bio.getvalue(), b"data" * 20)
+
+
+class TestHttpAPIJson(unittest.TestCase):
+    def setUp(self):
+        self._decoder = MagicMock(side_effect=API.HttpAPI.json_decoder)
+        self._api = API.HttpAPI(root="http://test.url", json_decoder=self._decoder)
+
+    def _response(self, content, encoding=None):
+        _resp = requests.Response()
+        _resp.status_code = 200
+        _resp.encoding = encoding
+        _resp._content = content
+        return _resp
+
+    def test_default_decoder(self):
+        self.assertIs(API.HttpAPI.json_decoder, API.orjson.loads if API.orjson is not None else json.loads)
+
+    def test_decode(self):
+        self.assertEqual(self._api.decode_json(self._response(b'{"results": [1, "\xd0\xb0"]}')),
+                         {"results": [1, "\u0430"]})
+        self._decoder.assert_called_once_with(b'{"results": [1, "\xd0\xb0"]}')
+
+    def test_fallback(self):
+        # not accepted by orjson, but accepted by standard library as before
+        self.assertTrue(math.isnan(self._api.decode_json(self._response(b'[NaN]'))[0]))
+        self.assertEqual(self._api.decode_json(self._response('{"a": 1}'.encode('utf-16'))), {"a": 1})
+
+        with self.assertRaises(requests.exceptions.JSONDecodeError):
+            self._api.decode_json(self._response(b'not json'))
+
+    def test_empty(self):
+        self.assertEqual(self._api.decode_json(self._response(b''), empty={}), {})
+
+        with self.assertRaises(ValueError):
+            self._api.decode_json(self._response(b''))
+
+        self._decoder.assert_not_called()
+
+    def test_cached(self):
+        _parsed = dict()
+        _entry = HttpCache.CacheEntry(200, "http://test.url", {}, None, b'{"a": 1}')
+        _first = self._api.decode_json(HttpCache.response_from_entry(_entry, _parsed))
+        _first["a"] = 2
+        self.assertEqual(self._api.decode_json(HttpCache.response_from_entry(_entry, _parsed)), {"a": 1})
+        self._decoder.assert_not_called()
+
+    def test_response_like(self):
+        _resp = MagicMock()
+        _resp.json.return_value = {"a": 1}
+        self.assertEqual(self._api.decode_json(_resp), {"a": 1})
+
+        class _TextResponse(object):
+            text = '{"a": 2}'
+
+        self.assertEqual(self._api.decode_json(_TextResponse()), {"a": 2})
+        _TextResponse.text = ''
+        self.assertEqual(self._api.decode_json(_TextResponse(), empty=None), None)
+
+
+class TestHttpAPIIterJson(unittest.TestCase):
+    def setUp(self):
+        self._api = API.HttpAPI(root="http://test.url")
+        self._api.web = MagicMock()
+
+    def _response(self, raw, status_code=200, headers=None):
+        _resp = requests.Response()
+        _resp.status_code = status_code
+        _resp.raw = raw
+        _resp.headers = requests.structures.CaseInsensitiveDict(headers or {})
+        _resp.encoding = requests.utils.get_encoding_from_headers(_resp.headers)
+        return _resp
+
+    def test_iter_json(self):
+        _raw = io.BytesIO(b'{"total": 2, "results": [{"id": 1}, {"id": 2}]}')
+        self._api.web.get.return_value = self._response(_raw)
+        _items = self._api.iter_json('hosts', params={'per_page': 2})
+        # request is sent on the first iteration
+        self._api.web.get.assert_not_called()
+        self.assertEqual(list(_items), [{"id": 1}, {"id": 2}])
+        self._api.web.get.assert_called_once_with('http://test.url/hosts', params={'per_page': 2}, data=None,
+                                                  files=None, headers=None, stream=True)
+        self.assertTrue(_raw.closed)
+
+    def test_abandoned(self):
+        _raw = io.BytesIO(b'[1, 2, 3]')
+        self._api.web.get.return_value = self._response(_raw)
+        _items = self._api.iter_json('list', path='item')
+        self.assertEqual(next(_items), 1)
+        self.assertFalse(_raw.closed)
+        # consumer stops early: streamed response is closed anyway
+        _items.close()
+        self.assertTrue(_raw.closed)
+
+        # and when generator is dropped
+        _raw = io.BytesIO(b'[1, 2, 3]')
+        self._api.web.get.return_value = self._response(_raw)
+        _items = self._api.iter_json('list', path='item')
+        next(_items)
+        del _items
+        self.assertTrue(_raw.closed)
+
+    def test_path(self):
+        self._api.web.get.return_value = self._response(io.BytesIO(b'[1, 2, 3]'))
+        self.assertEqual(list(self._api.iter_json('list', path='item')), [1, 2, 3])
+
+    def test_content_encoding(self):
+        _body = io.BytesIO()
+
+        with gzip.GzipFile(fileobj=_body, mode='wb') as _gzip:
+            _gzip.write('{"results": ["\u0430"]}'.encode('utf-8'))
+
+        _headers = {'Content-Encoding': 'gzip', 'Content-Type': 'application/json'}
+        self._api.web.get.return_value = self._response(urllib3.HTTPResponse(
+            body=io.BytesIO(_body.getvalue()), headers=_headers, preload_content=False), headers=_headers)
+        self.assertEqual(list(self._api.iter_json('list')), ["\u0430"])
+
+    def test_content_read(self):
+        _resp = self._response(None)
+        _resp._content = b'{"results": [1]}'
+        _resp._content_consumed = True
+        self._api.web.get.return_value = _resp
+        self.assertEqual(list(self._api.iter_json('list')), [1])
+
+    def test_error(self):
+        self._api.web.get.return_value = self._response(io.BytesIO(b'not found'), status_code=404)
+
+        with self.assertRaises(API.HttpAPIError):
+            next(self._api.iter_json('list'))
+
+        self._api.web.get.return_value = self._response(io.BytesIO(b'{"results": [1, }'))
+
+        with self.assertRaises(ValueError):
+            list(self._api.iter_json('list'))
+
+
+class TestHttpAPIChecksums(unittest.TestCase):
+    _data = b"response data" * 1000
+
+    def setUp(self):
+        self._api = API.HttpAPI(root="http://test.url")
+
+    def test_stream(self):
+        _bio = io.BytesIO()
+        _resp = self._api.pp(MagicMock(status_code=200, raw=io.BytesIO(self._data)), write_to=_bio, stream=True,
+                             checksums=["md5", "sha1", "sha256"])
+        self.assertEqual(_bio.getvalue(), self._data)
+        self.assertEqual(_resp.checksums, {"md5": hashlib.md5(self._data).hexdigest(),
+                                           "sha1": hashlib.sha1(self._data).hexdigest(),
+                                           "sha256": hashlib.sha256(self._data).hexdigest()})
+
+    def test_content(self):
+        _resp = self._api.pp(MagicMock(status_code=200, content=self._data), checksums=["sha1"])
+        self.assertEqual(_resp.checksums, {"sha1": hashlib.sha1(self._data).hexdigest()})
+
+    def test_not_requested(self):
+        _resp = self._api.pp(MagicMock(spec=["status_code", "content"], status_code=200, content=self._data))
+        self.assertFalse(hasattr(_resp, "checksums"))
+
+    def test_get(self):
+        self._api.web.get = MagicMock(return_value=MagicMock(status_code=200, raw=io.BytesIO(self._data)))
+        _resp = self._api.get("resource", stream=True, write_to=io.BytesIO(), checksums=["md5"])
+        self.assertEqual(_resp.checksums, {"md5": hashlib.md5(self._data).hexdigest()})
+        self._api.web.get.assert_called_once_with("http://test.url/resource", params=None, data=None, files=None,
+                                                  headers=None, stream=True)
+
+
+class TestHttpAPICache(unittest.TestCase):
+    def setUp(self):
+        self._api = API.HttpAPI(root="http://test.url", cache=True, cache_ttl=60)
+        self._api.web.get = MagicMock(side_effect=lambda *args, **kvarg: self._response(b"data"))
+
+    def _response(self, content, status_code=200):
+        _resp = requests.Response()
+        _resp.status_code = status_code
+        _resp.url = "http://test.url/resource"
+        _resp._content = content
+        return _resp
+
+    def test_cached(self):
+        self.assertEqual(self._api.get("resource", params={"b": "1", "a": "2"}).content, b"data")
+        _resp = self._api.get("resource", params={"a": "2", "b": "1"})
+        self.assertEqual(_resp.content, b"data")
+        self.assertTrue(_resp.from_cache)
+        self._api.web.get.assert_called_once_with("http://test.url/resource", params={"b": "1", "a": "2"},
+                                                  data=None, files=None, headers=None)
+        self.assertEqual(self._api.cache_stats(), {"hits": 1, "misses": 1, "size": 1, "maxsize": 1024})
+
+    def test_not_cached(self):
+        self._api.get("resource", params={"a": "1"})
+        self._api.get("resource", params={"a": "2"})
+        self._api.get("resource", headers={"Accept": "text/plain"})
+        self._api.get("resource", stream=True)
+        self._api.get("resource", cache_ttl=0)
+        self._api.cache_ttl = 0
+        self._api.get("other")
+        self._api.get("other")
+        self.assertEqual(self._api.web.get.call_count, 7)
+
+    def test_errors_not_cached(self):
+        self._api.web.get = MagicMock(return_value=self._response(b"", 404))
+
+        for _ in range(2):
+            with self.assertRaises(API.HttpAPIError):
+                self._api.get("resource")
+
+        self.assertEqual(self._api.web.get.call_count, 2)
+
+    def test_endpoint_ttl(self):
+        self._api.cache_ttl = 0
+        self._api.cache_ttls = {"^ref/volatile": 0, "^ref/": 60}
+        self.assertEqual(self._api._cache_ttl("ref/a"), 60)
+        self.assertEqual(self._api._cache_ttl(["ref", "volatile"]), 0)
+        self.assertEqual(self._api._cache_ttl("other"), 0)
+
+    def test_invalidate(self):
+        self._api.web.put = MagicMock(return_value=self._response(b""))
+        self._api.get("resource")
+        self._api.put("resource", data=b"new")
+        self._api.get("resource")
+        self.assertEqual(self._api.cache_invalidate("resource"), 1)
+        self._api.get("resource")
+        self.assertEqual(self._api.web.get.call_count, 3)
+
+    @patch.dict("os.environ", {"CACHETEST_URL": "http://test.url", "CACHETEST_CACHE": "memory",
+                               "CACHETEST_CACHE_TTL": "30"})
+    def test_environment(self):
+        class _CacheTestAPI(API.HttpAPI):
+            _env_prefix = "CACHETEST"
+
+        _api = _CacheTestAPI()
+        self.assertIsInstance(_api.cache, HttpCache.MemoryCache)
+        self.assertEqual(_api.cache_ttl, 30.0)
+        self.assertIsNone(API.HttpAPI(root="http://test.url").cache_stats())
+
+        # bare word is ignored instead of being taken for sqlite file name
+        with patch.dict("os.environ", {"CACHETEST_CACHE": "dummy_token"}):
+            self.assertIsNone(_CacheTestAPI().cache)
+
+        with patch.dict("os.environ", {"CACHETEST_CACHE": "yes"}):
+            self.assertIsInstance(_CacheTestAPI().cache, HttpCache.MemoryCache)
+
+    def test_class_setting(self):
+        class _CacheTestAPI(API.HttpAPI):
+            cache = True
+
+        _api = _CacheTestAPI(root="http://test.url")
+        self.assertIsInstance(_api.cache, HttpCache.MemoryCache)
+        # each client gets its own in-memory cache
+        self.assertIsNot(_CacheTestAPI(root="http://test.url").cache, _api.cache)
+        self.assertIsNone(_CacheTestAPI(root="http://test.url", cache=False).cache)
+
+
+class TestHttpAPIConditional(unittest.TestCase):
+    _data = b'{"items": [1, 2, 3]}'
+
+    def setUp(self):
+        self._api = API.HttpAPI(root="http://test.url", conditional=True)
+
+    def _response(self, status_code=200, headers=None, content=b""):
+        _resp = requests.Response()
+        _resp.status_code = status_code
+        _resp.url = "http://test.url/resource"
+        _resp.headers.update(headers or {})
+        _resp._content = content
+        return _resp
+
+    def test_not_modified(self):
+        self._api.web.get = MagicMock(side_effect=[
+            self._response(headers={"ETag": '"v1"', "Last-Modified": "Mon, 05 Oct 2026 10:00:00 GMT"},
+                           content=self._data),
+            self._response(304), self._response(304)])
+        self.assertEqual(self._api.get("resource", params={"a": "1"}).json(), {"items": [1, 2, 3]})
+        _first = self._api.get("resource", params={"a": "1"})
+        _second = self._api.get("resource", params={"a": "1"})
+        self.assertEqual(_first.status_code, 200)
+        self.assertEqual(_first.content, self._data)
+        # body is parsed once for all revalidated responses, but each caller gets its own copy
+        _first.json()["items"].append(4)
+
+        with patch("requests.Response.json") as _json:
+            self.assertEqual(_second.json(), {"items": [1, 2, 3]})
+            self.assertEqual(_first.json(), {"items": [1, 2, 3]})
+
+        _json.assert_not_called()
+        self._api.web.get.assert_called_with(
+            "http://test.url/resource", params={"a": "1"}, data=None, files=None,
+            headers={"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 05 Oct 2026 10:00:00 GMT"})
+
+    def test_modified(self):
+        self._api.web.get = MagicMock(side_effect=[
+            self._response(headers={"ETag": '"v1"'}, content=b"1"),
+            self._response(headers={"ETag": '"v2"'}, content=b"2"),
+            self._response(304)])
+        self.assertEqual(self._api.get("resource", headers={"Accept": "text/plain"}).content, b"1")
+        self.assertEqual(self._api.get("resource", headers={"Accept": "text/plain"}).content, b"2")
+        self.assertEqual(self._api.get("resource", headers={"Accept": "text/plain"}).content, b"2")
+        self._api.web.get.assert_called_with("http://test.url/resource", params=None, data=None, files=None,
+                                             headers={"Accept": "text/plain", "If-None-Match": '"v2"'})
+
+    def test_no_validators(self):
+        self._api.web.get = MagicMock(return_value=self._response(content=b"1"))
+        self._api.get("resource")
+        self._api.get("resource")
+        self._api.web.get.assert_called_with("http://test.url/resource", params=None, data=None, files=None,
+                                             headers=None)
+
+    def test_bypass(self):
+        self._api.web.get = MagicMock(return_value=self._response(headers={"ETag": '"v1"'}, content=b"1"))
+        self._api.get("resource")
+        self._api.get("resource", cache_ttl=0)
+        self._api.web.get.assert_called_with("http://test.url/resource", params=None, data=None, files=None,
+                                             headers=None)
+        self._api.cache_invalidate("resource")
+        self._api.get("resource")
+        self._api.web.get.assert_called_with("http://test.url/resource", params=None, data=None, files=None,
+                                             headers=None)
+
+    def test_off_by_default(self):
+        _api = API.HttpAPI(root="http://test.url")
+        _api.web.get = MagicMock(return_value=self._response(headers={"ETag": '"v1"'}, content=b"1"))
+        _api.get("resource")
+        _api.get("resource")
+        _api.web.get.assert_called_with("http://test.url/resource", params=None, data=None, files=None,
+                                        headers=None)
+
+
+class TestHttpAPIInstruments(unittest.TestCase):
+    def setUp(self):
+        self._instrument = MagicMock(spec=Metrics.Instrument)
+        self._registry = Metrics.MetricsRegistry()
+        self._api = API.HttpAPI(root="http://test.url", instruments=[self._instrument, self._registry])
+
+    def _response(self, status_code=200, content=b"data"):
+        _resp = requests.Response()
+        _resp.status_code = status_code
+        _resp.url = "http://test.url/hosts/1"
+        _resp._content = content
+        return _resp
+
+    def test_hooks(self):
+        self._api.web.put = MagicMock(return_value=self._response())
+        self._api.put(["hosts", "1"], data=b"payload")
+        _event = self._instrument.before.call_args[0][0]
+        self.assertIs(_event, self._instrument.after.call_args[0][0])
+        self.assertEqual((_event.client, _event.method, _event.endpoint), ("HttpAPI", "PUT", "hosts/{id}"))
+        self.assertEqual((_event.status_code, _event.bytes_sent, _event.bytes_received), (200, 7, 4))
+        self.assertIsNone(_event.error)
+        self.assertGreaterEqual(_event.seconds, 0)
+
+    def test_error(self):
+        self._api.web.get = MagicMock(return_value=self._response(404))
+
+        with self.assertRaises(API.HttpAPIError):
+            self._api.get("hosts/2")
+
+        self._api.web.head = MagicMock(side_effect=requests.exceptions.ConnectionError())
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self._api.head("hosts/2")
+
+        self.assertEqual(self._registry.snapshot()[("HttpAPI", "GET", "hosts/{id}")]["codes"], {"404": 1})
+        self.assertEqual(self._registry.snapshot()[("HttpAPI", "HEAD", "hosts/{id}")]["codes"],
+                         {"ConnectionError": 1})
+
+    def test_instrument_failure(self):
+        self._instrument.after.side_effect = RuntimeError("broken instrument")
+        self._api.web.delete = MagicMock(return_value=self._response())
+        self.assertEqual(self._api.delete("hosts/1").status_code, 200)
+        self.assertEqual(self._registry.snapshot()[("HttpAPI", "DELETE", "hosts/{id}")]["latency"]["count"], 1)
+
+    @patch.dict("os.environ", {"METRICSTEST_URL": "http://test.url", "METRICSTEST_METRICS": "true"})
+    def test_environment(self):
+        class _MetricsTestAPI(API.HttpAPI):
+            _env_prefix = "METRICSTEST"
+
+        self.assertEqual(_MetricsTestAPI().instruments, (Metrics.registry,))
+        self.assertEqual(API.HttpAPI(root="http://test.url").instruments, tuple())
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self._now = 1000.0
+        self._patcher = patch("time.monotonic", side_effect=lambda: self._now)
+        self._patcher.start()
+        self._breaker = API.CircuitBreaker("test.url", failure_threshold=3, cooldown=10)
+        self._listener = MagicMock(spec=Metrics.Instrument)
+        self._breaker.add_listener(self._listener)
+
+    def tearDown(self):
+        self._patcher.stop()
+
+    def _fail(self, count):
+        for _ in range(count):
+            self._breaker.before()
+            self._breaker.record(True)
+
+    def test_open(self):
+        self._fail(2)
+        self._breaker.record(False)
+        self._fail(2)
+        self.assertEqual(self._breaker.state, "closed")
+        self._fail(1)
+        self.assertEqual(self._breaker.state, "open")
+        self._listener.circuit.assert_called_once_with(self._breaker, "open")
+
+        with self.assertRaises(API.CircuitOpenError) as _ctx:
+            self._breaker.before("http://test.url/a")
+
+        self.assertIs(_ctx.exception.breaker, self._breaker)
+        self.assertEqual(_ctx.exception.url, "http://test.url/a")
+
+    def test_half_open(self):
+        self._fail(3)
+        self._now += 10
+        self.assertEqual(self._breaker.state, "half-open")
+        # the only probe is let through
+        self._breaker.before()
+
+        with self.assertRaises(API.CircuitOpenError):
+            self._breaker.before()
+
+        # failed probe opens the circuit for another cooldown
+        self._breaker.record(True)
+        self.assertEqual(self._breaker.state, "open")
+        self._now += 10
+        self._breaker.before()
+        self._breaker.record(False)
+        self.assertEqual(self._breaker.state, "closed")
+        self.assertEqual(self._breaker.stats(), {"state": "closed", "failures": 0, "opened": 2})
+        self.assertEqual([x[0][1] for x in self._listener.circuit.call_args_list],
+                         ["open", "half-open", "open", "half-open", "closed"])
+
+    def test_is_failure(self):
+        self.assertTrue(self._breaker.is_failure(requests.exceptions.ConnectTimeout()))
+        self.assertTrue(self._breaker.is_failure(None, 503))
+        self.assertFalse(self._breaker.is_failure(API.HttpAPIError(404, "", None), 404))
+        self.assertFalse(self._breaker.is_failure(None, 200, 100))
+        self._breaker.slow_threshold = 5
+        self.assertTrue(self._breaker.is_failure(None, 200, 5.5))
+        self.assertFalse(self._breaker.is_failure(None, 200, 4.5))
+
+
+class TestHttpAPICircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        API.HttpAPI._circuit_breakers.clear()
+        self._registry = Metrics.MetricsRegistry()
+
+    def tearDown(self):
+        API.HttpAPI._circuit_breakers.clear()
+
+    def test_fail_fast(self):
+        _breaker = API.CircuitBreaker("test.url", failure_threshold=2)
+        _api = API.HttpAPI(root="http://test.url", circuit_breaker=_breaker, instruments=[self._registry])
+        _api.web.get = MagicMock(side_effect=requests.exceptions.ConnectionError())
+
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                _api.get("a")
+
+        with self.assertRaises(API.CircuitOpenError) as _ctx:
+            _api.get("a")
+
+        self.assertEqual(_ctx.exception.code, 0)
+        self.assertEqual(_api.web.get.call_count, 2)
+        self.assertEqual(self._registry.circuits(), {"test.url": {"state": "open", "opened": 1}})
+        self.assertEqual(self._registry.snapshot()[("HttpAPI", "GET", "a")]["codes"],
+                         {"ConnectionError": 2, "CircuitOpenError": 1})
+        self.assertIn('oc_cdtapi_circuit_open{breaker="test.url"} 1', self._registry.prometheus_text())
+
+    def test_client_errors(self):
+        _api = API.HttpAPI(root="http://test.url", circuit_breaker=API.CircuitBreaker(failure_threshold=1))
+        _resp = requests.Response()
+        _resp.status_code = 404
+        _api.web.get = MagicMock(return_value=_resp)
+
+        for _ in range(3):
+            with self.assertRaises(API.HttpAPIError):
+                _api.get("a")
+
+        self.assertEqual(_api.circuit_breaker.state, "closed")
+        _resp.status_code = 500
+
+        with self.assertRaises(API.HttpAPIError):
+            _api.get("a")
+
+        self.assertEqual(_api.circuit_breaker.state, "open")
+
+    def test_shared(self):
+        _api1 = API.HttpAPI(root="http://test.url/a", circuit_breaker=True)
+        _api2 = API.HttpAPI(root="http://test.url/b", circuit_breaker=True)
+        _api3 = API.HttpAPI(root="http://other.url", circuit_breaker=True)
+        self.assertIs(_api1.circuit_breaker, _api2.circuit_breaker)
+        self.assertIsNot(_api1.circuit_breaker, _api3.circuit_breaker)
+        self.assertEqual(_api1.circuit_breaker.name, "test.url")
+        self.assertEqual(_api1.circuit_breaker.failure_threshold, 5)
+        self.assertIsNone(API.HttpAPI(root="http://test.url").circuit_breaker)
+
+    @patch.dict("os.environ", {"CIRCUITTEST_URL": "http://test.url", "CIRCUITTEST_CIRCUIT_BREAKER": "true"})
+    def test_environment(self):
+        class _CircuitTestAPI(API.HttpAPI):
+            _env_prefix = "CIRCUITTEST"
+            circuit_breaker_settings = dict(failure_threshold=2, cooldown=5)
+
+        _api = _CircuitTestAPI()
+        self.assertEqual((_api.circuit_breaker.failure_threshold, _api.circuit_breaker.cooldown), (2, 5))
+        self.assertIsNone(_CircuitTestAPI(circuit_breaker=False).circuit_breaker)
+
+
+class TestUploadStream(unittest.TestCase):
+    _data = bytes(range(256)) * 10
+
+    def _progress(self, sent, length):
+        self._calls.append((sent, length))
+
+    def setUp(self):
+        self._calls = list()
+
+    def test_bytes(self):
+        _stream = API.UploadStream(self._data, chunk_size=1000, progress=self._progress)
+        self.assertEqual(len(_stream), len(self._data))
+        self.assertEqual(b"".join(_stream), self._data)
+        self.assertEqual(self._calls, [(1000, 2560), (2000, 2560), (2560, 2560)])
+
+        # rewind for retry
+        _stream.seek(0)
+        self.assertEqual(_stream.read(), self._data[:1000])
+
+    def test_path(self):
+        with tempfile.TemporaryDirectory() as _td:
+            _path = os.path.join(_td, "payload")
+
+            with open(_path, "wb") as _fd:
+                _fd.write(self._data)
+
+            _stream = API.UploadStream(path=_path, chunk_size=2048)
+            self.assertEqual(len(_stream), len(self._data))
+            self.assertEqual(list(map(len, _stream)), [2048, 512])
+            _stream.close()
+
+    def test_iterator(self):
+        _stream = API.UploadStream(iter([b"abc", "def"]), progress=self._progress)
+        # unknown length makes 'requests' use chunked encoding
+        self.assertEqual(len(_stream), 0)
+        self.assertTrue(_stream)
+        self.assertFalse(_stream.seekable())
+        self.assertEqual(b"".join(_stream), b"abcdef")
+        self.assertEqual(self._calls, [(3, None), (6, None)])
+
+        with self.assertRaises(io.UnsupportedOperation):
+            _stream.seek(0)
+
+    def test_no_data(self):
+        with self.assertRaises(ValueError):
+            API.UploadStream()
+
+    def test_upload_stream(self):
+        _api = API.HttpAPI(root="http://test.url")
+        _api.web.post = MagicMock(return_value=MagicMock(status_code=201))
+        _api.upload_stream("resource", self._data, method="post", chunk_size=1024, progress=self._progress,
+                           headers={"Content-Type": "application/binary"})
+        _args, _kvarg = _api.web.post.call_args
+        self.assertEqual(_args, ("http://test.url/resource",))
+        self.assertIsInstance(_kvarg["data"], API.UploadStream)
+        self.assertEqual(_kvarg["data"].chunk_size, 1024)
+        self.assertEqual(_kvarg["headers"], {"Content-Type": "application/binary"})
+
+
+class _InterruptedStream(io.BytesIO):
+    """
+    Stream failing with network error after given number of bytes
+    """
+    def __init__(self, data, fail_after):
+        super(_InterruptedStream, self).__init__(data)
+        self._fail_after = fail_after
+
+    def read(self, size=-1):
+        if self.tell() >= self._fail_after:
+            raise urllib3.exceptions.ProtocolError("Connection broken")
+
+        return super(_InterruptedStream, self).read(min(size, self._fail_after - self.tell()) if size > 0 else
+                                                    self._fail_after - self.tell())
+
+
+class TestHttpAPIDownload(unittest.TestCase):
+    _data = bytes(range(256)) * 40
+
+    def setUp(self):
+        self._api = API.HttpAPI(root="http://test.url")
+        self._api.web.head = MagicMock(side_effect=self._head)
+        self._api.web.get = MagicMock(side_effect=self._get)
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._tmpdir.name, "resource")
+        self._fail_after = None
+        self._responses = list()
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def _head(self, url, **kvarg):
+        return MagicMock(status_code=200, headers={"Content-Length": str(len(self._data)), "Accept-Ranges": "bytes"})
+
+    def _get(self, url, headers=None, **kvarg):
+        _range = (headers or {}).get("Range")
+        _first, _last = 0, len(self._data) - 1
+
+        if _range:
+            _first, _last = _range.split("=")[1].split("-")
+            _first, _last = int(_first), int(_last) if _last else len(self._data) - 1
+
+        _data = self._data[_first:_last + 1]
+
+        if self._fail_after is not None:
+            _raw, self._fail_after = _InterruptedStream(_data, self._fail_after), None
+        else:
+            _raw = io.BytesIO(_data)
+
+        self._responses.append(MagicMock(status_code=206 if _range else 200, raw=_raw))
+        return self._responses[-1]
+
+    def _read(self):
+        with open(self._path, "rb") as _fd:
+            return _fd.read()
+
+    def test_download(self):
+        self._api.download_file("resource", self._path)
+        self.assertEqual(self._read(), self._data)
+        self._api.web.get.assert_called_once_with("http://test.url/resource", params=None, data=None, files=None,
+                                                  headers={}, stream=True)
+
+    def test_resume_partial(self):
+        with open(self._path, "wb") as _fd:
+            _fd.write(self._data[:1000])
+
+        self._api.download_file("resource", self._path)
+        self.assertEqual(self._read(), self._data)
+        self.assertEqual(self._api.web.get.call_args[1]["headers"], {"Range": "bytes=1000-"})
+
+    def test_no_resume(self):
+        with open(self._path, "wb") as _fd:
+            _fd.write(b"garbage")
+
+        self._api.download_file("resource", self._path, resume=False)
+        self.assertEqual(self._read(), self._data)
+        self.assertEqual(self._api.web.get.call_args[1]["headers"], {})
+
+    def test_complete(self):
+        with open(self._path, "wb") as _fd:
+            _fd.write(self._data)
+
+        self._api.download_file("resource", self._path)
+        self._api.web.get.assert_not_called()
+
+    def test_interrupted(self):
+        self._fail_after = 3000
+        self._api.download_file("resource", self._path)
+        self.assertEqual(self._read(), self._data)
+        self.assertEqual(self._api.web.get.call_count, 2)
+        self.assertEqual(self._api.web.get.call_args[1]["headers"], {"Range": "bytes=3000-"})
+        # interrupted response releases its connection too
+        self.assertEqual([x.close.call_count for x in self._responses], [1, 1])
+
+    def test_interrupted_attempts_exceeded(self):
+        self._fail_after = 3000
+
+        with self.assertRaises(urllib3.exceptions.ProtocolError):
+            self._api.download_file("resource", self._path, attempts=1)
+
+        self._responses[0].close.assert_called_once_with()
+
+    def test_segments(self):
+        self._api.download_file("resource", self._path, segments=4)
+        self.assertEqual(self._read(), self._data)
+        self.assertEqual(sorted(map(lambda x: x[1]["headers"]["Range"], self._api.web.get.call_args_list)),
+                         ["bytes=0-2559", "bytes=2560-5119", "bytes=5120-7679", "bytes=7680-10239"])
+        self.assertEqual(os.listdir(self._tmpdir.name), ["resource"])
+        self.assertEqual([x.close.call_count for x in self._responses], [1] * 4)
+
+    def test_segments_resume(self):
+        with open(self._path + ".part1", "wb") as _fd:
+            _fd.write(self._data[2560:3000])
+
+        self._api.download_file("resource", self._path, segments=4)
+        self.assertEqual(self._read(), self._data)
+        self.assertIn("bytes=3000-5119", map(lambda x: x[1]["headers"]["Range"], self._api.web.get.call_args_list))
+
+    def test_ranges_not_supported(self):
+        self._api.web.head = MagicMock(return_value=MagicMock(status_code=200, headers={}))
+
+        with open(self._path, "wb") as _fd:
+            _fd.write(b"garbage")
+
+        self._api.download_file("resource", self._path, segments=4)
+        self.assertEqual(self._read(), self._data)
+        self._api.web.get.assert_called_once()
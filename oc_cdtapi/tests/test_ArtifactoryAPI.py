@@ -7,6 +7,7 @@ if version_info.major == 2:
 else:
     from unittest import mock
 
+import hashlib
 import posixpath
 import os
 import tempfile
@@ -393,6 +394,64 @@ class ArtifactoryAPITestSuite(TestCase):
         self.api.web.put.assert_called_once_with(_expected_put, data=b'HELLO, WORLD!!!', files=None, headers=self.put_headers, params=None)
         self.api.update_metadata.assert_not_called()
 
+    def test_upload_dedup(self):
+        _ret = mock.MagicMock()
+        _ret.status_code = 201
+        self.api.web.put = mock.MagicMock(return_value=_ret)
+        res = self.api.upload('a.b.c.d:artifact:1.1', repo='id', data=b'HELLO, WORLD!!!', dedup=True)
+        self.assertEqual(res, _ret)
+        _expected_put = posixpath.join(_af_url, 'id', 'a', 'b', 'c', 'd', 'artifact', '1.1', 'artifact-1.1.jar')
+        _expected_headers = {'Content-Type': 'application/binary', 'X-Checksum-Deploy': 'true',
+                             'X-Checksum-Sha1': hashlib.sha1(b'HELLO, WORLD!!!').hexdigest(),
+                             'X-Checksum-Sha256': hashlib.sha256(b'HELLO, WORLD!!!').hexdigest()}
+        self.api.web.put.assert_called_once_with(_expected_put, data=None, files=None, headers=_expected_headers, params=None)
+
+    def test_upload_dedup_unknown(self):
+        _ret_404 = mock.MagicMock()
+        _ret_404.status_code = 404
+        _ret = mock.MagicMock()
+        _ret.status_code = 201
+        self.api.web.put = mock.MagicMock(side_effect=[_ret_404, _ret])
+
+        with tempfile.TemporaryFile() as _fl:
+            _fl.write(b'HELLO, WORLD!!!')
+            _fl.seek(0)
+            res = self.api.upload('a.b.c.d:artifact:1.1', repo='id', data=_fl, dedup=True)
+            self.assertEqual(res, _ret)
+            self.assertEqual(self.api.web.put.call_count, 2)
+            _args, _kvarg = self.api.web.put.call_args
+            self.assertIs(_kvarg["data"], _fl)
+            # file is rewound after checksum calculation
+            self.assertEqual(_fl.tell(), 0)
+            self.assertNotIn('X-Checksum-Deploy', _kvarg["headers"])
+            self.assertEqual(_kvarg["headers"]['X-Checksum-Sha1'], hashlib.sha1(b'HELLO, WORLD!!!').hexdigest())
+
+    def test_upload_progress(self):
+        _ret = mock.MagicMock()
+        _ret.status_code = 201
+        _sent = list()
+
+        def _put(url, data=None, **kvarg):
+            _sent.append(b"".join(data))
+            return _ret
+
+        self.api.web.put = mock.MagicMock(side_effect=_put)
+        _progress = mock.MagicMock()
+        res = self.api.upload('a.b.c.d:artifact:1.1', repo='id', data=b'HELLO, WORLD!!!', chunk_size=5, progress=_progress)
+        self.assertEqual(res, _ret)
+        self.assertEqual(_sent, [b'HELLO, WORLD!!!'])
+        self.assertEqual(_progress.call_args_list, [mock.call(5, 15), mock.call(10, 15), mock.call(15, 15)])
+
+    def test_upload_dedup_error(self):
+        _ret = mock.MagicMock()
+        _ret.status_code = 403
+        self.api.web.put = mock.MagicMock(return_value=_ret)
+
+        with self.assertRaises(NexusAPI.NexusAPIError):
+            self.api.upload('a.b.c.d:artifact:1.1', repo='id', data=b'HELLO, WORLD!!!', dedup=True)
+
+        self.assertEqual(self.api.web.put.call_count, 1)
+
     # metadata updating is supported for Nexus only
     @mock.patch.dict("os.environ", {"MVN_URL": _af_url, "MVN_UPLOAD_REPO": "upload"})
     def test_updatemeta_general_env(self):
@@ -482,6 +541,24 @@ class ArtifactoryAPITestSuite(TestCase):
         _expected_get = posixpath.join(_af_url, "api", "storage", "maven-virtual", NexusAPI.gav_to_path(_gav))
         self.api.web.get.assert_called_once_with(_expected_get, data=None, files=None, headers=None, params=_expected_parms)
 
+    def test_exists_many_search(self):
+        self.api.web = ArtifactoryAPILsMock(_af_url)
+        self.api.web.get = mock.MagicMock(wraps=self.api.web.get)
+        self.api.web.head = mock.MagicMock(wraps=self.api.web.head)
+        _existent = ["test.group.0.id:artifact-0:0.0.0:zip:cl", "test.group.0.id:artifact-0:1.2.1:jar",
+                     "test.group.0.id:artifact-0:0.0.0:rpm:vx"]
+        _nonexistent = ["surely.not.existent:artifact:9.0.9:zip"]
+        _expected = dict(list(map(lambda x: (x, True), _existent)) + list(map(lambda x: (x, False), _nonexistent)))
+
+        self.assertEqual(self.api.exists_many(_existent + _nonexistent, search=True), _expected)
+        # one search for each groupId:artifactId, direct check for not found only
+        self.assertEqual(self.api.web.get.call_count, 2)
+        self.assertEqual(self.api.web.head.call_count, len(_nonexistent))
+        self.api.web.get.assert_any_call(
+                posixpath.join(_af_url, "api", "search", "gavc"),
+                params={"g": "test.group.0.id", "a": "artifact-0", "repos": "maven-virtual"},
+                data=None, files=None, headers={"X-Result-Detail": "info"})
+
     def test_ls_nothing(self):
         self.api.web = ArtifactoryAPILsMock(_af_url)
         self.assertEqual(0, len(self.api.ls("surely.not.existent:artifact:9.0.9:zip")))
@@ -557,6 +634,48 @@ class ArtifactoryAPITestSuite(TestCase):
             self.assertNotEqual(_gg.get('p'), 'zip')
             self.assertIsNone(_rfl.search(_art))
 
+    def test_ls_aql(self):
+        self.api.web = ArtifactoryAPILsMock(_af_url)
+
+        for _gav, _filter in [("test.group.1.id", None), ("test.group.1.id:artifact-2", None),
+                              ("test.group.2.id:::zip", 'artifact-[0-9]+:[^:]+:zip'), ("test.group.1.id:artifact-2:0.0.0:jar:cl", None),
+                              ("test.group.1.id:artifact-2:0.0.0:jar", None), ("surely.not.existent:artifact:9.0.9:zip", None),
+                              ("test.group.*.id:artifact-2:*.0.0:jar", None), ("test.group.1.id:artifact-*:1.2.1:zip:cl", None)]:
+            self.api.artifactory_aql = False
+            _expected = sorted(self.api.ls(_gav, filter=_filter))
+            self.assertEqual(bool(_expected), not _gav.startswith("surely"))
+            self.api.artifactory_aql = True
+            self.assertEqual(sorted(self.api.ls(_gav, filter=_filter)), _expected)
+            self.assertEqual(sorted(self.api.iter_ls(_gav, filter=_filter, page_size=7)), _expected)
+
+    def test_ls_aql_query(self):
+        self.api.web = ArtifactoryAPILsMock(_af_url)
+        self.api.web.post = mock.MagicMock(wraps=self.api.web.post)
+        self.api.artifactory_aql = True
+        _ls = list(self.api.iter_ls("test.group.1.id:artifact-2:0.0.0:zip", repo="public", page_size=2))
+        self.assertEqual(sorted(_ls), ["test.group.1.id:artifact-2:0.0.0:zip", "test.group.1.id:artifact-2:0.0.0:zip:cl",
+                                       "test.group.1.id:artifact-2:0.0.0:zip:vx"])
+        # one query per page, filters are sent to server
+        self.assertEqual(self.api.web.post.call_count, 2)
+        _args, _kvarg = self.api.web.post.call_args
+        self.assertEqual(_args, (posixpath.join(_af_url, "api", "search", "aql"),))
+        self.assertTrue(_kvarg["data"].endswith(".offset(2).limit(2)"))
+        self.assertIn('{"repo": "public"}', _kvarg["data"])
+        self.assertIn('{"path": {"$match": "test/group/1/id/artifact-2/0.0.0"}}', _kvarg["data"])
+        self.assertIn('{"name": {"$match": "artifact-2-0.0.0*.zip"}}', _kvarg["data"])
+
+    def test_ls_aql_fallback(self):
+        self.api.web = ArtifactoryAPILsMock(_af_url)
+        _ret = mock.MagicMock()
+        _ret.status_code = 403
+        self.api.web.post = mock.MagicMock(return_value=_ret)
+        self.api.artifactory_aql = True
+        _gav = "test.group.1.id:artifact-2:0.0.0"
+        _ls = sorted(self.api.ls(_gav))
+        self.api.artifactory_aql = False
+        self.assertEqual(_ls, sorted(self.api.ls(_gav)))
+        self.assertEqual(len(_ls), 12)
+
     def test_gav_url(self):
         self.assertEqual(self.api.gav_get_url('groupId:artifactId:version:packaging'), 
                 posixpath.join(_af_url, "maven-virtual", "groupId",
@@ -0,0 +1,355 @@
+import asyncio
+import io
+import os
+import posixpath
+import socket
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import requests
+
+from oc_cdtapi import AsyncAPI, NexusAPI
+from oc_cdtapi.API import HttpAPIError
+from oc_cdtapi import TestServer
+from oc_cdtapi.HttpCache import MemoryCache
+from oc_cdtapi.tests.test_Transport import _Server as _ScriptedServer
+
+import logging
+logging.getLogger().propagate = False
+logging.getLogger().disabled = True
+
+_nexus_url = "http://127.0.0.1:8081/nexus"
+
+
+def _response(status_code=200, content=b''):
+    _resp = mock.MagicMock()
+    _resp.status_code = status_code
+    _resp.content = content
+    _resp.url = "http://test.url"
+    return _resp
+
+
+def _free_port():
+    with socket.socket() as _sock:
+        _sock.bind(('127.0.0.1', 0))
+        return _sock.getsockname()[1]
+
+
+class _Server(object):
+    """
+    TestServer running in a thread to serve given number of requests
+    """
+
+    def __init__(self, num_requests=1, rc=200, data=None):
+        self.port = _free_port()
+        self.url = 'http://127.0.0.1:%d' % self.port
+        self._srv = TestServer.test_server(self.port, rc=rc, data=data)
+        self._thread = threading.Thread(
+            target=lambda: [self._srv.handle_request() for _ in range(num_requests)], daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._thread.join(5)
+        self._srv.server_close()
+
+
+class AsyncHttpAPIThreadTestSuite(unittest.TestCase):
+
+    @mock.patch('requests.Session')
+    def setUp(self, session_mock):
+        self.api = AsyncAPI.AsyncHttpAPI(root="http://test.url", backend="thread")
+
+    def test_backend_validation(self):
+        with self.assertRaises(ValueError):
+            AsyncAPI.AsyncHttpAPI(root="http://test.url", backend="unknown")
+
+    @mock.patch.dict("os.environ", {"ASYNCTEST_URL": "http://env.url"})
+    def test_env_prefix(self):
+        class _AsyncTestAPI(AsyncAPI.AsyncHttpAPI):
+            _env_prefix = "ASYNCTEST"
+
+        _api = _AsyncTestAPI(backend="thread")
+        self.assertEqual(_api.root, "http://env.url")
+        self.assertEqual(_api.re("a/b"), "http://env.url/a/b")
+
+    def test_methods(self):
+        for _method in ["get", "post", "put", "delete", "head"]:
+            setattr(self.api.web, _method, mock.MagicMock(return_value=_response()))
+            _resp = asyncio.run(getattr(self.api, _method)("request", params={"a": "b"}))
+            self.assertEqual(_resp.status_code, 200)
+            getattr(self.api.web, _method).assert_called_once_with(
+                "http://test.url/request", params={"a": "b"}, data=None, files=None, headers=None)
+
+    def test_error(self):
+        self.api.web.get = mock.MagicMock(return_value=_response(404))
+
+        with self.assertRaises(HttpAPIError) as _ctx:
+            asyncio.run(self.api.get("request"))
+
+        self.assertEqual(_ctx.exception.code, 404)
+
+    def test_download_file(self):
+        _data = b"hello, world!"
+
+        for _backend in ["thread", "aiohttp"] if AsyncAPI.aiohttp is not None else ["thread"]:
+            _api = AsyncAPI.AsyncHttpAPI(root="http://test.url", backend=_backend)
+            _head = _response()
+            _head.headers = {"Content-Length": str(len(_data))}
+            _get = _response()
+            _get.raw = io.BytesIO(_data)
+            _api.web.head = mock.MagicMock(return_value=_head)
+            _api.web.get = mock.MagicMock(return_value=_get)
+
+            with tempfile.TemporaryDirectory() as _tmpdir:
+                _path = os.path.join(_tmpdir, "resource")
+                self.assertIs(asyncio.run(_api.download_file("resource", _path)), _head)
+
+                with open(_path, "rb") as _fd:
+                    self.assertEqual(_fd.read(), _data)
+
+            _api.web.get.assert_called_once_with("http://test.url/resource", params=None, data=None, files=None,
+                                                 headers={}, stream=True)
+            _get.close.assert_called_once_with()
+
+    def test_iter_json(self):
+        async def _collect(api, limit=None):
+            _result = list()
+
+            async for _item in api.iter_json("hosts", params={"per_page": 5}, batch_size=2):
+                _result.append(_item)
+
+                if len(_result) == limit:
+                    break
+
+            return _result
+
+        for _backend in ["thread", "aiohttp"] if AsyncAPI.aiohttp is not None else ["thread"]:
+            _api = AsyncAPI.AsyncHttpAPI(root="http://test.url", backend=_backend)
+            _get = _response()
+            _get._content = False
+            _get.encoding = None
+            _get.raw = io.BytesIO(b'{"total": 5, "results": [{"id": 1}, {"id": 2}, {"id": 3}, {"id": 4}, {"id": 5}]}')
+            _api.web.get = mock.MagicMock(return_value=_get)
+
+            self.assertEqual(asyncio.run(_collect(_api)), [{"id": _i} for _i in range(1, 6)])
+            _api.web.get.assert_called_once_with("http://test.url/hosts", params={"per_page": 5}, data=None,
+                                                 files=None, headers=None, stream=True)
+            _get.close.assert_called_once_with()
+
+            # consumer stops early: response is closed anyway
+            _get.raw.seek(0)
+            _get.close.reset_mock()
+            self.assertEqual(asyncio.run(_collect(_api, limit=1)), [{"id": 1}])
+            _get.close.assert_called_once_with()
+
+    def test_upload_stream(self):
+        for _backend in ["thread", "aiohttp"] if AsyncAPI.aiohttp is not None else ["thread"]:
+            _api = AsyncAPI.AsyncHttpAPI(root="http://test.url", backend=_backend)
+            _sent = list()
+            _api.web.put = mock.MagicMock(side_effect=lambda *args, data=None, **kvarg: _sent.append(
+                b''.join(data)) or _response())
+            _bio = io.BytesIO(b"file data")
+
+            self.assertEqual(asyncio.run(_api.upload_stream("resource", data=_bio, chunk_size=4)).status_code, 200)
+            self.assertEqual(_sent, [b"file data"])
+            _api.web.put.assert_called_once_with("http://test.url/resource", params=None, data=mock.ANY, files=None,
+                                                 headers=None)
+
+    def test_sync_twin(self):
+        _sync = self.api._sync()
+        self.assertIs(_sync, self.api._sync())
+        self.assertIs(_sync.web, self.api.web)
+        self.assertIsInstance(_sync, AsyncAPI.AsyncHttpAPI)
+        self.assertFalse(asyncio.iscoroutinefunction(_sync.get))
+
+    def test_concurrent(self):
+        self.api.web.head = mock.MagicMock(return_value=_response())
+
+        async def _run():
+            return await asyncio.gather(*[self.api.head("request/%d" % _i) for _i in range(50)])
+
+        self.assertEqual(len(asyncio.run(_run())), 50)
+        self.assertEqual(self.api.web.head.call_count, 50)
+
+
+@unittest.skipIf(AsyncAPI.aiohttp is None, "aiohttp is not installed")
+class AsyncHttpAPIAiohttpTestSuite(unittest.TestCase):
+
+    async def _call(self, api, method, *args, **kvarg):
+        async with api:
+            return await getattr(api, method)(*args, **kvarg)
+
+    def test_get(self):
+        with _Server(data="hello, world!") as _srv:
+            _api = AsyncAPI.AsyncHttpAPI(root=_srv.url, backend="aiohttp")
+            _resp = asyncio.run(self._call(_api, "get", "getrequest"))
+
+        self.assertEqual(_resp.status_code, 200)
+        self.assertEqual(_resp.content, b"hello, world!")
+        self.assertEqual(_resp.text, "hello, world!")
+
+    def test_get_write_to(self):
+        _bio = io.BytesIO()
+
+        with _Server(data="hello, world!") as _srv:
+            _api = AsyncAPI.AsyncHttpAPI(root=_srv.url, backend="aiohttp")
+            asyncio.run(self._call(_api, "get", "getrequest", stream=True, write_to=_bio))
+
+        self.assertEqual(_bio.getvalue(), b"hello, world!")
+
+    def test_timeout(self):
+        _api = AsyncAPI.AsyncHttpAPI(root="http://test.url", backend="aiohttp", stream_deadline=600)
+        _timeout = _api._aiohttp_timeout()
+        self.assertEqual((_timeout.total, _timeout.connect, _timeout.sock_read), (None, 10, 120))
+        _timeout = _api._aiohttp_timeout(5, 60)
+        self.assertEqual((_timeout.total, _timeout.connect, _timeout.sock_read), (60, 5, 5))
+
+    def test_error(self):
+        _bio = io.BytesIO()
+
+        with _Server(rc=404) as _srv:
+            _api = AsyncAPI.AsyncHttpAPI(root=_srv.url, backend="aiohttp")
+
+            with self.assertRaises(HttpAPIError) as _ctx:
+                asyncio.run(self._call(_api, "get", "getrequest", stream=True, write_to=_bio))
+
+        self.assertEqual(_ctx.exception.code, 404)
+        self.assertEqual(_bio.getvalue(), b"")
+
+
+    def test_retry(self):
+        with _ScriptedServer([(503, b''), (502, b'')]) as _srv:
+            _api = AsyncAPI.AsyncHttpAPI(root=_srv.url, backend="aiohttp", retry_policy={"backoff_factor": 0})
+            _resp = asyncio.run(self._call(_api, "get", "a"))
+
+        self.assertEqual(_resp.content, b"hello, world!")
+        self.assertEqual(len(_srv.received), 3)
+
+    def test_retry_exhausted(self):
+        with _ScriptedServer([(503, b'')] * 3) as _srv:
+            _api = AsyncAPI.AsyncHttpAPI(root=_srv.url, backend="aiohttp",
+                                         retry_policy={"total": 2, "backoff_factor": 0})
+
+            with self.assertRaises(HttpAPIError) as _ctx:
+                asyncio.run(self._call(_api, "get", "a"))
+
+        self.assertEqual(_ctx.exception.code, 503)
+        self.assertEqual(len(_srv.received), 3)
+
+    def test_post_not_retried(self):
+        with _ScriptedServer([(503, b'')]) as _srv:
+            _api = AsyncAPI.AsyncHttpAPI(root=_srv.url, backend="aiohttp", retry_policy={"backoff_factor": 0})
+
+            with self.assertRaises(HttpAPIError):
+                asyncio.run(self._call(_api, "post", "a", data=b"payload"))
+
+        self.assertEqual(len(_srv.received), 1)
+
+    def test_connection_error(self):
+        _api = AsyncAPI.AsyncHttpAPI(root="http://127.0.0.1:%d" % _free_port(), backend="aiohttp",
+                                     retry_policy={"total": 1, "backoff_factor": 0})
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            asyncio.run(self._call(_api, "get", "a"))
+
+    def test_cache(self):
+        with _ScriptedServer() as _srv:
+            _api = AsyncAPI.AsyncHttpAPI(root=_srv.url, backend="aiohttp", cache=MemoryCache(), cache_ttl=60)
+
+            async def _run():
+                async with _api:
+                    return [await _api.get("a"), await _api.get("a"), await _api.get("a", cache_ttl=0)]
+
+            _responses = asyncio.run(_run())
+
+        self.assertEqual([x.content for x in _responses], [b"hello, world!"] * 3)
+        self.assertEqual(len(_srv.received), 2)
+        self.assertEqual(_api.cache_stats()["hits"], 1)
+
+    def test_cache_invalidate(self):
+        with _ScriptedServer([(200, b"old"), (200, b""), (200, b"new")]) as _srv:
+            _api = AsyncAPI.AsyncHttpAPI(root=_srv.url, backend="aiohttp", cache=MemoryCache(), cache_ttl=60)
+
+            async def _run():
+                async with _api:
+                    _first = await _api.get("a/b")
+                    await _api.put("a/b", data=b"new")
+                    return [_first, await _api.get("a/b")]
+
+            _responses = asyncio.run(_run())
+
+        self.assertEqual([x.content for x in _responses], [b"old", b"new"])
+        self.assertEqual([x[:2] for x in _srv.received], [("GET", "/a/b"), ("PUT", "/a/b"), ("GET", "/a/b")])
+
+
+class AsyncNexusAPITestSuite(unittest.TestCase):
+
+    @mock.patch.dict("os.environ", {"MVN_URL": _nexus_url})
+    @mock.patch('requests.Session')
+    def setUp(self, session_mock):
+        self.api = NexusAPI.AsyncNexusAPI(backend="thread")
+
+    def test_shared_session(self):
+        self.assertIs(self.api.web, self.api.sync.web)
+        self.assertTrue(self.api.sync.is_nexus)
+
+    def test_exists(self):
+        self.api.web.head = mock.MagicMock(side_effect=[_response(200), _response(404)])
+        self.assertTrue(asyncio.run(self.api.exists("g:a:v:p")))
+        self.assertFalse(asyncio.run(self.api.exists("g:a:v:p")))
+        self.api.web.head.assert_called_with(
+            posixpath.join(_nexus_url, "content", "repositories", "public", NexusAPI.gav_to_path("g:a:v:p")),
+            params=None, data=None, files=None, headers=None)
+
+    def test_cat(self):
+        self.api.web.get = mock.MagicMock(return_value=_response(200, b"test_response"))
+        self.assertEqual(asyncio.run(self.api.cat("g:a:v:p", repo="download")), "test_response")
+        self.api.web.get.assert_called_once_with(
+            posixpath.join(_nexus_url, "content", "repositories", "download", NexusAPI.gav_to_path("g:a:v:p")),
+            params=None, data=None, files=None, headers=None, stream=False)
+
+    def test_info(self):
+        self.api.web.get = mock.MagicMock(return_value=_response(
+            200, b"<data><data><md5Hash>abcdef</md5Hash><mimeType>application/zip</mimeType></data></data>"))
+        self.assertEqual(asyncio.run(self.api.info("g:a:v:p")), {"md5": "abcdef", "mime": "application/zip"})
+
+    def test_ls(self):
+        with mock.patch.object(self.api.sync, "ls", return_value=["g:a:v:p"]) as _ls:
+            self.assertEqual(asyncio.run(self.api.ls("g:a:v")), ["g:a:v:p"])
+
+        _ls.assert_called_once_with("g:a:v", repo=None, filter=None, filter_revert=False)
+
+    def test_upload(self):
+        self.api.web.put = mock.MagicMock(return_value=_response(201))
+        _resp = asyncio.run(self.api.upload("g:a:v:p", repo="upload", data=b"data"))
+        self.assertEqual(_resp.status_code, 201)
+        self.api.web.put.assert_called_once_with(
+            posixpath.join(_nexus_url, "content", "repositories", "upload", NexusAPI.gav_to_path("g:a:v:p")),
+            params=None, data=b"data", files=None, headers={'Content-Type': 'application/binary'})
+
+
+@unittest.skipIf(AsyncAPI.aiohttp is None, "aiohttp is not installed")
+class AsyncNexusAPIAiohttpTestSuite(unittest.TestCase):
+
+    async def _call(self, api, method, *args, **kvarg):
+        async with api:
+            return await getattr(api, method)(*args, **kvarg)
+
+    def test_exists(self):
+        with _Server(rc=200) as _srv:
+            _api = NexusAPI.AsyncNexusAPI(root=_srv.url + "/nexus", backend="aiohttp")
+            self.assertTrue(asyncio.run(self._call(_api, "exists", "g:a:v:p")))
+
+        with _Server(rc=404) as _srv:
+            _api = NexusAPI.AsyncNexusAPI(root=_srv.url + "/nexus", backend="aiohttp")
+            self.assertFalse(asyncio.run(self._call(_api, "exists", "g:a:v:p")))
+
+    def test_cat(self):
+        with _Server(data="artifact data") as _srv:
+            _api = NexusAPI.AsyncNexusAPI(root=_srv.url + "/artifactory", backend="aiohttp")
+            self.assertEqual(asyncio.run(self._call(_api, "cat", "g:a:v:p", binary=True)), b"artifact data")
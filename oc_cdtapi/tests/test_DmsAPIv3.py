@@ -1,7 +1,23 @@
+import io
+import json
 import unittest
 import unittest.mock
+
+import requests
+
 from ..DmsAPI import DmsAPIv3
 
+
+def _streamed(data):
+    """
+    Streamed response with JSON body not read yet
+    """
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.raw = io.BytesIO(json.dumps(data).encode('utf-8'))
+    return resp
+
+
 class TestDmsApiV3(unittest.TestCase):
     def setUp(self):
         self._dms = DmsAPIv3(root="httsp://dms.example.com", user="test_user", auth="test_auth")
@@ -81,3 +97,14 @@ class TestDmsApiV3(unittest.TestCase):
             "components", "component", "versions", "version", "artifacts", "1"])
         _ret.json.assert_called_once()
             
+
+    def test_iter_components(self):
+        self._dms.get.return_value = _streamed({"components": [{"id": "component"}]})
+        self.assertListEqual([{"id": "component"}], list(self._dms.iter_components()))
+        self._dms.get.assert_called_once_with('components', params=None, headers=None, stream=True)
+
+    def test_iter_artifacts(self):
+        self._dms.get.return_value = _streamed({"artifacts": ["1", "2", "3"]})
+        self.assertListEqual(["1", "2", "3"], list(self._dms.iter_artifacts('component', "version", "type")))
+        self._dms.get.assert_called_once_with(["components", "component", "versions", "version", "artifacts"],
+                                              params={"type": "type"}, headers=None, stream=True)
@@ -7,6 +7,7 @@ from unittest.mock import patch, MagicMock, call, PropertyMock
 from datetime import datetime, timedelta
 from collections import namedtuple
 from oc_cdtapi.ForemanAPI import ForemanAPI, ForemanAPIError
+from .mocks.StreamedResponse import streamed_response
 
 class _Response(object):
     """
@@ -737,4 +738,25 @@ class TestForemanAPI(unittest.TestCase):
         self.assertEqual(mock_get.call_count, 2)
 
         self.assertEqual(e.exception.code, 400)
-        self.assertIn("missing variables", e.exception.text)
\ No newline at end of file
+        self.assertIn("missing variables", e.exception.text)
+
+    @patch.object(ForemanAPI, 'get')
+    def test_iter_hosts(self, mock_get):
+        mock_total = MagicMock()
+        mock_total.json.return_value = {"total": 2, "results": [{"name": "host1"}]}
+        hosts = [{"name": "host1", "uuid": "uuid1"}, {"name": "host2", "uuid": "uuid2"}]
+        mock_get.side_effect = [mock_total, streamed_response({"total": 2, "results": hosts})]
+
+        self.assertEqual(list(self.api.iter_hosts({"search": "os=linux"})), hosts)
+        mock_get.assert_has_calls([call("hosts", params={"search": "os=linux", "per_page": 1}),
+                                   call("hosts", params={"search": "os=linux", "per_page": 2}, headers=None,
+                                        stream=True)])
+
+    @patch.object(ForemanAPI, 'get')
+    def test_get_hosts_uuids(self, mock_get):
+        mock_total = MagicMock()
+        mock_total.json.return_value = {"total": 3}
+        mock_get.side_effect = [mock_total, streamed_response({"total": 3, "results": [
+            {"name": "host1", "uuid": "uuid1"}, {"name": "host2", "uuid": "uuid2"}, {"name": "host3"}]})]
+
+        self.assertEqual(self.api.get_hosts_uuids_v1(["host2", "host4"]), {"host2": "uuid2"})
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import call, patch
+
+from oc_cdtapi import HttpCache
+
+
+def _entry(content=b"data"):
+    return HttpCache.CacheEntry(200, "http://test.url/a", {"Content-Type": "text/plain"}, "utf-8", content)
+
+
+class TestMemoryCache(unittest.TestCase):
+    def _cache(self, maxsize):
+        return HttpCache.MemoryCache(maxsize=maxsize)
+
+    def test_get_set(self):
+        _cache = self._cache(10)
+        self.assertIsNone(_cache.get("http://test.url/a"))
+        _cache.set("http://test.url/a", _entry(), 60)
+        self.assertEqual(_cache.get("http://test.url/a"), _entry())
+        self.assertEqual(_cache.stats(), {"hits": 1, "misses": 1, "size": 1, "maxsize": 10})
+
+    def test_ttl(self):
+        _cache = self._cache(10)
+        _cache.set("http://test.url/a", _entry(), -1)
+        self.assertIsNone(_cache.get("http://test.url/a"))
+        self.assertEqual(len(_cache), 0)
+
+    def test_lru(self):
+        _cache = self._cache(2)
+        _cache.set("a", _entry(b"a"), 60)
+        _cache.set("b", _entry(b"b"), 60)
+        _cache.get("a")
+        _cache.set("c", _entry(b"c"), 60)
+        self.assertIsNone(_cache.get("b"))
+        self.assertEqual(_cache.get("a").content, b"a")
+        self.assertEqual(_cache.get("c").content, b"c")
+
+    def test_invalidate(self):
+        _cache = self._cache(10)
+
+        for _key in ["http://test.url/a", "http://test.url/a/b", "http://test.url/c"]:
+            _cache.set(_key, _entry(), 60)
+
+        self.assertEqual(_cache.invalidate("http://test.url/a"), 2)
+        self.assertIsNotNone(_cache.get("http://test.url/c"))
+        self.assertEqual(_cache.invalidate(), 1)
+        self.assertEqual(len(_cache), 0)
+
+    def test_invalidate_segment(self):
+        _cache = self._cache(10)
+        _keys = ["http://test.url/foo/1", "http://test.url/foo/1/a", "http://test.url/foo/1?x=y",
+                 "http://test.url/foo/1\nuser\n[]", "http://test.url/foo/10", "http://test.url/foo/1a\nuser\n[]"]
+
+        for _key in _keys:
+            _cache.set(_key, _entry(), 60)
+
+        # 'foo/1' does not match 'foo/10'
+        self.assertEqual(_cache.invalidate("http://test.url/foo/1"), 4)
+        self.assertEqual(sorted(filter(lambda x: _cache.get(x) is not None, _keys)),
+                         ["http://test.url/foo/10", "http://test.url/foo/1a\nuser\n[]"])
+        self.assertEqual(_cache.invalidate("http://test.url/"), 2)
+
+
+class TestSqliteCache(TestMemoryCache):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._caches = []
+
+    def tearDown(self):
+        for _cache in self._caches:
+            _cache.close()
+
+        shutil.rmtree(self._dir)
+
+    def _cache(self, maxsize):
+        _cache = HttpCache.SqliteCache(os.path.join(self._dir, "cache.db"), maxsize=maxsize)
+        self._caches.append(_cache)
+        return _cache
+
+    def test_shared(self):
+        _first = self._cache(10)
+        _second = self._cache(10)
+        _first.set("http://test.url/a", _entry(), 60)
+        self.assertEqual(_second.get("http://test.url/a"), _entry())
+        _second.invalidate("http://test.url/")
+        self.assertIsNone(_first.get("http://test.url/a"))
+
+
+class TestMakeCache(unittest.TestCase):
+    def test_make_cache(self):
+        self.assertIsNone(HttpCache.make_cache(None))
+        self.assertIsNone(HttpCache.make_cache("off"))
+        self.assertIsInstance(HttpCache.make_cache(True), HttpCache.MemoryCache)
+        self.assertIsInstance(HttpCache.make_cache("memory"), HttpCache.MemoryCache)
+        _cache = HttpCache.MemoryCache()
+        self.assertIs(HttpCache.make_cache(_cache), _cache)
+
+        for _value in ["1", "true", "Yes", "on"]:
+            self.assertIsInstance(HttpCache.make_cache(_value), HttpCache.MemoryCache)
+
+        with patch.object(HttpCache, "SqliteCache") as _sqlite:
+            HttpCache.make_cache("/tmp/cache.db")
+            HttpCache.make_cache("sqlite:cache.db")
+            HttpCache.make_cache("./cache.db")
+
+        self.assertEqual(_sqlite.call_args_list, [call("/tmp/cache.db"), call("cache.db"), call("./cache.db")])
+
+        # bare word is not taken for file name
+        for _value in ["dummy_token", "cache.db"]:
+            with self.assertRaises(ValueError):
+                HttpCache.make_cache(_value)
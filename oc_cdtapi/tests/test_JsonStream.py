@@ -0,0 +1,131 @@
+import doctest
+import io
+import json
+import tracemalloc
+import unittest
+from unittest.mock import patch
+
+from .. import JsonStream
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(JsonStream))
+    return tests
+
+
+class _Listing(io.RawIOBase):
+    """
+    Foreman-like listing of hosts generated on the fly, never kept in memory as a whole
+    """
+
+    def __init__(self, count):
+        self._chunks = self.__chunks(count)
+        self._buffer = b''
+        self.size = 0
+
+    def __chunks(self, count):
+        yield b'{"total": %d, "subtotal": %d, "results": [' % (count, count)
+
+        for _i in range(count):
+            yield b'%s{"id": %d, "name": "host%d.example.com", "uuid": "%032x", "ip": "10.0.0.1"}' % (
+                b',' if _i else b'', _i, _i, _i)
+
+        yield b'], "page": 1}'
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer:
+            self._buffer = next(self._chunks, None)
+
+            if self._buffer is None:
+                self._buffer = b''
+                return 0
+
+        _size = min(len(b), len(self._buffer))
+        b[:_size] = self._buffer[:_size]
+        self._buffer = self._buffer[_size:]
+        self.size += _size
+        return _size
+
+
+class TestScanner(unittest.TestCase):
+    """
+    Standard library scanner, also used for documents not in UTF-8
+    """
+
+    def setUp(self):
+        _patcher = patch.object(JsonStream, 'ijson', None)
+        _patcher.start()
+        self.addCleanup(_patcher.stop)
+
+    def _items(self, data, path='item', chunk_size=1, encoding=None):
+        return list(JsonStream.iter_items(io.BytesIO(data), path, chunk_size, encoding))
+
+    def test_array(self):
+        _data = [1, -2.5e3, "абв \"quoted\"", True, None, {"a": [1, {}]}, [], 1234567890123]
+
+        # byte-by-byte reading splits numbers and multi-byte characters
+        for _chunk_size in [1, 2, 7, 1024]:
+            self.assertEqual(self._items(json.dumps(_data, ensure_ascii=False).encode('utf-8'), 'item', _chunk_size),
+                             _data)
+
+        self.assertEqual(self._items(b' [ ] '), [])
+        self.assertEqual(self._items(b'[1,\n 2 ,3]\n'), [1, 2, 3])
+
+    def test_path(self):
+        _data = json.dumps({"total": 2, "search": {"results": [0]}, "results": [{"id": 1, "tags": [{"n": "a"}]},
+                                                                                 {"id": 2, "tags": []}]}).encode('utf-8')
+        self.assertEqual(self._items(_data, 'results.item'), [{"id": 1, "tags": [{"n": "a"}]}, {"id": 2, "tags": []}])
+        self.assertEqual(self._items(_data, 'results.item.tags.item.n'), ["a"])
+        self.assertEqual(self._items(_data, 'total'), [2])
+        self.assertEqual(self._items(_data, ''), [json.loads(_data)])
+        self.assertEqual(self._items(_data, 'missing.item'), [])
+        self.assertEqual(self._items(_data, 'total.item'), [])
+        self.assertEqual(self._items(b'{"item": [1]}', 'item.item'), [1])
+
+    def test_encoding(self):
+        self.assertEqual(self._items('["а", 1]'.encode('utf-16'), encoding='utf-16'), ["а", 1])
+        self.assertEqual(self._items('["\xe9"]'.encode('latin-1'), encoding='ISO-8859-1'), ["\xe9"])
+
+    def test_malformed(self):
+        for _data in [b'', b'[1, 2', b'[1 2]', b'{"results": [1}', b'{1: 2}', b'[tru]']:
+            with self.assertRaises(ValueError):
+                self._items(_data, 'results.item' if _data.startswith(b'{') else 'item')
+
+    def test_lazy(self):
+        _fd = _Listing(1000)
+        _items = JsonStream.iter_items(_fd, 'results.item', 1024)
+        self.assertEqual(next(_items)['id'], 0)
+        self.assertLess(_fd.size, 2048)
+        self.assertEqual(sum(1 for _ in _items), 999)
+
+    def test_memory(self):
+        # 100k hosts are about 10 MB
+        _fd = _Listing(100000)
+        tracemalloc.start()
+
+        try:
+            _count = sum(1 for _ in JsonStream.iter_items(_fd, 'results.item', 64 * 1024))
+            _peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(_count, 100000)
+        self.assertGreater(_fd.size, 10 * 1024 * 1024)
+        self.assertLess(_peak, 2 * 1024 * 1024)
+
+
+@unittest.skipIf(JsonStream.ijson is None, "ijson is not installed")
+class TestIjson(TestScanner):
+
+    def setUp(self):
+        pass
+
+    def test_backend(self):
+        with patch.object(JsonStream, '_Scanner') as _scanner:
+            self.assertEqual(self._items(b'[1]'), [1])
+            self.assertEqual(self._items(b'[1]', encoding='UTF8'), [1])
+
+        _scanner.assert_not_called()
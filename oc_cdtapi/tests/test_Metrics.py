@@ -0,0 +1,102 @@
+import doctest
+import math
+import unittest
+from unittest.mock import MagicMock, call
+
+from oc_cdtapi import Metrics
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(Metrics))
+    return tests
+
+
+def _event(endpoint="a/{id}", seconds=0.2, status_code=200, error=None, **kvarg):
+    _event = Metrics.RequestEvent("TestAPI", "GET", "a/1", endpoint)
+    _event.seconds = seconds
+    _event.status_code = status_code
+    _event.error = error
+
+    for _key, _value in kvarg.items():
+        setattr(_event, _key, _value)
+
+    return _event
+
+
+class TestEndpointTemplate(unittest.TestCase):
+    def test_identifiers(self):
+        self.assertEqual(Metrics.endpoint_template(["hosts", "123", "facts"]), "hosts/{id}/facts")
+        self.assertEqual(Metrics.endpoint_template("jobs/0b1f6a50-8e44-4b8a-9a4c-1c2d3e4f5a6b?x=1"), "jobs/{id}")
+        self.assertEqual(Metrics.endpoint_template("blobs/" + "ab" * 20), "blobs/{id}")
+        self.assertEqual(Metrics.endpoint_template("api/v2/status"), "api/v2/status")
+
+    def test_templates(self):
+        _templates = {r"^repo/": "repo/{path}", r"^re": "re"}
+        self.assertEqual(Metrics.endpoint_template("repo/g/a/1", _templates), "repo/{path}")
+        self.assertEqual(Metrics.endpoint_template("rest/1", _templates), "re")
+
+
+class TestHistogram(unittest.TestCase):
+    def test_observe(self):
+        _histogram = Metrics.Histogram((0.1, 1.0, math.inf))
+
+        for _value in [0.05, 0.5, 0.7, 5]:
+            _histogram.observe(_value)
+
+        self.assertEqual(_histogram.snapshot(), {"count": 4, "sum": 6.25, "buckets": {0.1: 1, 1.0: 3, math.inf: 4}})
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self._registry = Metrics.MetricsRegistry(buckets=(0.1, 1.0, math.inf))
+        self._registry.after(_event(bytes_received=100, retries=1))
+        self._registry.after(_event(seconds=2.0, status_code=500, bytes_sent=10))
+        self._registry.after(_event(endpoint="b", seconds=0.05, status_code=None, error=ConnectionError()))
+
+    def test_snapshot(self):
+        _snapshot = self._registry.snapshot()
+        self.assertEqual(_snapshot[("TestAPI", "GET", "a/{id}")], {
+            "latency": {"count": 2, "sum": 2.2, "buckets": {0.1: 0, 1.0: 1, math.inf: 2}},
+            "bytes_sent": 10, "bytes_received": 100, "retries": 1, "codes": {"200": 1, "500": 1}})
+        self.assertEqual(_snapshot[("TestAPI", "GET", "b")]["codes"], {"ConnectionError": 1})
+
+    def test_top(self):
+        self.assertEqual(self._registry.top(1), [(("TestAPI", "GET", "a/{id}"), 2.2, 2)])
+
+    def test_prometheus_text(self):
+        _text = self._registry.prometheus_text(prefix="test")
+        self.assertIn('test_request_seconds_bucket{client="TestAPI",method="GET",endpoint="a/{id}",le="1.0"} 1\n',
+                      _text)
+        self.assertIn('test_request_seconds_bucket{client="TestAPI",method="GET",endpoint="b",le="+Inf"} 1\n',
+                      _text)
+        self.assertIn('test_request_seconds_count{client="TestAPI",method="GET",endpoint="a/{id}"} 2\n', _text)
+        self.assertIn('test_request_bytes_received_total{client="TestAPI",method="GET",endpoint="a/{id}"} 100\n',
+                      _text)
+        self.assertIn('test_responses_total{client="TestAPI",method="GET",endpoint="a/{id}",code="500"} 1\n', _text)
+
+    def test_reset(self):
+        self._registry.reset()
+        self.assertEqual(self._registry.snapshot(), {})
+
+
+class TestOpenTelemetryInstrument(unittest.TestCase):
+    def test_span(self):
+        _tracer = MagicMock()
+        _instrument = Metrics.OpenTelemetryInstrument(tracer=_tracer)
+        _event = Metrics.RequestEvent("TestAPI", "GET", "a/1", "a/{id}")
+        _instrument.before(_event)
+        _event.status_code = 404
+        _event.error = RuntimeError("not found")
+        _instrument.after(_event)
+
+        self.assertEqual(_tracer.start_span.call_args[0], ("GET a/{id}",))
+        _span = _tracer.start_span.return_value
+        _span.set_attribute.assert_has_calls([call("http.response.status_code", 404), call("oc_cdtapi.retries", 0)])
+        _span.record_exception.assert_called_once_with(_event.error)
+        _span.end.assert_called_once_with()
+        self.assertEqual(_event.context, {})
+
+    @unittest.skipIf(Metrics.otel_trace is not None, "opentelemetry is installed")
+    def test_not_installed(self):
+        with self.assertRaises(ValueError):
+            Metrics.OpenTelemetryInstrument()
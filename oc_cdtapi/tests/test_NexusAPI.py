@@ -7,6 +7,8 @@ if version_info.major == 2:
 else:
     from unittest import mock
 
+import hashlib
+import io
 import posixpath
 import os
 import tempfile
@@ -372,6 +374,126 @@ class NexusAPITestSuite(TestCase):
         self.api.web.put.assert_any_call(_expected_put + '.pom', data=pom_data_expected, files=None, headers=self.put_headers, params=None)
         self.api.update_metadata.assert_called_once_with('a.b.c.d', 'id')
 
+    def test_upload_many(self):
+        _gavs = ['a.b:artifact:1.1:zip', 'a.b:artifact:1.1:zip:classifier', 'a.b:other:1.0:jar', 'c.d:artifact:2.0:zip']
+        _ret = mock.MagicMock()
+        _ret.status_code = 201
+        self.api.web.put = mock.MagicMock(return_value=_ret)
+        self.api.exists_many = mock.MagicMock(side_effect=lambda gavs, **kvarg: dict(
+            map(lambda x: (x, x.startswith('a.b:other')), gavs)))
+        self.api.web.delete = mock.MagicMock(return_value=_ret)
+
+        with tempfile.TemporaryDirectory() as _td:
+            _files = list()
+
+            for _gav in _gavs:
+                _files.append((_gav, os.path.join(_td, NexusAPI.gav_to_filename(_gav))))
+
+                with open(_files[-1][1], 'wb') as _fl:
+                    _fl.write(_gav.encode())
+
+            _datas = list()
+            self.api.web.put.side_effect = lambda url, data=None, **kvarg: _datas.append(
+                (url, data if isinstance(data, str) else data.read())) or _ret
+            res = self.api.upload_many(_files, repo='id', metadata=True, workers=3)
+
+        self.assertEqual(res, dict(map(lambda x: (x, _ret), _gavs)))
+        self.api.exists_many.assert_called_once_with(
+            ['a.b:artifact:1.1:pom', 'a.b:artifact:1.1:pom:classifier', 'a.b:other:1.0:pom', 'c.d:artifact:2.0:pom'],
+            repo='id', concurrency=3)
+        _expected_put = posixpath.join(_nexus_url, 'content', 'repositories', 'id')
+        _urls = dict(_datas)
+        self.assertEqual(len(_datas), 7)
+        self.assertEqual(_urls[posixpath.join(_expected_put, 'a', 'b', 'artifact', '1.1', 'artifact-1.1-classifier.zip')],
+                         b'a.b:artifact:1.1:zip:classifier')
+        self.assertEqual(_urls[posixpath.join(_expected_put, 'c', 'd', 'artifact', '2.0', 'artifact-2.0.pom')],
+                         NexusAPI.pom_from_gav('c.d:artifact:2.0:zip', no_packaging=True))
+        self.assertNotIn(posixpath.join(_expected_put, 'a', 'b', 'other', '1.0', 'other-1.0.pom'), _urls)
+        # metadata is updated once per group
+        _expected_meta = posixpath.join(_nexus_url, 'service', 'local', 'metadata', 'repositories', 'id', 'content')
+        self.assertEqual(self.api.web.delete.call_args_list, [
+            mock.call(posixpath.join(_expected_meta, 'a', 'b'), params=None, data=None, files=None, headers=None),
+            mock.call(posixpath.join(_expected_meta, 'c', 'd'), params=None, data=None, files=None, headers=None)])
+
+    def test_upload_many_real_pom(self):
+        _gavs = ['a.b:artifact:1.1:pom', 'a.b:artifact:1.1:jar', 'a.b:artifact:1.1:jar:sources']
+        _ret = mock.MagicMock()
+        _ret.status_code = 201
+        self.api.exists_many = mock.MagicMock(side_effect=lambda gavs, **kvarg: dict.fromkeys(gavs, False))
+        self.api.update_metadata = mock.MagicMock()
+
+        with tempfile.TemporaryDirectory() as _td:
+            _files = list()
+
+            for _gav in _gavs:
+                _files.append((_gav, os.path.join(_td, NexusAPI.gav_to_filename(_gav))))
+
+                with open(_files[-1][1], 'wb') as _fl:
+                    _fl.write(_gav.encode())
+
+            _datas = list()
+            self.api.web.put = mock.MagicMock(side_effect=lambda url, data=None, **kvarg: _datas.append(
+                (url, data if isinstance(data, str) else data.read())) or _ret)
+            res = self.api.upload_many(_files, repo='id', metadata=True)
+
+        self.assertEqual(res, dict(map(lambda x: (x, _ret), _gavs)))
+        # real POM is not checked, generated one is for classified artifact only
+        self.api.exists_many.assert_called_once_with(['a.b:artifact:1.1:pom:sources'], repo='id', concurrency=10)
+        _expected_pom = posixpath.join(_nexus_url, 'content', 'repositories', 'id', 'a', 'b', 'artifact', '1.1',
+                                       'artifact-1.1.pom')
+        self.assertEqual(list(filter(lambda x: x[0] == _expected_pom, _datas)),
+                         [(_expected_pom, b'a.b:artifact:1.1:pom')])
+        self.assertEqual(len(_datas), 4)
+        self.api.update_metadata.assert_called_once_with('a.b', 'id')
+
+    def test_upload_many_error(self):
+        _ret = mock.MagicMock()
+        _ret.status_code = 500
+        self.api.web.put = mock.MagicMock(return_value=_ret)
+
+        with tempfile.NamedTemporaryFile() as _fl:
+            with self.assertRaises(NexusAPI.NexusAPIError):
+                self.api.upload_many([('a.b:artifact:1.1:zip', _fl.name)], repo='id', pom=False)
+
+        with self.assertRaises(FileNotFoundError):
+            self.api.upload_many([('a.b:artifact:1.1:zip', '/nonexistent')], repo='id', pom=False)
+
+    def test_metadata_batch(self):
+        _ret = mock.MagicMock()
+        _ret.status_code = 200
+        self.api.web.delete = mock.MagicMock(return_value=_ret)
+        _expected_meta = posixpath.join(_nexus_url, 'service', 'local', 'metadata', 'repositories', 'id', 'content')
+
+        with self.api.metadata_batch():
+            self.assertIsNone(self.api.update_metadata('a.b', 'id'))
+
+            with self.api.metadata_batch():
+                self.assertIsNone(self.api.update_metadata('c.d', 'id'))
+                self.assertIsNone(self.api.update_metadata('a.b', 'id'))
+
+            self.api.web.delete.assert_not_called()
+            self.assertIsNone(self.api.update_metadata('c.d', 'id'))
+
+        self.assertEqual(self.api.web.delete.call_args_list, [
+            mock.call(posixpath.join(_expected_meta, 'a', 'b'), params=None, data=None, files=None, headers=None),
+            mock.call(posixpath.join(_expected_meta, 'c', 'd'), params=None, data=None, files=None, headers=None)])
+
+        # not deferred outside of batch
+        self.assertEqual(self.api.update_metadata('a.b', 'id'), _ret)
+        self.assertEqual(self.api.web.delete.call_count, 3)
+
+    def test_metadata_batch_error(self):
+        _ret = mock.MagicMock()
+        _ret.status_code = 200
+        self.api.web.delete = mock.MagicMock(return_value=_ret)
+
+        with self.assertRaises(RuntimeError):
+            with self.api.metadata_batch():
+                self.api.update_metadata('a.b', 'id')
+                raise RuntimeError("upload failed")
+
+        self.assertEqual(self.api.web.delete.call_count, 1)
+
     def test_upload_pom_exists(self):
         _gav = 'a.b.c.d:artifact:1.1:zip:classifier'
         _ret = mock.MagicMock()
@@ -582,6 +704,286 @@ class NexusAPITestSuite(TestCase):
             self.assertNotEqual(_gg.get('p'), 'zip')
             self.assertIsNone(_rfl.search(_art))
 
+    def test_ls_filter_object(self):
+        self.api.web = NexusAPILsMock(_nexus_url)
+        _gav = 'test.group.2.id:artifact-1'
+        _filter = NexusAPI.ArtifactFilter(include=['glob:*:zip*', re.compile(':tgz')], exclude=[lambda x: x.endswith(':cl')])
+        _ls = self.api.ls(_gav, filter=_filter)
+        self.assertTrue(_ls)
+
+        for _art in _ls:
+            _gg = NexusAPI.parse_gav(_art)
+            self.assertIn(_gg.get('p'), ['zip', 'tgz'])
+            self.assertNotEqual(_gg.get('c'), 'cl')
+
+        self.assertEqual(sorted(self.api.ls(_gav, filter=_filter)), sorted(_ls))
+        self.assertEqual(sorted(self.api.ls(_gav, filter=['glob:*:zip*', ':tgz'])),
+                         sorted(self.api.ls(_gav, filter='zip|tgz')))
+
+    def test_make_filter(self):
+        self.assertTrue(NexusAPI.make_filter()("a:v:zip"))
+        self.assertTrue(NexusAPI.make_filter("v:z")("a:v:zip"))
+        self.assertFalse(NexusAPI.make_filter("v:z", filter_revert=True)("a:v:zip"))
+        self.assertTrue(NexusAPI.make_filter("glob:a:v:*")("a:v:zip"))
+        self.assertFalse(NexusAPI.make_filter("glob:v:*")("a:v:zip"))
+        self.assertIs(NexusAPI.make_filter("glob:v:*").include[0], NexusAPI.make_filter("glob:v:*").include[0])
+
+        with self.assertRaises(ValueError):
+            NexusAPI.make_filter(NexusAPI.ArtifactFilter(), filter_revert=True)
+
+        with self.assertRaises(ValueError):
+            NexusAPI.make_filter(1)
+
+    def test_ls_verify_batch(self):
+        self.api.web = NexusAPILsMock(_nexus_url)
+        self.api.web.head = mock.MagicMock(wraps=self.api.web.head)
+        self.api.exists_many = mock.MagicMock(wraps=self.api.exists_many)
+        _ls = self.api.ls("test.group.1.id:artifact-2:0.0.0")
+        self.assertEqual(len(_ls), len(self.api.web.packaging) * (len(self.api.web.classifiers) + 1))
+        # all candidates are verified by one batch
+        self.api.exists_many.assert_called_once()
+        self.assertEqual(self.api.web.head.call_count, len(_ls))
+
+    def test_ls_group_bounded(self):
+        self.api.web = NexusAPILsMock(_nexus_url)
+        _gav = "test.group.1.id"
+        _expected = sorted(self.api.ls(_gav))
+        self.api.exists_many = mock.MagicMock(wraps=self.api.exists_many)
+
+        with mock.patch.object(NexusAPI, 'ThreadPoolExecutor', wraps=NexusAPI.ThreadPoolExecutor) as _executor:
+            self.assertEqual(sorted(self.api.ls(_gav)), _expected)
+
+        # one verification batch per level: group and its artifacts, one pool for all searches
+        self.assertEqual(self.api.exists_many.call_count, 2)
+        self.assertEqual(_executor.call_count, 1 + self.api.exists_many.call_count)
+
+    def test_ls_proven_by_search(self):
+        _ret = mock.MagicMock()
+        _ret.status_code = 200
+        _ret.content = b"""<searchNGResponse><data><artifact>
+            <groupId>g</groupId><artifactId>a</artifactId><version>v</version>
+            <artifactHits><artifactHit><repositoryId>releases</repositoryId><artifactLinks>
+                <artifactLink><extension>pom</extension></artifactLink>
+                <artifactLink><extension>zip</extension></artifactLink>
+                <artifactLink><extension>zip</extension><classifier>cl</classifier></artifactLink>
+            </artifactLinks></artifactHit></artifactHits>
+            </artifact></data></searchNGResponse>"""
+        self.api.web.get = mock.MagicMock(return_value=_ret)
+        self.assertEqual(sorted(self.api.ls("g:a:v", repo="releases")), ["g:a:v:zip", "g:a:v:zip:cl"])
+        self.api.web.head.assert_not_called()
+        self.api.web.get.assert_called_once_with(
+            posixpath.join(_nexus_url, "service", "local", "lucene", "search"),
+            params={"g": "g", "a": "a", "v": "v", "repositoryId": "releases"}, data=None, files=None, headers=None)
+
+    def test_iter_ls(self):
+        self.api.web = NexusAPILsMock(_nexus_url)
+
+        for _gav in ["test.group.1.id", "test.group.1.id:artifact-2", "test.group.2.id:::zip",
+                     "test.group.1.id:artifact-2:0.0.0:jar:cl", "surely.not.existent:artifact:9.0.9:zip"]:
+            self.assertEqual(sorted(self.api.iter_ls(_gav, page_size=3)), sorted(self.api.ls(_gav)))
+
+    def test_iter_ls_paging(self):
+        self.api.web = NexusAPILsMock(_nexus_url)
+        self.api.web.get = mock.MagicMock(wraps=self.api.web.get)
+        _iter = self.api.iter_ls("test.group.1.id:artifact-2", page_size=3)
+        self.assertTrue(_iter.__next__().startswith("test.group.1.id:artifact-2:"))
+        # listing is lazy: only the first page is requested so far
+        self.api.web.get.assert_called_once_with(
+            posixpath.join(_nexus_url, "service", "local", "lucene", "search"),
+            params={"g": "test.group.1.id", "a": "artifact-2", "from": 0, "count": 3},
+            data=None, files=None, headers=None, stream=True)
+
+        _rest = list(_iter)
+        self.assertEqual(len(_rest) + 1, len(self.api.ls("test.group.1.id:artifact-2")))
+        _pages = list(filter(lambda x: "from" in x[1]["params"], self.api.web.get.call_args_list))
+        self.assertEqual(list(map(lambda x: x[1]["params"]["from"], _pages)), [0, 3])
+
+    def test_iter_ls_close(self):
+        self.api.web = NexusAPILsMock(_nexus_url)
+        _expected = len(self.api.ls("test.group.1.id:artifact-2"))
+        _responses = list()
+        _get = self.api.web.get
+        self.api.web.get = mock.MagicMock(side_effect=lambda *args, **kvargs: _responses.append(
+            _get(*args, **kvargs)) or _responses[-1])
+        _iter = self.api.iter_ls("test.group.1.id:artifact-2", page_size=3)
+        _iter.__next__()
+        self.assertFalse(_responses[-1].closed)
+        # consumer stops early: the page being read is closed anyway
+        _iter.close()
+        self.assertEqual(len(_responses), 1)
+        self.assertTrue(_responses[-1].closed)
+
+        self.assertEqual(len(list(self.api.iter_ls("test.group.1.id:artifact-2", page_size=3))), _expected)
+        self.assertTrue(all(map(lambda x: x.closed, _responses)))
+
+    def test_iter_ls_too_many_results(self):
+        _ret = mock.MagicMock()
+        _ret.status_code = 200
+        _ret.raw = None
+        _ret.url = _nexus_url
+        _ret.content = b"""<searchNGResponse><totalCount>0</totalCount><tooManyResults>true</tooManyResults>
+            <data/></searchNGResponse>"""
+        self.api.web.get = mock.MagicMock(return_value=_ret)
+
+        with self.assertRaisesRegex(NexusAPI.NexusAPIError, "Too many search results"):
+            list(self.api.iter_ls("g:a"))
+
+        _ret.close.assert_called_once_with()
+
+    def test_exists_many(self):
+        self.api.web = NexusAPILsMock(_nexus_url)
+        self.api.web.head = mock.MagicMock(wraps=self.api.web.head)
+        _existent = ["test.group.0.id:artifact-0:0.0.0:zip:cl", "test.group.1.id:artifact-2:1.2.1:jar",
+                     "test.group.1.id:artifact-2:0.0.0:rpm:vx"]
+        _nonexistent = ["test.group.0.id:artifact-0:0.0.0:zip:xx", "surely.not.existent:artifact:9.0.9:zip"]
+        _expected = dict(list(map(lambda x: (x, True), _existent)) + list(map(lambda x: (x, False), _nonexistent)))
+
+        self.assertEqual(self.api.exists_many(_existent + _nonexistent, concurrency=3), _expected)
+        self.assertEqual(self.api.web.head.call_count, len(_expected))
+        self.assertEqual(self.api.exists_many([]), dict())
+
+    def test_exists_many_search(self):
+        self.api.web = NexusAPILsMock(_nexus_url)
+        self.api.web.head = mock.MagicMock(wraps=self.api.web.head)
+        _existent = ["test.group.0.id:artifact-0:0.0.0:zip:cl", "test.group.1.id:artifact-2:1.2.1:jar",
+                     "test.group.1.id:artifact-2:0.0.0:rpm:vx"]
+        _nonexistent = ["test.group.0.id:artifact-0:0.0.0:zip:xx", "surely.not.existent:artifact:9.0.9:zip"]
+        _expected = dict(list(map(lambda x: (x, True), _existent)) + list(map(lambda x: (x, False), _nonexistent)))
+
+        self.assertEqual(self.api.exists_many(_existent + _nonexistent, search=True), _expected)
+        # only artifacts not found by search are checked directly
+        self.assertEqual(self.api.web.head.call_count, len(_nonexistent))
+
+    def test_exists_many_dict(self):
+        self.api.web = NexusAPILsMock(_nexus_url)
+        _gav = NexusAPI.parse_gav("test.group.0.id:artifact-0:0.0.0:zip:cl")
+        self.assertEqual(self.api.exists_many([_gav]), {"test.group.0.id:artifact-0:0.0.0:zip:cl": True})
+
+    def test_exists_many_error(self):
+        _ret = mock.MagicMock()
+        _ret.status_code = 500
+        self.api.web.head = mock.MagicMock(return_value=_ret)
+
+        with self.assertRaises(NexusAPI.NexusAPIError):
+            self.api.exists_many(["g:a:v:p", "g:a:v:c"])
+
+    def test_download_many(self):
+        _contents = {"g:a:v:p": b"artifact data", "g:b:v:p": None, "g:c:v:p:c": b"classified data"}
+
+        def _get(url, **kvarg):
+            _gav = [_x for _x in _contents.keys() if url.endswith(NexusAPI.gav_to_path(_x))].pop()
+            _ret = mock.MagicMock()
+            _ret.status_code = 404 if _contents[_gav] is None else 200
+            _ret.raw = io.BytesIO(_contents[_gav] or b"")
+            return _ret
+
+        self.api.web.get = mock.MagicMock(side_effect=_get)
+
+        with tempfile.TemporaryDirectory() as _td:
+            _res = self.api.download_many(list(_contents.keys()), _td, workers=2, repo="download")
+            self.assertEqual(sorted(os.listdir(_td)), ["a-v.p", "c-v-c.p"])
+
+            for _gav, _content in _contents.items():
+                if _content is None:
+                    self.assertIsNone(_res[_gav])
+                    continue
+
+                self.assertEqual(_res[_gav]["path"], os.path.join(_td, NexusAPI.gav_to_filename(_gav)))
+                self.assertEqual(_res[_gav]["size"], len(_content))
+
+                with open(_res[_gav]["path"], "rb") as _fl:
+                    self.assertEqual(_fl.read(), _content)
+
+        self.assertEqual(self.api.web.get.call_count, len(_contents))
+        self.api.web.get.assert_any_call(
+                posixpath.join(_nexus_url, "content", "repositories", "download", NexusAPI.gav_to_path("g:a:v:p")),
+                data=None, files=None, headers=None, params=None, stream=True)
+
+    def test_download_many_error(self):
+        _ret = mock.MagicMock()
+        _ret.status_code = 500
+        self.api.web.get = mock.MagicMock(return_value=_ret)
+
+        with tempfile.TemporaryDirectory() as _td:
+            with self.assertRaises(NexusAPI.NexusAPIError):
+                self.api.download_many(["g:a:v:p"], _td, filenames=["file.zip"])
+
+            self.assertEqual(os.listdir(_td), [])
+
+            with self.assertRaises(ValueError):
+                self.api.download_many(["g:a:v:p"], _td, filenames=["file.zip", "file1.zip"])
+
+    def test_download(self):
+        _content = b"artifact data"
+        _md5 = {"value": hashlib.md5(_content).hexdigest()}
+
+        def _get(url, **kvarg):
+            _ret = mock.MagicMock()
+            _ret.status_code = 200
+
+            if "service/local" in url:
+                _ret.content = ("<data><data><md5Hash>%s</md5Hash><mimeType>application/zip</mimeType></data></data>" % _md5["value"]).encode()
+            else:
+                _ret.raw = io.BytesIO(_content)
+
+            return _ret
+
+        self.api.web.head = mock.MagicMock(return_value=mock.MagicMock(status_code=200, headers={}))
+        self.api.web.get = mock.MagicMock(side_effect=_get)
+
+        with tempfile.TemporaryDirectory() as _td:
+            _path = os.path.join(_td, "file.zip")
+            self.assertEqual(self.api.download("g:a:v:p", _path, repo="download"), _path)
+
+            with open(_path, "rb") as _fl:
+                self.assertEqual(_fl.read(), _content)
+
+            self.api.web.head.assert_called_once_with(
+                posixpath.join(_nexus_url, "content", "repositories", "download", NexusAPI.gav_to_path("g:a:v:p")),
+                data=None, files=None, headers=None, params=None)
+
+            _md5["value"] = hashlib.md5(b"other data").hexdigest()
+
+            with self.assertRaises(NexusAPI.NexusAPIError):
+                self.api.download("g:a:v:p", _path, repo="download", resume=False)
+
+            self.assertFalse(os.path.exists(_path))
+
+    def test_cat_checksums(self):
+        _content = b"artifact data"
+        _ret = mock.MagicMock(status_code=200, content=_content, headers={})
+        self.api.web.get = mock.MagicMock(return_value=_ret)
+        _res = self.api.cat("g:a:v:p", response=True, checksums=["md5", "sha256"])
+        self.assertEqual(_res.checksums, {"md5": hashlib.md5(_content).hexdigest(),
+                                          "sha256": hashlib.sha256(_content).hexdigest()})
+        self.api.web.get.assert_called_once_with(
+            posixpath.join(_nexus_url, "content", "repositories", "public", NexusAPI.gav_to_path("g:a:v:p")),
+            data=None, files=None, headers=None, params=None, stream=False)
+
+    def test_cat_verify(self):
+        _content = b"artifact data"
+        _headers = {"X-Checksum-Sha1": hashlib.sha1(_content).hexdigest()}
+        self.api.web.get = mock.MagicMock(
+            side_effect=lambda *args, **kvarg: mock.MagicMock(status_code=200, raw=io.BytesIO(_content), headers=_headers))
+
+        with tempfile.TemporaryDirectory() as _td:
+            _path = os.path.join(_td, "file.zip")
+            _res = self.api.cat("g:a:v:p", stream=True, write_to=_path, verify=True)
+            self.assertEqual(_res.checksums["md5"], hashlib.md5(_content).hexdigest())
+
+            with open(_path, "rb") as _fl:
+                self.assertEqual(_fl.read(), _content)
+
+            # checksum header is used, no information requested
+            self.assertEqual(self.api.web.get.call_count, 1)
+
+            _headers["X-Checksum-Sha1"] = hashlib.sha1(b"other data").hexdigest()
+
+            with self.assertRaises(NexusAPI.NexusAPIError):
+                self.api.cat("g:a:v:p", stream=True, write_to=_path, verify=True)
+
+            self.assertFalse(os.path.exists(_path))
+
     def test_gav_url(self):
         self.assertEqual(self.api.gav_get_url('groupId:artifactId:version:packaging'), 
                 posixpath.join(_nexus_url, "content", "repositories", "public", "groupId",
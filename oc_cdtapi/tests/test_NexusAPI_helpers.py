@@ -1,9 +1,14 @@
+import doctest
 from unittest import TestCase
 
 from oc_cdtapi import NexusAPI
 
 from xml.etree import ElementTree
 
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(NexusAPI))
+    return tests
+
 class GavToPathTestSuite(TestCase):
     def test_full_gav_converted_from_unicode (self):
         path = NexusAPI.gav_to_path(u'group.id:artifact:0.1:pkg:classifier')
@@ -408,3 +413,74 @@ class GavFromPathTestSuite(TestCase):
         gav = NexusAPI.gav_from_path('group/test/help/id/factart/1.2.3.4.5.6/factart-1.2.3.4.5.6', dictionary=False)
         self.assertEqual(gav, 'group.test.help.id:factart:1.2.3.4.5.6')
 
+
+class GavTestSuite(TestCase):
+    _gavs = ['group.id:artifact:0.1', 'group.id:artifact:0.1:pkg', 'group.id:artifact:0.1:pkg:classifier',
+             'group.id:artifact:0.1::classifier', 'group.id:artifact:0.1:']
+
+    def test_same_as_string_forms(self):
+        for _gav_s in self._gavs:
+            _gav = NexusAPI.Gav.parse(_gav_s)
+            _gav_d = NexusAPI.parse_gav(_gav_s)
+            self.assertEqual(_gav.path, NexusAPI.gav_to_path(_gav_s, relaxed=True))
+            self.assertEqual(_gav.filename, NexusAPI.gav_to_filename(_gav_d))
+            self.assertEqual(str(_gav), NexusAPI.gav_to_str(_gav_d))
+            self.assertEqual(_gav.to_dict(), _gav_d)
+
+    def test_accepted_as_gav(self):
+        _gav = NexusAPI.Gav.parse('group.id:artifact:0.1:pkg:classifier')
+        self.assertEqual('group/id/artifact/0.1/artifact-0.1-classifier.pkg', NexusAPI.gav_to_path(_gav))
+        self.assertEqual('artifact-0.1-classifier.pkg', NexusAPI.gav_to_filename(_gav))
+        self.assertEqual('artifact/0.1/artifact-0.1-classifier.pkg', NexusAPI.gav_to_artifact_path(_gav))
+        self.assertEqual('group.id:artifact:0.1:pkg:classifier', NexusAPI.gav_to_str(_gav))
+        self.assertEqual(NexusAPI.pom_from_gav(_gav), NexusAPI.pom_from_gav(str(_gav)))
+        _gav_d = NexusAPI.parse_gav(_gav)
+        _gav_d['p'] = 'zip'
+        self.assertEqual('pkg', _gav.p)
+
+    def test_interned(self):
+        _gav = NexusAPI.Gav.parse('group.id:artifact:0.1')
+        self.assertIs(_gav, NexusAPI.Gav.parse('group.id:artifact:0.1'))
+        self.assertEqual(_gav, NexusAPI.Gav.parse({'g': 'group.id', 'a': 'artifact', 'v': '0.1'}))
+        self.assertEqual(_gav, NexusAPI.Gav('group.id', 'artifact', '0.1'))
+        self.assertEqual(_gav, NexusAPI.Gav.from_path('group/id/artifact/0.1/artifact-0.1'))
+        self.assertEqual({_gav: 1}[NexusAPI.Gav('group.id', 'artifact', '0.1')], 1)
+        self.assertIsNone(_gav.p)
+
+    def test_immutable(self):
+        _gav = NexusAPI.Gav.parse('group.id:artifact:0.1')
+
+        with self.assertRaises(AttributeError):
+            _gav.g = 'other'
+
+    def test_invalid(self):
+        for _gav in ['group.id:artifact', 'g:a:v:p:c:x', None, {'g': 'group.id'}]:
+            with self.assertRaises(ValueError):
+                NexusAPI.Gav.parse(_gav)
+
+class BatchConversionTestSuite(TestCase):
+    _gavs = ['group.id:artifact:0.1', 'group.id:artifact:0.1:pkg', 'group.id:artifact:0.1:pkg:classifier',
+             'group.id:artifact:0.1::classifier', 'group.id:artifact:0.1:', 'g:a:v:tar.gz:c',
+             {'g': 'group.id', 'a': 'artifact', 'v': '0.1', 'p': 'zip'}, NexusAPI.Gav('group', 'artifact', '1.0')]
+    _paths = ['/group/id/artifact/0.1/artifact-0.1-classifier.pkg', 'group/id/artifact/0.1/artifact-0.1.pkg',
+              'group/test/help/id/factart/1.2.3.4.5.6/factart-1.2.3.4.5.6', './g/a/v/other-v.zip',
+              'g/a/v/a-v-c.tar.gz', 'g/a/v/a-v.-c', 'g/a/v/a-v-.pom']
+
+    def test_paths_from_gavs(self):
+        self.assertEqual(NexusAPI.paths_from_gavs(iter(self._gavs)), list(map(NexusAPI.gav_to_path, self._gavs)))
+
+    def test_paths_from_gavs_invalid(self):
+        for _gav in ['group.id:artifact', 'g:a:v:p:c:x', {'g': 'group.id'}]:
+            with self.assertRaises(ValueError):
+                NexusAPI.paths_from_gavs(['g:a:v', _gav])
+
+    def test_gavs_from_paths(self):
+        for _dictionary in [True, False]:
+            self.assertEqual(NexusAPI.gavs_from_paths(self._paths, dictionary=_dictionary),
+                             [NexusAPI.gav_from_path(_path, dictionary=_dictionary) for _path in self._paths])
+
+    def test_processes(self):
+        _gavs = ['group.id%d:artifact:%d.0:zip' % (_i % 10, _i) for _i in range(NexusAPI._batch_processes_min)]
+        _paths = NexusAPI.paths_from_gavs(_gavs, processes=2)
+        self.assertEqual(_paths, list(map(NexusAPI.gav_to_path, _gavs)))
+        self.assertEqual(NexusAPI.gavs_from_paths(_paths, dictionary=False, processes=2), _gavs)
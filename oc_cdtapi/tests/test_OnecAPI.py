@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import patch, MagicMock
 from oc_cdtapi.OnecAPI import OnecAPI, OnecError
+from .mocks.StreamedResponse import streamed_response
 
 class TestOnecAPI(unittest.TestCase):
 
@@ -331,6 +332,26 @@ class TestOnecAPI(unittest.TestCase):
         
         self.assertIsNone(result)
 
+    @patch('oc_cdtapi.OnecAPI.OnecAPI.get')
+    def test_iter_clients_licenses(self, mock_get):
+        """Test streamed license iteration"""
+        licenses = [{'client': 'CLIENT001', 'code': 'LIC1'}, {'client': 'CLIENT002', 'code': 'LIC2'}]
+        mock_get.return_value = streamed_response(licenses)
+
+        result = self.api.iter_clients_licenses(['CLIENT001', 'CLIENT002'])
+
+        self.assertEqual(list(result), licenses)
+        mock_get.assert_called_once_with('clientLicenses', params={'client': 'CLIENT001|CLIENT002'}, headers=None,
+                                         stream=True)
+
+    @patch('oc_cdtapi.OnecAPI.OnecAPI.get')
+    def test_iter_clients_licenses_error(self, mock_get):
+        """Test streamed license iteration API error"""
+        mock_get.side_effect = OnecError(code=500, text='Internal Server Error')
+
+        with self.assertRaises(OnecError):
+            list(self.api.iter_clients_licenses())
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
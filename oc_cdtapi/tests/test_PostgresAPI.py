@@ -1,6 +1,12 @@
 import unittest
 from unittest.mock import patch, MagicMock
+
+import requests
+
+from oc_cdtapi.API import HttpAPIError
 from oc_cdtapi.PgAPI import PostgresAPI
+from .mocks.StreamedResponse import streamed_response
+
 
 class TestPostgresAPI(unittest.TestCase):
 
@@ -258,6 +264,58 @@ class TestPostgresAPI(unittest.TestCase):
 
         mock_post.assert_called_once_with(f'rest/api/1/manage_citype', json=mock_payload)
 
+    @patch('os.getenv')
+    def test_post_new_component_invalidates_citype(self, mock_getenv):
+        mock_getenv.return_value = 'dummy_token'
+        api = PostgresAPI(root='http://test.url', cache=True)
+        citype = requests.Response()
+        citype.status_code = 200
+        citype._content = b'{"code": "NEWDSTR", "name": "Old name"}'
+        api.web.get = MagicMock(return_value=citype)
+        api.web.post = MagicMock(return_value=MagicMock(status_code=200))
+
+        self.assertEqual(api.get_ci_type_by_code("NEWDSTR")["name"], "Old name")
+        self.assertEqual(api.get_ci_type_by_code("NEWDSTR")["name"], "Old name")
+        self.assertEqual(api.web.get.call_count, 1)
+
+        api.post_new_component({"ci_type_id": "NEWDSTR", "name": "New name"})
+        api.get_ci_type_by_code("NEWDSTR")
+        # own write is visible immediately
+        self.assertEqual(api.web.get.call_count, 2)
+
+    @patch('oc_cdtapi.PgAPI.PostgresAPI.get')
+    def test_iter_clients_list(self, mock_get):
+        clients = [{"code": "_TEST_1", "can_receive": True}, {"code": "_TEST_2", "can_receive": False}]
+        mock_get.return_value = streamed_response(clients)
+
+        self.assertEqual(list(self.api.iter_clients_list()), clients)
+        mock_get.assert_called_once_with('rest/api/1/clients', params=None, headers=None, stream=True)
+
+    @patch('oc_cdtapi.PgAPI.PostgresAPI.get')
+    def test_iter_deliveries(self, mock_get):
+        mock_get.return_value = streamed_response([{"gav": "g:a:v", "flag_approved": True}])
+        request = {"flag_approved": True}
+
+        self.assertEqual(list(self.api.iter_deliveries(request)), [{"gav": "g:a:v", "flag_approved": True}])
+        mock_get.assert_called_once_with('rest/api/1/deliveries', params=request, headers=None, stream=True)
+
+    @patch('oc_cdtapi.PgAPI.PostgresAPI.get')
+    def test_iter_task_custom_filter(self, mock_get):
+        mock_get.return_value = streamed_response([{"id": 1, "owner": "owner"}, {"id": 2, "owner": "owner"}])
+
+        result = self.api.iter_task_custom_filter(owner="owner")
+
+        self.assertEqual([task['id'] for task in result], [1, 2])
+        mock_get.assert_called_once_with('rest/api/1/tasks', params={"owner": "owner"}, headers=None, stream=True)
+
+        mock_get.side_effect = HttpAPIError(code=404)
+        self.assertEqual(list(self.api.iter_task_custom_filter(owner="owner")), [])
+
+        mock_get.side_effect = HttpAPIError(code=500)
+
+        with self.assertRaises(HttpAPIError):
+            list(self.api.iter_task_custom_filter(owner="owner"))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
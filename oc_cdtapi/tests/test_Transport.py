@@ -0,0 +1,220 @@
+import io
+import socket
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import requests
+
+from .. import API, Metrics, Transport
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _body(self):
+        if self.headers.get('Transfer-Encoding') != 'chunked':
+            return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        _body = b''
+
+        for _size in iter(lambda: int(self.rfile.readline().strip(), 16), 0):
+            _body += self.rfile.read(_size)
+            self.rfile.readline()
+
+        self.rfile.readline()
+        return _body
+
+    def _process(self):
+        self.server.received.append((self.command, self.path, self._body()))
+        self.server.received_headers.append(self.headers)
+        _response = self.server.responses.pop(0) if self.server.responses else (200, b'hello, world!')
+        _code, _data = _response[:2]
+        self.send_response(_code)
+        self.send_header('Content-Length', str(len(_data)))
+
+        for _name, _value in (_response[2] if len(_response) > 2 else []):
+            self.send_header(_name, _value)
+
+        self.end_headers()
+
+        if self.command != 'HEAD':
+            self.wfile.write(_data)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = _process
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(object):
+    """
+    HTTP server running in a thread, answers with responses given and then with 200.
+    Response is (code, body) or (code, body, list of header name and value pairs)
+    """
+
+    def __init__(self, responses=None):
+        self._srv = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._srv.responses = list(responses or [])
+        self._srv.received = list()
+        self.received = self._srv.received
+        self._srv.received_headers = list()
+        self.received_headers = self._srv.received_headers
+        self.url = 'http://127.0.0.1:%d' % self._srv.server_address[1]
+        self._thread = threading.Thread(target=self._srv.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._srv.shutdown()
+        self._srv.server_close()
+
+
+@unittest.skipIf(Transport.httpx is None, "httpx[http2] is not installed")
+class TestHttp2Adapter(unittest.TestCase):
+
+    def _api(self, url, **kvarg):
+        kvarg.setdefault('retry_policy', {'backoff_factor': 0})
+        return API.HttpAPI(root=url, transport='http2', **kvarg)
+
+    def test_adapter(self):
+        _api = self._api('http://test.url', pool_maxsize=50, connect_timeout=1, read_timeout=2)
+        _adapter = _api.web.get_adapter('https://test.url')
+        self.assertIsInstance(_adapter, Transport.Http2Adapter)
+        self.assertEqual((_adapter.pool_maxsize, _adapter.timeout), (50, (1, 2)))
+        self.assertIsInstance(_adapter.max_retries, API.RetryPolicy)
+
+    def test_methods(self):
+        with _Server() as _srv:
+            _api = self._api(_srv.url)
+            _resp = _api.get('a/b', params={'c': 'd'})
+            self.assertEqual((_resp.status_code, _resp.content, _resp.text), (200, b'hello, world!', 'hello, world!'))
+            self.assertEqual(_resp.headers['content-length'], '13')
+            self.assertEqual(_api.post('a', data=b'payload').status_code, 200)
+            self.assertEqual(_api.put('a', data='text').status_code, 200)
+            self.assertEqual(_api.delete('a').status_code, 200)
+            self.assertEqual(_api.head('a').content, b'')
+
+        self.assertEqual(_srv.received, [('GET', '/a/b?c=d', b''), ('POST', '/a', b'payload'), ('PUT', '/a', b'text'),
+                                         ('DELETE', '/a', b''), ('HEAD', '/a', b'')])
+
+    def test_upload_stream(self):
+        with _Server() as _srv:
+            self._api(_srv.url).upload_stream('a', data=iter([b'chunk1', b'chunk2']))
+            self._api(_srv.url).upload_stream('a', data=io.BytesIO(b'file data'))
+
+        self.assertEqual([x[2] for x in _srv.received], [b'chunk1chunk2', b'file data'])
+
+    def test_stream(self):
+        _bio = io.BytesIO()
+
+        with _Server() as _srv:
+            _resp = self._api(_srv.url).get('a', stream=True, write_to=_bio, checksums=['md5'])
+
+        self.assertEqual(_bio.getvalue(), b'hello, world!')
+        self.assertEqual(_resp.checksums, {'md5': '3adbbad1791fbae3ec908894c4963870'})
+
+    def test_error(self):
+        with _Server([(404, b'not found')]) as _srv:
+            with self.assertRaises(API.HttpAPIError) as _ctx:
+                self._api(_srv.url).get('a')
+
+        self.assertEqual((_ctx.exception.code, _ctx.exception.resp.text), (404, 'not found'))
+
+    def test_retry(self):
+        _registry = Metrics.MetricsRegistry()
+
+        with _Server([(503, b''), (502, b'')]) as _srv:
+            _resp = self._api(_srv.url, instruments=[_registry]).get('a')
+
+        self.assertEqual(_resp.content, b'hello, world!')
+        self.assertEqual(len(_srv.received), 3)
+        self.assertEqual(_registry.snapshot()[('HttpAPI', 'GET', 'a')]['retries'], 2)
+
+    def test_retry_exhausted(self):
+        with _Server([(503, b'')] * 3) as _srv:
+            with self.assertRaises(API.HttpAPIError) as _ctx:
+                self._api(_srv.url, retry_policy={'total': 2, 'backoff_factor': 0}).get('a')
+
+        self.assertEqual(_ctx.exception.code, 503)
+        self.assertEqual(len(_srv.received), 3)
+
+    def test_post_not_retried(self):
+        with _Server([(503, b'')]) as _srv:
+            with self.assertRaises(API.HttpAPIError):
+                self._api(_srv.url).post('a', data=b'payload')
+
+        self.assertEqual(len(_srv.received), 1)
+
+    def test_connection_error(self):
+        with socket.socket() as _sock:
+            _sock.bind(('127.0.0.1', 0))
+            _url = 'http://127.0.0.1:%d' % _sock.getsockname()[1]
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self._api(_url, retry_policy={'total': 1, 'backoff_factor': 0}).get('a')
+
+    def test_cookies(self):
+        with _Server([(200, b'', [('Set-Cookie', 'JSESSIONID=abc; Path=/'), ('Set-Cookie', 'other=1; Path=/')])]) \
+                as _srv:
+            _api = self._api(_srv.url)
+            _resp = _api.get('login')
+            _api.get('crumb')
+
+        self.assertEqual(_resp.cookies.get('JSESSIONID'), 'abc')
+        self.assertEqual((_api.web.cookies.get('JSESSIONID'), _api.web.cookies.get('other')), ('abc', '1'))
+        self.assertIsNone(_srv.received_headers[0].get('Cookie'))
+        self.assertEqual(sorted(_srv.received_headers[1].get('Cookie').split('; ')), ['JSESSIONID=abc', 'other=1'])
+
+    def test_proxies(self):
+        with _Server() as _srv:
+            _api = self._api('http://test.invalid')
+            _api.web.proxies = {'http': _srv.url}
+            self.assertEqual(_api.get('a', params={'b': 'c'}).content, b'hello, world!')
+
+            # environment proxies are taken by requests.Session, 'no_proxy' included
+            with patch.dict('os.environ', {'HTTP_PROXY': _srv.url, 'NO_PROXY': 'test.direct'}):
+                _api = self._api('http://test.invalid')
+                self.assertEqual(_api.get('d').status_code, 200)
+
+                with self.assertRaises(requests.exceptions.ConnectionError):
+                    self._api('http://test.direct', retry_policy={'total': 0}).get('e')
+
+        self.assertEqual([x[:2] for x in _srv.received], [('GET', 'http://test.invalid/a?b=c'),
+                                                          ('GET', 'http://test.invalid/d')])
+
+    def test_reap_idle_connections(self):
+        with _Server() as _srv:
+            _api = self._api(_srv.url)
+            _api.get('a')
+            _adapter = _api.web.get_adapter(_srv.url)
+            self.assertEqual(len(_adapter._clients), 1)
+            _api.reap_idle_connections()
+            self.assertEqual(len(_adapter._clients), 0)
+            self.assertEqual(_api.get('a').status_code, 200)
+
+
+class TestTransportSelection(unittest.TestCase):
+
+    def test_default(self):
+        self.assertIsInstance(API.HttpAPI(root='http://test.url').web.get_adapter('http://test.url'), API.PoolAdapter)
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            API.HttpAPI(root='http://test.url', transport='spdy')
+
+    @patch.dict('os.environ', {'TRANSPORTTEST_URL': 'http://test.url', 'TRANSPORTTEST_TRANSPORT': 'spdy'})
+    def test_environment(self):
+        class _TransportTestAPI(API.HttpAPI):
+            _env_prefix = 'TRANSPORTTEST'
+
+        # wrong environment value is ignored
+        self.assertEqual(_TransportTestAPI().transport, 'requests')
+
+    @patch.object(Transport, 'httpx', None)
+    def test_not_installed(self):
+        with self.assertRaises(ValueError):
+            API.HttpAPI(root='http://test.url', transport='http2')
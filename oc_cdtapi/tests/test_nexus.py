@@ -35,6 +35,18 @@ class MockAPI():
     def cat(self, *args, **kwargs):
         pass
 
+    def exists_many(self, gavs, repo=None, concurrency=None):
+        return dict((gav, "existing" in gav) for gav in gavs)
+
+    def upload_many(self, files, repo=None, pom=True, metadata=False, workers=None):
+        if not repo:
+            raise ValueError("You must provide repo name")
+        return dict((gav, "<Response [201]>") for gav, path in files)
+
+    def download_many(self, gavs, dest_dir, workers=None, repo=None, filenames=None):
+        return dict((gav, {"path": filename, "size": 1024, "seconds": 1.0, "rate": 1024.0} if "missing" not in gav else None)
+                for gav, filename in zip(gavs, filenames))
+
     def delete(self, *args, **kwargs):
         res = "<Response [204]>"
         return res
@@ -160,6 +172,17 @@ class ArtifactToolTestSuite(TestCase):
         for _art, _file in _arts.items():
             _check_mthd(self.cout.getvalue(), "Downloaded: '%s' ==> '%s'" % (_art, _file))
 
+    def test_download_artifact_parallel(self):
+        _arts = {"GG:AA:VV": "test_file1.zip", "GG1:AA1:VV1": "test_file2.zip"}
+        self.conn.download_artifact(list(_arts.keys()), result_filenames=list(_arts.values()), parallel=2)
+
+        for _art, _file in _arts.items():
+            self.assertRegex(self.cout.getvalue(), "Downloaded: '%s' ==> '%s' \\(1024 bytes" % (_art, _file))
+
+    def test_download_artifact_parallel_missing(self):
+        with self.assertRaises(FileNotFoundError):
+            self.conn.download_artifact(["GG:AA:VV", "GG1:missing:VV1"], parallel=2)
+
     def test_delete_artifact_no_upload_repo(self):
         with self.assertRaises(ValueError): 
             self.conn.delete_artifact(["GG:AA:VV", "GG1:AA1:VV1"])
@@ -179,6 +202,35 @@ class ArtifactToolTestSuite(TestCase):
         with self.assertRaises(ValueError) as ec:
             self.conn.upload_artifact(["GG:AA:VV"], self.tempfile.name, None)
 
+    def test_upload_manifest(self):
+        with tempfile.NamedTemporaryFile(mode="w") as _manifest:
+            _manifest.write("# comment\n\nGG:AA:VV\t%s\nGG1:existing:VV1\t%s\n" % (self.tempfile.name, self.tempfile.name))
+            _manifest.flush()
+            _res = self.conn.upload_manifest(_manifest.name, "test", parallel=2)
+            self.assertEqual(_res, {"GG:AA:VV": "<Response [201]>", "GG1:existing:VV1": "<Response [201]>"})
+            self.assertRegex(self.cout.getvalue(), "Uploaded: .* ==> 'GG1:existing:VV1'")
+
+            _res = self.conn.upload_manifest(_manifest.name, "test", no_check=False, parallel=2)
+            self.assertEqual(_res, {"GG:AA:VV": "<Response [201]>"})
+            self.assertRegex(self.cout.getvalue(), "'GG1:existing:VV1' already exists, skipping upload")
+
+    def test_upload_manifest_incorrect_file(self):
+        with tempfile.NamedTemporaryFile(mode="w") as _manifest:
+            _manifest.write("GG:AA:VV\t/nonexistent/file\n")
+            _manifest.flush()
+
+            with self.assertRaises(ValueError):
+                self.conn.upload_manifest(_manifest.name, "test")
+
+    def test_upload_manifest_malformed_line(self):
+        for _line in ["GG:AA:VV %s" % self.tempfile.name, "GG:AA:VV\t ", "\t%s" % self.tempfile.name]:
+            with tempfile.NamedTemporaryFile(mode="w") as _manifest:
+                _manifest.write("# comment\n\n   \nGG:AA:VV\t%s\n%s\n" % (self.tempfile.name, _line))
+                _manifest.flush()
+
+                with self.assertRaisesRegex(ValueError, "line 5: GAV and file path separated by tab expected"):
+                    self.conn.upload_manifest(_manifest.name, "test")
+
     def test_upload_artifact_multiple_gavs(self):
         _list = ["GG:AA:VV", "GG1:AA1:VV1"]
         self.conn.upload_artifact(_list, self.tempfile.name, "test")
@@ -2,7 +2,7 @@
 
 from setuptools import setup
 
-__version = "3.40.1"
+__version = "3.65.0"
 
 install_requires = [
     "requests",
@@ -11,6 +11,13 @@ install_requires = [
     "hvac"
 ]
 tests_require = []
+extras_require = {
+    "async": ["aiohttp"],
+    "otel": ["opentelemetry-api"],
+    "http2": ["httpx[http2]>=0.26"],
+    "json": ["orjson"],
+    "stream-json": ["ijson"]
+}
 
 spec = {
     "name": "oc-cdtapi",
@@ -22,7 +29,8 @@ spec = {
     "packages": ["oc_cdtapi", "oc_cdtapi.ForemanAPI"],
     "install_requires": install_requires,
     "tests_require": tests_require,
-    "python_requires": ">=3.6",
+    "extras_require": extras_require,
+    "python_requires": ">=3.7",
     "scripts": [
         "nexus.py"
     ],